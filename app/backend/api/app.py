@@ -4,6 +4,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 # routers
+from app.backend.api.compression import CompressionMiddleware
 from app.backend.api.routers.auth_routes import (
     router as auth_router,  # type: ignore[import]
 )
@@ -14,6 +15,9 @@ from app.backend.api.routers.ingredient_abstractions import (
 from app.backend.api.routers.ingredients import (
     router as ingredients_router,  # type: ignore[import]
 )
+from app.backend.api.routers.metrics import (
+    router as metrics_router,  # type: ignore[import]
+)
 from app.backend.api.routers.receipts import (
     router as receipts_router,  # type: ignore[import]
 )
@@ -24,8 +28,10 @@ from app.backend.api.routers.recommendation import (
     router as recommendation_router,  # type: ignore[import]
 )
 from app.backend.api.routers.users import router as users_router  # type: ignore[import]
-from app.backend.database import Base, engine
+from app.backend.database import Base, SessionLocal, engine
+from app.backend.services import token_store
 from app.backend.services.food_master_loader import sync_food_master
+from app.backend.services.food_search import load_food_search_index
 from app.backend.services.recipe_loader import (
     sync_recipe_master,  # type: ignore[import]
 )
@@ -64,6 +70,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 """
 if STATIC_RECIPE_HTML_DIR.exists():
     app.mount(
@@ -98,6 +105,7 @@ app.include_router(
 app.include_router(recipes_router, prefix="/api/v1/recipes", tags=["recipes"])
 app.include_router(receipts_router, prefix="/api/v1/receipts", tags=["receipts"])
 app.include_router(users_router, prefix="/api/v1/users", tags=["users"])
+app.include_router(metrics_router, prefix="/api/v1/metrics", tags=["metrics"])
 
 
 @app.on_event("startup")
@@ -105,3 +113,17 @@ def on_startup() -> None:
     Base.metadata.create_all(bind=engine)
     sync_food_master()
     sync_recipe_master()
+    # 補完用の食材索引を先に作っておき、初回の入力から DB を引かないようにする
+    with SessionLocal() as session:
+        load_food_search_index(session)
+
+
+@app.on_event("startup")
+async def start_background_tasks() -> None:
+    # 期限切れリフレッシュトークンを定期的にまとめて削除する
+    token_store.start_sweeper(SessionLocal)
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks() -> None:
+    await token_store.stop_sweeper()
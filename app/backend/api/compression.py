@@ -0,0 +1,152 @@
+"""Response compression: brotli when installed and accepted, otherwise gzip."""
+
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Any, Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # pragma: no cover - optional dependency
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None  # type: ignore[assignment]
+
+# これより小さいレスポンスは圧縮しない（ヘッダーと CPU のほうが高くつく）
+RESPONSE_COMPRESSION_MIN_BYTES = int(
+    os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024")
+)
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+_EXCLUDED_CONTENT_TYPES = ("text/event-stream", "image/", "application/zip")
+
+
+class _GzipEncoder:
+    def __init__(self, level: int) -> None:
+        # wbits=31: gzip ヘッダー付き
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def encode(self, body: bytes, final: bool) -> bytes:
+        data = self._compressor.compress(body)
+        flush_mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return data + self._compressor.flush(flush_mode)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def encode(self, body: bytes, final: bool) -> bytes:
+        data = self._compressor.process(body)
+        return data + (self._compressor.finish() if final else self._compressor.flush())
+
+
+def accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.lower().split(","):
+        name, *params = [item.strip() for item in part.split(";")]
+        if name != coding:
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+class CompressionMiddleware:
+    """Compress responses of at least ``minimum_size`` bytes (br > gzip)."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = RESPONSE_COMPRESSION_MIN_BYTES,
+        gzip_level: int = RESPONSE_GZIP_LEVEL,
+        brotli_quality: int = RESPONSE_BROTLI_QUALITY,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose(self, accept_encoding: str) -> Optional[tuple]:
+        if brotli is not None and accepts_encoding(accept_encoding, "br"):
+            return "br", lambda: _BrotliEncoder(self.brotli_quality)
+        if accepts_encoding(accept_encoding, "gzip"):
+            return "gzip", lambda: _GzipEncoder(self.gzip_level)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        chosen = self._choose(Headers(scope=scope).get("Accept-Encoding", ""))
+        if chosen is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(send, self.minimum_size, *chosen)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(
+        self,
+        send: Send,
+        minimum_size: int,
+        coding: str,
+        make_encoder: Callable[[], Any],
+    ) -> None:
+        self._send = send
+        self._minimum_size = minimum_size
+        self._coding = coding
+        self._make_encoder = make_encoder
+        self._start: Optional[Message] = None
+        self._encoder: Optional[Any] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            headers = Headers(raw=message["headers"])
+            self._passthrough = "content-encoding" in headers or headers.get(
+                "content-type", ""
+            ).startswith(_EXCLUDED_CONTENT_TYPES)
+            return
+        if message["type"] != "http.response.body":
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._start is not None:
+            # 最初のボディで圧縮するかどうかを決め、ヘッダーを書き換えて送る
+            if self._passthrough or (not more_body and len(body) < self._minimum_size):
+                self._passthrough = True
+                await self._flush_start()
+                await self._send(message)
+                return
+            self._encoder = self._make_encoder()
+            headers = MutableHeaders(raw=self._start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            headers["Content-Encoding"] = self._coding
+            body = self._encoder.encode(body, final=not more_body)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+            await self._flush_start()
+        elif self._encoder is not None:
+            body = self._encoder.encode(body, final=not more_body)
+        await self._send({**message, "body": body})
+
+    async def _flush_start(self) -> None:
+        if self._start is not None:
+            start, self._start = self._start, None
+            await self._send(start)
@@ -0,0 +1,66 @@
+"""Fast JSON responses for large payloads.
+
+Routes opt in by returning these responses directly, which skips FastAPI's
+``jsonable_encoder`` walk and the second validation of ``response_model``:
+
+- ``FastJSONResponse`` renders plain dict/list payloads with orjson when it is
+  installed (``pip install .[speedups]``) and falls back to the standard
+  ``JSONResponse`` otherwise.
+- ``validated_response`` serializes values that were already validated by a
+  pydantic ``TypeAdapter`` straight to JSON bytes in pydantic-core.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, TypeVar
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+try:  # pragma: no cover - optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+T = TypeVar("T")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, Path):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered with orjson (numpy-aware) when available."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+
+
+def validated_response(
+    adapter: TypeAdapter[T], value: T, status_code: int = 200
+) -> Response:
+    """Response for ``value`` already validated by ``adapter`` (no re-validation)."""
+
+    return Response(
+        content=adapter.dump_json(value),
+        status_code=status_code,
+        media_type="application/json",
+    )
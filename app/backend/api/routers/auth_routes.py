@@ -1,16 +1,23 @@
-import hashlib
-import secrets
+import os
 import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 import jwt
 from fastapi import APIRouter, Depends, Header, HTTPException, status
 from pydantic import BaseModel, field_validator
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.backend.database import get_db
-from app.backend.models import RefreshToken, User
+from app.backend.database import get_async_db, get_db
+from app.backend.models import User
+from app.backend.services import passwords, token_store
 
 router = APIRouter()
 
@@ -20,21 +27,61 @@ JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_SECONDS = 1800
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 EMAIL_REGEX = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$")
+# 認証済みユーザー情報のプロセス内キャッシュ。他プロセスでのパスワード変更はこの秒数以内に反映
+AUTH_PRINCIPAL_CACHE_TTL_SECONDS = float(
+    os.getenv("AUTH_PRINCIPAL_CACHE_TTL_SECONDS", "30")
+)
+AUTH_PRINCIPAL_CACHE_SIZE = 4096
+
 
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Principal returned by ``get_current_user`` (no ORM session attached)."""
 
-def _hash_password(password: str, salt: Optional[str] = None) -> str:
-    if salt is None:
-        salt = secrets.token_hex(8)
-    h = hashlib.sha256((salt + password).encode("utf-8")).hexdigest()
-    return f"{salt}${h}"
+    user_id: int
+    email: str
+    username: str
+    token_version: int
 
 
-def _verify_password(password: str, stored: str) -> bool:
-    try:
-        salt, _ = stored.split("$", 1)
-    except ValueError:
-        return False
-    return _hash_password(password, salt) == stored
+_PRINCIPAL_CACHE: "OrderedDict[int, Tuple[AuthenticatedUser, float]]" = OrderedDict()
+_PRINCIPAL_LOCK = threading.Lock()
+
+
+def _principal_from_user(user: User) -> AuthenticatedUser:
+    return AuthenticatedUser(
+        user_id=int(getattr(user, "user_id")),
+        email=str(getattr(user, "email")),
+        username=str(getattr(user, "username")),
+        token_version=int(getattr(user, "token_version", 0) or 0),
+    )
+
+
+def _cached_principal(user_id: int) -> Optional[AuthenticatedUser]:
+    now = time.monotonic()
+    with _PRINCIPAL_LOCK:
+        entry = _PRINCIPAL_CACHE.get(user_id)
+        if entry is None:
+            return None
+        principal, stored_at = entry
+        if now - stored_at >= AUTH_PRINCIPAL_CACHE_TTL_SECONDS:
+            del _PRINCIPAL_CACHE[user_id]
+            return None
+        _PRINCIPAL_CACHE.move_to_end(user_id)
+        return principal
+
+
+def _cache_principal(principal: AuthenticatedUser) -> None:
+    with _PRINCIPAL_LOCK:
+        _PRINCIPAL_CACHE[principal.user_id] = (principal, time.monotonic())
+        _PRINCIPAL_CACHE.move_to_end(principal.user_id)
+        while len(_PRINCIPAL_CACHE) > AUTH_PRINCIPAL_CACHE_SIZE:
+            _PRINCIPAL_CACHE.popitem(last=False)
+
+
+def invalidate_principal(user_id: int) -> None:
+    with _PRINCIPAL_LOCK:
+        _PRINCIPAL_CACHE.pop(user_id, None)
 
 
 class RegisterRequest(BaseModel):
@@ -71,11 +118,14 @@ class RefreshRequest(BaseModel):
 
 
 def _create_access_token(
-    email: str, expires_seconds: int = ACCESS_TOKEN_EXPIRE_SECONDS
+    user: User, expires_seconds: int = ACCESS_TOKEN_EXPIRE_SECONDS
 ) -> str:
     now = datetime.utcnow()
     payload = {
-        "sub": email,
+        "sub": getattr(user, "email"),
+        # uid / ver があればリクエストごとのユーザー検索を省略できる
+        "uid": int(getattr(user, "user_id")),
+        "ver": int(getattr(user, "token_version", 0) or 0),
         "iat": int(now.timestamp()),
         "exp": int((now + timedelta(seconds=expires_seconds)).timestamp()),
         "type": "access",
@@ -90,6 +140,8 @@ def _create_refresh_token(email: str) -> str:
         "iat": int(now.timestamp()),
         "exp": int((now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)).timestamp()),
         "type": "refresh",
+        # 同じ秒に複数回ログインしてもトークンが重複しないようにする
+        "jti": secrets.token_urlsafe(8),
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
@@ -107,22 +159,6 @@ def _decode_token(token: str) -> dict:
         )
 
 
-def _store_refresh_token(db: Session, token: str, user_id: int) -> RefreshToken:
-    expires_at = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    db_token = RefreshToken(token=token, user_id=user_id, expires_at=expires_at)
-    db.add(db_token)
-    db.commit()
-    db.refresh(db_token)
-    return db_token
-
-
-def _delete_refresh_token(db: Session, token: str) -> None:
-    db_token = db.query(RefreshToken).filter(RefreshToken.token == token).first()
-    if db_token:
-        db.delete(db_token)
-        db.commit()
-
-
 def _normalize_email(value: str) -> str:
     return value.strip().lower()
 
@@ -134,10 +170,7 @@ def _validate_email_format(value: str) -> str:
     return stripped.lower()
 
 
-def get_current_user(
-    authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db),
-) -> User:
+def _access_claims(authorization: Optional[str]) -> dict:
     if not authorization:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing authorization"
@@ -159,35 +192,76 @@ def get_current_user(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type"
         )
+    return payload
 
-    email = payload.get("sub")
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
+
+def _principal_from_claims(db: Session, payload: dict) -> AuthenticatedUser:
+    user_id = payload.get("uid")
+    if not isinstance(user_id, int):
+        # uid を持たない旧形式のトークンはメールアドレスで引く
+        user = db.query(User).filter(User.email == payload.get("sub")).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+            )
+        return _principal_from_user(user)
+
+    token_version = payload.get("ver", 0)
+    principal = _cached_principal(user_id)
+    if principal is not None and token_version > principal.token_version:
+        # 他のワーカーでパスワードが変更され、キャッシュの版数のほうが古い
+        invalidate_principal(user_id)
+        principal = None
+    if principal is None:
+        user = db.get(User, user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+            )
+        principal = _principal_from_user(user)
+        _cache_principal(principal)
+    if principal.token_version != token_version:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked"
         )
-    return user
+    return principal
 
 
-@router.post("/register", status_code=status.HTTP_201_CREATED)
-def register(req: RegisterRequest, db: Session = Depends(get_db)):
-    email = _normalize_email(req.email)
-    username = req.username.strip()
-    if not username:
-        raise HTTPException(status_code=400, detail="Username is required")
-    if len(req.password) < 8:
-        raise HTTPException(
-            status_code=400, detail="Password must be at least 8 characters"
-        )
-    existing = db.query(User).filter(User.email == email).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
+def get_current_user(
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+) -> AuthenticatedUser:
+    """Resolve the bearer token to a principal.
+
+    Tokens carrying ``uid``/``ver`` are served from a short-TTL in-process cache,
+    so the hot path does not query ``users``.
+    """
+
+    return _principal_from_claims(db, _access_claims(authorization))
 
+
+async def get_current_user_async(
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+) -> AuthenticatedUser:
+    """``get_current_user`` for async routes; never touches the threadpool."""
+
+    payload = _access_claims(authorization)
+    return await db.run_sync(_principal_from_claims, payload)
+
+
+def _find_user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+
+def _create_user(
+    db: Session, username: str, email: str, password_hash: str, birthday
+) -> Dict:
     user = User(
         username=username,
         email=email,
-        password_hash=_hash_password(req.password),
-        birthday=req.birthday,
+        password_hash=password_hash,
+        birthday=birthday,
     )
     db.add(user)
     db.commit()
@@ -201,25 +275,82 @@ def register(req: RegisterRequest, db: Session = Depends(get_db)):
     }
 
 
+def _issue_tokens(
+    db: Session, user: User, email: str, new_password_hash: Optional[str]
+) -> Dict[str, str]:
+    user_id = getattr(user, "user_id", None)
+    if not isinstance(user_id, int):
+        raise HTTPException(status_code=500, detail="User record is invalid")
+    if new_password_hash:
+        setattr(user, "password_hash", new_password_hash)
+    access = _create_access_token(user)
+    refresh = _create_refresh_token(email)
+    # パスワードの再ハッシュもリフレッシュトークン保存と同じコミットで反映される
+    token_store.store_token(
+        db,
+        refresh,
+        user_id,
+        datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    return {"access_token": access, "refresh_token": refresh}
+
+
+# 未登録メールでも同程度の時間をかけ、応答時間からアカウントの有無が分からないようにする
+_DUMMY_PASSWORD_HASH: Optional[str] = None
+_DUMMY_PASSWORD_LOCK = threading.Lock()
+
+
+def _dummy_password_hash() -> str:
+    global _DUMMY_PASSWORD_HASH
+    with _DUMMY_PASSWORD_LOCK:
+        if _DUMMY_PASSWORD_HASH is None:
+            _DUMMY_PASSWORD_HASH = passwords.hash_password(secrets.token_hex(8))
+        return _DUMMY_PASSWORD_HASH
+
+
+async def _dummy_password_hash_async() -> str:
+    if _DUMMY_PASSWORD_HASH is not None:
+        return _DUMMY_PASSWORD_HASH
+    # 初回の PBKDF2 計算でイベントループを塞がないようスレッドで行う
+    return await run_in_threadpool(_dummy_password_hash)
+
+
+@router.post("/register", status_code=status.HTTP_201_CREATED)
+async def register(req: RegisterRequest, db: Session = Depends(get_db)):
+    email = _normalize_email(req.email)
+    username = req.username.strip()
+    if not username:
+        raise HTTPException(status_code=400, detail="Username is required")
+    if len(req.password) < 8:
+        raise HTTPException(
+            status_code=400, detail="Password must be at least 8 characters"
+        )
+    if await run_in_threadpool(_find_user_by_email, db, email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    password_hash = await passwords.hash_password_async(req.password)
+    return await run_in_threadpool(
+        _create_user, db, username, email, password_hash, req.birthday
+    )
+
+
 @router.post("/login", response_model=TokenResponse)
-def login(req: LoginRequest, db: Session = Depends(get_db)):
+async def login(req: LoginRequest, db: Session = Depends(get_db)):
     email = _normalize_email(req.email)
-    user = db.query(User).filter(User.email == email).first()
+    user = await run_in_threadpool(_find_user_by_email, db, email)
     stored_hash = getattr(user, "password_hash", None) if user else None
-    if (
-        not user
-        or not isinstance(stored_hash, str)
-        or not _verify_password(req.password, stored_hash)
-    ):
+    if not isinstance(stored_hash, str):
+        dummy_hash = await _dummy_password_hash_async()
+        await passwords.verify_password_async(req.password, dummy_hash)
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if not await passwords.verify_password_async(req.password, stored_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    access = _create_access_token(email)
-    refresh = _create_refresh_token(email)
-    user_id = getattr(user, "user_id", None)
-    if not isinstance(user_id, int):
-        raise HTTPException(status_code=500, detail="User record is invalid")
-    _store_refresh_token(db, refresh, user_id)
-    return {"access_token": access, "refresh_token": refresh}
+    new_hash = None
+    if passwords.needs_rehash(stored_hash):
+        # 旧形式 (sha256) や反復回数の少ないハッシュはログイン成功時に置き換える
+        new_hash = await passwords.hash_password_async(req.password)
+    return await run_in_threadpool(_issue_tokens, db, user, email, new_hash)
 
 
 @router.post("/refresh")
@@ -228,9 +359,7 @@ def refresh(req: RefreshRequest, db: Session = Depends(get_db)):
     if payload.get("type") != "refresh":
         raise HTTPException(status_code=401, detail="Invalid token type")
 
-    db_token = (
-        db.query(RefreshToken).filter(RefreshToken.token == req.refresh_token).first()
-    )
+    db_token = token_store.find_token(db, req.refresh_token)
     if not db_token:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     expires_at = getattr(db_token, "expires_at", None)
@@ -242,7 +371,10 @@ def refresh(req: RefreshRequest, db: Session = Depends(get_db)):
     email = payload.get("sub")
     if not email:
         raise HTTPException(status_code=401, detail="Invalid token payload")
-    access = _create_access_token(email)
+    user = db.get(User, getattr(db_token, "user_id"))
+    if not user or getattr(user, "email") != email:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+    access = _create_access_token(user)
     return {
         "access_token": access,
         "token_type": "Bearer",
@@ -252,7 +384,7 @@ def refresh(req: RefreshRequest, db: Session = Depends(get_db)):
 
 @router.post("/logout")
 def logout(req: RefreshRequest, db: Session = Depends(get_db)):
-    _delete_refresh_token(db, req.refresh_token)
+    token_store.revoke_token(db, req.refresh_token)
     return {"message": "Successfully logged out"}
 
 
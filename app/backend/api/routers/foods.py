@@ -2,13 +2,18 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.database import get_db
-from app.backend.models import Food, FoodCategory, User
+from app.backend.database import get_async_db, route_reads
+from app.backend.models import Food, FoodCategory
+from app.backend.services.food_search import (
+    cached_food_search_index,
+    food_name_matches,
+    load_food_search_index,
+)
 
-from .auth_routes import get_current_user
+from .auth_routes import AuthenticatedUser, get_current_user_async
 
 router = APIRouter()
 
@@ -27,23 +32,28 @@ class FoodListResponse(BaseModel):
     foods: List[FoodResponse]
 
 
+class FoodAutocompleteResponse(BaseModel):
+    query: str
+    foods: List[FoodResponse]
+
+
 @router.get("/", response_model=FoodListResponse)
-def list_foods(
+async def list_foods(
     q: Optional[str] = Query(None, description="部分一致検索ワード"),
     limit: int = Query(200, ge=1, le=1000),
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    _: AuthenticatedUser = Depends(get_current_user_async),
 ):
-    query = (
-        db.query(Food, FoodCategory)
+    route_reads(db)
+    stmt = (
+        select(Food, FoodCategory)
         .join(FoodCategory, Food.category_id == FoodCategory.category_id, isouter=True)
-        .filter(Food.is_trackable.is_(True))
+        .where(Food.is_trackable.is_(True))
     )
-    if q:
-        like = f"%{q.strip().lower()}%"
-        query = query.filter(func.lower(Food.food_name).like(like))
+    if q and q.strip():
+        stmt = stmt.where(food_name_matches(q, db.get_bind().dialect.name))
 
-    items = query.order_by(Food.food_name.asc()).limit(limit).all()
+    items = (await db.execute(stmt.order_by(Food.food_name.asc()).limit(limit))).all()
 
     foods = [
         FoodResponse(
@@ -55,3 +65,31 @@ def list_foods(
         for food, category in items
     ]
     return FoodListResponse(total=len(foods), foods=foods)
+
+
+@router.get("/autocomplete", response_model=FoodAutocompleteResponse)
+async def autocomplete_foods(
+    q: str = Query(
+        ..., min_length=1, description="入力途中の語（かな・カナ・ローマ字）"
+    ),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    _: AuthenticatedUser = Depends(get_current_user_async),
+):
+    """Prefix/substring food search served from the in-memory index."""
+
+    route_reads(db)
+    # 索引が読み込み済みなら DB には問い合わせない
+    index = cached_food_search_index(db.get_bind())
+    if index is None:
+        index = await db.run_sync(load_food_search_index)
+    foods = [
+        FoodResponse(
+            food_id=entry.food_id,
+            food_name=entry.food_name,
+            category_id=entry.category_id,
+            category_name=entry.category_name,
+        )
+        for entry in index.search(q, limit)
+    ]
+    return FoodAutocompleteResponse(query=q, foods=foods)
@@ -6,9 +6,9 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
-from app.backend.api.routers.auth_routes import get_current_user
-from app.backend.database import get_db
-from app.backend.models import IngredientAbstraction, User
+from app.backend.api.routers.auth_routes import AuthenticatedUser, get_current_user
+from app.backend.database import get_db, route_reads
+from app.backend.models import IngredientAbstraction
 from app.backend.services.abstractor.ingredient_name_resolver import (
     IngredientNameResolver,
 )
@@ -49,7 +49,7 @@ class AbstractionRecord(BaseModel):
 def resolve_ingredient_name(
     body: ResolveRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
     try:
         resolver = IngredientNameResolver(db)
@@ -83,9 +83,10 @@ def list_abstractions(
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
     """List recorded ingredient abstractions. Paginated by limit/offset."""
+    route_reads(db)
     query = (
         db.query(IngredientAbstraction)
         .order_by(IngredientAbstraction.created_at.desc())
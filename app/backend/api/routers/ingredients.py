@@ -1,12 +1,14 @@
 from datetime import date
 from decimal import Decimal
-from typing import List, Optional, cast
+from typing import List, Optional, Tuple, cast
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager
 
-from app.backend.database import get_db
+from app.backend.database import get_async_db, get_db
 from app.backend.models import (
     Food,
     IngredientStatus,
@@ -15,11 +17,23 @@ from app.backend.models import (
     UserFood,
     UserFoodTransaction,
 )
+from app.backend.services.inventory_service import (
+    InventoryAddition,
+    InventoryConsumption,
+    apply_inventory_additions,
+    apply_inventory_consumptions,
+)
 
-from .auth_routes import get_current_user
+from .auth_routes import (
+    AuthenticatedUser,
+    get_current_user,
+    get_current_user_async,
+)
 
 router = APIRouter()
 
+INGREDIENT_BATCH_MAX_ITEMS = 200
+
 
 class IngredientCreateRequest(BaseModel):
     food_id: int = Field(..., gt=0)
@@ -55,6 +69,35 @@ class IngredientConsumeRequest(BaseModel):
     quantity_g: float = Field(..., gt=0, le=100000)
 
 
+class IngredientConsumeBatchItem(IngredientConsumeRequest):
+    user_food_id: int = Field(..., gt=0)
+
+
+class IngredientCreateBatchRequest(BaseModel):
+    items: List[IngredientCreateRequest] = Field(
+        ..., min_length=1, max_length=INGREDIENT_BATCH_MAX_ITEMS
+    )
+
+
+class IngredientConsumeBatchRequest(BaseModel):
+    items: List[IngredientConsumeBatchItem] = Field(
+        ..., min_length=1, max_length=INGREDIENT_BATCH_MAX_ITEMS
+    )
+
+
+class IngredientBatchItemResult(BaseModel):
+    index: int
+    ok: bool
+    ingredient: Optional[IngredientResponse] = None
+    error: Optional[str] = None
+
+
+class IngredientBatchResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[IngredientBatchItemResult]
+
+
 def _record_inventory_transaction(
     db: Session,
     *,
@@ -113,7 +156,7 @@ def _to_response(user_food: UserFood) -> IngredientResponse:
 def create_ingredient(
     body: IngredientCreateRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
     food = (
         db.query(Food)
@@ -174,27 +217,109 @@ def create_ingredient(
     return _to_response(user_food)
 
 
+def _batch_response(
+    outcomes: List[Tuple[Optional[UserFood], Optional[str]]],
+) -> IngredientBatchResponse:
+    results = [
+        IngredientBatchItemResult(
+            index=index,
+            ok=user_food is not None,
+            ingredient=_to_response(user_food) if user_food is not None else None,
+            error=error,
+        )
+        for index, (user_food, error) in enumerate(outcomes)
+    ]
+    succeeded = sum(1 for result in results if result.ok)
+    return IngredientBatchResponse(
+        succeeded=succeeded, failed=len(results) - succeeded, results=results
+    )
+
+
+@router.post("/batch", response_model=IngredientBatchResponse)
+def create_ingredients_batch(
+    body: IngredientCreateBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """Add many items at once. Unknown foods are reported per item, not raised."""
+
+    additions = [
+        InventoryAddition(
+            food_id=item.food_id,
+            quantity_g=Decimal(str(item.quantity_g)),
+            purchase_date=item.purchase_date,
+            expiration_date=item.expiration_date,
+        )
+        for item in body.items
+    ]
+    user_foods = apply_inventory_additions(
+        db,
+        cast(int, current_user.user_id),
+        additions,
+        source_type=InventoryChangeSource.MANUAL_ADD,
+    )
+    # コミット前にレスポンスを組み立て、コミット後の再読込 (refresh) を避ける
+    response = _batch_response(
+        [
+            (user_food, None if user_food else "指定された食材が存在しません。")
+            for user_food in user_foods
+        ]
+    )
+    if response.succeeded:
+        db.commit()
+    return response
+
+
+@router.post("/consume-batch", response_model=IngredientBatchResponse)
+def consume_ingredients_batch(
+    body: IngredientConsumeBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    consumptions = [
+        InventoryConsumption(
+            user_food_id=item.user_food_id,
+            quantity_g=Decimal(str(item.quantity_g)),
+        )
+        for item in body.items
+    ]
+    outcomes = apply_inventory_consumptions(
+        db,
+        cast(int, current_user.user_id),
+        consumptions,
+        source_type=InventoryChangeSource.MANUAL_CONSUME,
+    )
+    response = _batch_response(
+        [(outcome.user_food, outcome.error) for outcome in outcomes]
+    )
+    if response.succeeded:
+        db.commit()
+    return response
+
+
+def _ingredient_list_query(user_id: int, status: Optional[IngredientStatus]) -> Select:
+    stmt = (
+        select(UserFood)
+        .join(Food)
+        .options(contains_eager(UserFood.food))
+        .where(UserFood.user_id == user_id)
+        .order_by(UserFood.expiration_date.is_(None), UserFood.expiration_date)
+    )
+    # デフォルトでは未使用の食材のみを返す（残量0gになった used は非表示）
+    return stmt.where(UserFood.status == (status or IngredientStatus.UNUSED))
+
+
 @router.get("/", response_model=IngredientListResponse)
-def list_ingredients(
+async def list_ingredients(
     status: Optional[IngredientStatus] = Query(
         None,
         description="絞り込み対象のステータス。指定しない場合は未使用(available) のみを返します。",
     ),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_user_async),
 ):
-    query = (
-        db.query(UserFood)
-        .filter(UserFood.user_id == current_user.user_id)
-        .join(Food)
-        .order_by(UserFood.expiration_date.is_(None), UserFood.expiration_date)
-    )
-    if status:
-        query = query.filter(UserFood.status == status)
-    else:
-        # デフォルトでは未使用の食材のみを返す（残量0gになった used は非表示）
-        query = query.filter(UserFood.status == IngredientStatus.UNUSED)
-    items = query.all()
+    result = await db.execute(_ingredient_list_query(current_user.user_id, status))
+    items = result.scalars().all()
     return IngredientListResponse(
         total=len(items),
         ingredients=[_to_response(item) for item in items],
@@ -206,7 +331,7 @@ def update_ingredient_status(
     user_food_id: int,
     body: IngredientStatusUpdateRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
     user_food = (
         db.query(UserFood)
@@ -230,7 +355,7 @@ def consume_ingredient(
     user_food_id: int,
     body: IngredientConsumeRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
     user_food = (
         db.query(UserFood)
@@ -286,7 +411,7 @@ def consume_ingredient(
 def delete_ingredient(
     user_food_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
     user_food = (
         db.query(UserFood)
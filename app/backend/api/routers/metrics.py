@@ -0,0 +1,25 @@
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+
+from app.backend.database import pool_metrics
+
+router = APIRouter()
+
+# X-Metrics-Token ヘッダーで照合するトークン。未設定ならエンドポイント自体を無効にする
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+@router.get("/db-pool")
+def db_pool_metrics(x_metrics_token: Optional[str] = Header(None)):
+    """Connection pool occupancy and checkout wait times per engine."""
+
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_metrics_token or "", METRICS_TOKEN):
+        raise HTTPException(
+            status_code=403, detail="メトリクスの参照権限がありません。"
+        )
+    return {"pools": pool_metrics()}
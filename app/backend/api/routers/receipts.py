@@ -1,7 +1,9 @@
 import logging
 import os
 import shutil
-from datetime import datetime, timezone
+import threading
+from datetime import date, datetime, timezone
+from decimal import Decimal, InvalidOperation
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -10,8 +12,15 @@ from fastapi.responses import FileResponse, PlainTextResponse
 from pydantic import BaseModel, Field, ValidationError
 from sqlalchemy.orm import Session
 
+from app.backend.api.responses import FastJSONResponse
+from app.backend.api.routers.auth_routes import AuthenticatedUser, get_current_user
 from app.backend.database import SessionLocal, get_db
-from app.backend.models import Food, IngredientAbstraction
+from app.backend.models import (
+    Food,
+    IngredientAbstraction,
+    InventoryChangeSource,
+    User,
+)
 from app.backend.services.abstractor.ingredient_abstraction_service import (
     IngredientAbstractionService,
 )
@@ -19,6 +28,11 @@ from app.backend.services.abstractor.ingredient_name_resolver import (
     IngredientNameResolver,
     ResolutionOutcome,
 )
+from app.backend.services.food_search import food_name_matches
+from app.backend.services.inventory_service import (
+    InventoryAddition,
+    apply_inventory_additions,
+)
 from app.backend.services.ocr.receipt_ocr import ReceiptOCRService
 
 router = APIRouter()
@@ -44,6 +58,16 @@ INGREDIENT_RESOLUTION_ENABLED = os.getenv(
     "ENABLE_INGREDIENT_RESOLUTION", "1"
 ).lower() not in {"0", "false", "no"}
 
+RECEIPT_DEFAULT_QUANTITY_G = Decimal(os.getenv("RECEIPT_DEFAULT_QUANTITY_G", "100"))
+_UNIT_TO_GRAMS: Dict[str, Decimal] = {
+    "g": Decimal("1"),
+    "グラム": Decimal("1"),
+    "kg": Decimal("1000"),
+    "キロ": Decimal("1000"),
+    "ml": Decimal("1"),
+    "l": Decimal("1000"),
+}
+
 _OCR_SERVICE: Optional[ReceiptOCRService] = None
 
 
@@ -66,6 +90,8 @@ def _ocr_service_dependency() -> ReceiptOCRService:
 # simple in-memory store for demo
 RECEIPTS: Dict[int, Dict] = {}
 _NEXT_RECEIPT_ID = 1
+# 在庫反映の二重実行を防ぐためのロック（RECEIPTS の状態遷移のみを保護する）
+_RECEIPT_COMMIT_LOCK = threading.Lock()
 
 
 def _build_resolver() -> Tuple[Optional[IngredientNameResolver], Optional[Any]]:
@@ -119,6 +145,29 @@ class FoodOption(BaseModel):
     food_name: str
 
 
+class ReceiptInventoryCommitRequest(BaseModel):
+    item_ids: Optional[List[int]] = None
+    purchase_date: Optional[date] = None
+    expiration_date: Optional[date] = None
+    default_quantity_g: Optional[float] = Field(None, gt=0, le=100000)
+
+
+class CommittedReceiptItem(BaseModel):
+    item_id: int
+    food_id: int
+    food_name: str
+    user_food_id: int
+    added_quantity_g: float
+    quantity_g: float
+
+
+class ReceiptInventoryCommitResponse(BaseModel):
+    receipt_id: int
+    committed: List[CommittedReceiptItem]
+    skipped_item_ids: List[int]
+    committed_at: str
+
+
 def _get_receipt_or_404(receipt_id: int) -> Dict:
     receipt = RECEIPTS.get(receipt_id)
     if not receipt:
@@ -151,8 +200,9 @@ def _process_receipt_async(
     db_session: Optional[Any] = None
     needs_commit = False
     try:
-        resolver, db_session = _build_resolver()
+        # OCR は数秒かかるため、DB 接続（食材辞書の読込）は OCR 完了後に取得する
         result = ocr_service.process(filename)
+        resolver, db_session = _build_resolver()
         receipt["items"] = []
         for idx, line in enumerate(result.lines, start=1):
             item, requires_commit = _build_item_from_line(idx, line, resolver)
@@ -335,7 +385,7 @@ def list_food_options(
     limit = max(1, min(limit, 500))
     stmt = db.query(Food)
     if query := (query or "").strip():
-        stmt = stmt.filter(Food.food_name.ilike(f"%{query}%"))
+        stmt = stmt.filter(food_name_matches(query, db.get_bind().dialect.name))
     foods = stmt.order_by(Food.food_name.asc()).limit(limit).all()
     options: List[FoodOption] = []
     for food in foods:
@@ -352,6 +402,132 @@ def list_food_options(
     return options
 
 
+def _item_quantity_g(item: Dict[str, Any], default: Decimal) -> Decimal:
+    """OCR 明細の数量をグラムに換算する。単位が不明な場合は既定値を使う。"""
+
+    raw_quantity = item.get("quantity")
+    factor = _UNIT_TO_GRAMS.get(str(item.get("unit") or "").strip().lower())
+    if raw_quantity is None or factor is None:
+        return default
+    try:
+        quantity = Decimal(str(raw_quantity)) * factor
+    except (InvalidOperation, ValueError):
+        return default
+    return quantity if quantity > Decimal("0") else default
+
+
+def _claim_receipt_for_commit(receipt: Dict) -> None:
+    with _RECEIPT_COMMIT_LOCK:
+        if receipt.get("status") != "completed":
+            raise HTTPException(
+                status_code=409, detail="解析が完了していないレシートです。"
+            )
+        if receipt.get("inventory_committed_at") or receipt.get("inventory_committing"):
+            raise HTTPException(
+                status_code=409, detail="このレシートは既に在庫へ反映済みです。"
+            )
+        receipt["inventory_committing"] = True
+
+
+@router.post(
+    "/{receipt_id}/commit-to-inventory",
+    response_model=ReceiptInventoryCommitResponse,
+)
+def commit_receipt_to_inventory(
+    receipt_id: int,
+    body: Optional[ReceiptInventoryCommitRequest] = None,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    receipt = _get_receipt_or_404(receipt_id)
+    options = body or ReceiptInventoryCommitRequest()
+    _claim_receipt_for_commit(receipt)
+    try:
+        result = _commit_receipt_items(receipt_id, receipt, options, db, current_user)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        receipt.pop("inventory_committing", None)
+    return result
+
+
+def _commit_receipt_items(
+    receipt_id: int,
+    receipt: Dict,
+    options: ReceiptInventoryCommitRequest,
+    db: Session,
+    current_user: User,
+) -> ReceiptInventoryCommitResponse:
+    selected = set(options.item_ids) if options.item_ids is not None else None
+    default_quantity = (
+        Decimal(str(options.default_quantity_g))
+        if options.default_quantity_g is not None
+        else RECEIPT_DEFAULT_QUANTITY_G
+    )
+
+    candidates: List[Dict[str, Any]] = []
+    skipped: List[int] = []
+    for item in receipt.get("items", []):
+        item_id = item.get("item_id")
+        if selected is not None and item_id not in selected:
+            continue
+        if item.get("food_id") is None:
+            skipped.append(item_id)
+            continue
+        candidates.append(item)
+
+    additions = [
+        InventoryAddition(
+            food_id=int(item["food_id"]),
+            quantity_g=_item_quantity_g(item, default_quantity),
+            purchase_date=options.purchase_date,
+            expiration_date=options.expiration_date,
+            source_reference=f"receipt:{receipt_id}:{item.get('item_id')}",
+            note=(str(item.get("raw_text") or "")[:255] or None),
+        )
+        for item in candidates
+    ]
+    user_id = int(getattr(current_user, "user_id"))
+    user_foods = apply_inventory_additions(
+        db, user_id, additions, source_type=InventoryChangeSource.OCR_IMPORT
+    )
+
+    committed: List[CommittedReceiptItem] = []
+    for item, addition, user_food in zip(candidates, additions, user_foods):
+        if user_food is None:
+            skipped.append(item.get("item_id"))
+            continue
+        committed.append(
+            CommittedReceiptItem(
+                item_id=item["item_id"],
+                food_id=addition.food_id,
+                food_name=str(item.get("food_name") or ""),
+                user_food_id=int(getattr(user_food, "user_food_id")),
+                added_quantity_g=float(addition.quantity_g),
+                quantity_g=float(getattr(user_food, "quantity_g") or 0),
+            )
+        )
+
+    if not committed:
+        raise HTTPException(
+            status_code=400, detail="在庫に反映できる明細がありません。"
+        )
+
+    db.commit()
+
+    committed_at = _utc_now_iso()
+    receipt["inventory_committed_at"] = committed_at
+    receipt["user_id"] = user_id
+    receipt["updated_at"] = committed_at
+    return ReceiptInventoryCommitResponse(
+        receipt_id=receipt_id,
+        committed=committed,
+        skipped_item_ids=skipped,
+        committed_at=committed_at,
+    )
+
+
 @router.get("/{receipt_id}/status")
 def receipt_status(receipt_id: int):
     r = _get_receipt_or_404(receipt_id)
@@ -370,7 +546,8 @@ def get_receipt(receipt_id: int):
     # present a copy without internal path
     out = r.copy()
     out.pop("image_path", None)
-    return out
+    # 全行の bbox を含む大きな辞書なので jsonable_encoder を通さずに返す
+    return FastJSONResponse(out)
 
 
 @router.get("/{receipt_id}/image")
@@ -1,25 +1,58 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import gzip
+import hashlib
 import json
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
 from decimal import Decimal
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from typing import Any, Dict, FrozenSet, List, Literal, Optional, Tuple
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
 from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy.orm import Session, joinedload
-
-from app.backend.api.routers.auth_routes import get_current_user
-from app.backend.database import get_db
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.backend.api.routers.auth_routes import (
+    AuthenticatedUser,
+    get_current_user,
+    get_current_user_async,
+)
+from app.backend.database import canonical_bind, get_async_db, get_db, route_reads
 from app.backend.models import (
     IngredientStatus,
     InventoryChangeSource,
-    User,
     UserFood,
+    UserFoodTransaction,
     UserRecipeHistory,
 )
 from app.backend.models.food import Food
 from app.backend.models.recipe import Recipe, RecipeFood  # type: ignore[import]
+from app.backend.services.recipe_flags import (
+    RECIPE_FLAG_FIELDS,
+    flag_names,
+    mask_for,
+    unpack_flags,
+)
+from app.backend.services.recipe_loader import get_recipe_catalog_version
+from app.backend.services.recommendation.inventory_snapshot import (
+    get_inventory_snapshot,
+)
 
 router = APIRouter()
 
@@ -27,27 +60,9 @@ _PROJECT_ROOT = Path(__file__).resolve().parents[3]
 STATIC_RECIPE_HTML_DIR = _PROJECT_ROOT / "data" / "recipe-list"
 STATIC_RECIPE_JSON_PATH = _PROJECT_ROOT / "data" / "recipes.json"
 RECIPE_PAGES_ROUTE = "/recipe-pages"
-
-RECIPE_FLAG_FIELDS: List[str] = [
-    "is_japanese",
-    "is_western",
-    "is_chinese",
-    "is_main_dish",
-    "is_side_dish",
-    "is_soup",
-    "is_dessert",
-    "type_meat",
-    "type_seafood",
-    "type_vegetarian",
-    "type_composite",
-    "type_other",
-    "flavor_sweet",
-    "flavor_spicy",
-    "flavor_salty",
-    "texture_stewed",
-    "texture_fried",
-    "texture_stir_fried",
-]
+STATIC_CATALOG_GZIP_MIN_BYTES = 1024
+RECIPE_DETAIL_CACHE_SIZE = 512
+COOK_BATCH_MAX_ITEMS = 20
 
 
 def _as_int(value: Any) -> Optional[int]:
@@ -121,6 +136,28 @@ class CookRecipeResponse(BaseModel):
     consumed: List[CookedIngredient]
 
 
+class CookBatchItem(BaseModel):
+    recipe_id: int = Field(..., gt=0)
+    servings: float = Field(1.0, gt=0, le=50)
+
+
+class CookBatchRequest(BaseModel):
+    items: List[CookBatchItem] = Field(
+        ..., min_length=1, max_length=COOK_BATCH_MAX_ITEMS
+    )
+
+
+class CookedRecipe(BaseModel):
+    recipe_id: int
+    recipe_name: str
+    servings: float
+
+
+class CookBatchResponse(BaseModel):
+    recipes: List[CookedRecipe]
+    consumed: List[CookedIngredient]
+
+
 class StaticRecipeSummary(BaseModel):
     id: str
     title: str
@@ -130,14 +167,54 @@ class StaticRecipeSummary(BaseModel):
     calories: Optional[int] = None
 
 
+class RecipeSummary(BaseModel):
+    recipe_id: int
+    recipe_name: str
+    cooking_time: Optional[int] = None
+    calories: Optional[int] = None
+    image_url: Optional[str] = None
+    flags: List[str] = Field(default_factory=list)
+
+
+class RecipeSearchResponse(BaseModel):
+    items: List[RecipeSummary]
+    next_cursor: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class _RecipeDetailBase:
+    catalog_version: int
+    response: RecipeDetailResponse
+    food_ids: Tuple[int, ...]
+
+
+# エンジン(bind)ごとに recipe_id -> ユーザー非依存の詳細 を LRU で保持する
+_RECIPE_DETAIL_CACHE: weakref.WeakKeyDictionary[
+    Any, OrderedDict[int, _RecipeDetailBase]
+] = weakref.WeakKeyDictionary()
+_RECIPE_DETAIL_CACHE_LOCK = threading.Lock()
+
+
+@dataclass(frozen=True)
+class _StaticCatalog:
+    signature: Tuple[Any, ...]
+    summaries: Tuple[StaticRecipeSummary, ...]
+    body: bytes
+    gzip_body: bytes
+    etag: str
+
+
+_STATIC_CATALOG: Optional[_StaticCatalog] = None
+_STATIC_CATALOG_LOCK = threading.Lock()
+
+
 def _parse_static_recipe_entry(
-    index: int, entry: object
+    index: int, entry: object, available_files: FrozenSet[str]
 ) -> Optional[StaticRecipeSummary]:
     if not isinstance(entry, dict):
         return None
     file_name = f"{index + 1:04d}.html"
-    html_path = STATIC_RECIPE_HTML_DIR / file_name
-    if not html_path.exists():
+    if file_name not in available_files:
         return None
 
     raw_ingredients = entry.get("ingredients") or []
@@ -165,6 +242,18 @@ def _parse_static_recipe_entry(
     )
 
 
+def _list_static_html_files() -> FrozenSet[str]:
+    try:
+        with os.scandir(STATIC_RECIPE_HTML_DIR) as entries:
+            return frozenset(
+                entry.name
+                for entry in entries
+                if entry.name.endswith(".html") and entry.is_file()
+            )
+    except OSError:
+        return frozenset()
+
+
 def _load_static_recipe_catalog() -> List[StaticRecipeSummary]:
     if not STATIC_RECIPE_HTML_DIR.exists() or not STATIC_RECIPE_JSON_PATH.exists():
         return []
@@ -177,29 +266,226 @@ def _load_static_recipe_catalog() -> List[StaticRecipeSummary]:
     if not isinstance(payload, list):
         return []
 
+    available_files = _list_static_html_files()
     summaries: List[StaticRecipeSummary] = []
     for idx, entry in enumerate(payload):
-        summary = _parse_static_recipe_entry(idx, entry)
+        summary = _parse_static_recipe_entry(idx, entry, available_files)
         if summary:
             summaries.append(summary)
     return summaries
 
 
+def _static_catalog_signature() -> Tuple[Any, ...]:
+    """Cheap fingerprint of the catalog sources (2 stat calls per request)."""
+
+    signature: List[Any] = []
+    for path in (STATIC_RECIPE_JSON_PATH, STATIC_RECIPE_HTML_DIR):
+        try:
+            stat = path.stat()
+        except OSError:
+            signature.append((str(path), None, None))
+            continue
+        signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _build_static_catalog(signature: Tuple[Any, ...]) -> _StaticCatalog:
+    summaries = tuple(_load_static_recipe_catalog())
+    body = json.dumps(
+        [summary.model_dump() for summary in summaries],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return _StaticCatalog(
+        signature=signature,
+        summaries=summaries,
+        body=body,
+        gzip_body=gzip.compress(body, mtime=0),
+        etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+    )
+
+
+def _get_static_catalog() -> _StaticCatalog:
+    global _STATIC_CATALOG
+    signature = _static_catalog_signature()
+    catalog = _STATIC_CATALOG
+    if catalog is not None and catalog.signature == signature:
+        return catalog
+    with _STATIC_CATALOG_LOCK:
+        catalog = _STATIC_CATALOG
+        if catalog is None or catalog.signature != signature:
+            catalog = _build_static_catalog(signature)
+            _STATIC_CATALOG = catalog
+    return catalog
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for token in (accept_encoding or "").split(","):
+        coding, _, params = token.strip().partition(";")
+        if coding.strip().lower() != "gzip":
+            continue
+        return params.replace(" ", "").lower() not in {"q=0", "q=0.0", "q=0.00"}
+    return False
+
+
 @router.get("/static-catalog", response_model=List[StaticRecipeSummary])
-def list_static_recipes() -> List[StaticRecipeSummary]:
-    return _load_static_recipe_catalog()
+def list_static_recipes(
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+) -> Response:
+    catalog = _get_static_catalog()
+    headers = {
+        "ETag": catalog.etag,
+        "Cache-Control": "public, max-age=0, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(if_none_match, catalog.etag):
+        return Response(status_code=304, headers=headers)
+    if (
+        _accepts_gzip(accept_encoding)
+        and len(catalog.body) >= STATIC_CATALOG_GZIP_MIN_BYTES
+    ):
+        headers["Content-Encoding"] = "gzip"
+        return Response(
+            content=catalog.gzip_body, media_type="application/json", headers=headers
+        )
+    return Response(
+        content=catalog.body, media_type="application/json", headers=headers
+    )
+
+
+_SEARCH_SORT_COLUMNS = {
+    "recipe_id": Recipe.recipe_id,
+    "cooking_time": Recipe.cooking_time,
+    "calories": Recipe.calories,
+}
+
+
+def _encode_search_cursor(sort: str, key: Optional[int], recipe_id: int) -> str:
+    raw = json.dumps({"s": sort, "k": key, "id": recipe_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_search_cursor(cursor: str, sort: str) -> Tuple[Optional[int], int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        recipe_id = int(payload["id"])
+        key = payload.get("k")
+        key_int = int(key) if key is not None else None
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        raise HTTPException(status_code=400, detail="cursor が不正です。")
+    if payload.get("s") != sort:
+        raise HTTPException(
+            status_code=400, detail="cursor と sort の指定が一致しません。"
+        )
+    return key_int, recipe_id
+
+
+def _validate_flag_names(names: List[str]) -> List[str]:
+    unknown = [name for name in names if name not in RECIPE_FLAG_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail="未知のフラグです: " + ", ".join(unknown)
+        )
+    return names
+
+
+@router.get("/search", response_model=RecipeSearchResponse)
+def search_recipes(
+    flags: List[str] = Query([], description="すべて真であるべきフラグ"),
+    exclude_flags: List[str] = Query([], description="偽であるべきフラグ"),
+    max_cooking_time: Optional[int] = Query(None, ge=0),
+    max_calories: Optional[int] = Query(None, ge=0),
+    sort: Literal["recipe_id", "cooking_time", "calories"] = "recipe_id",
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="前ページの next_cursor"),
+    db: Session = Depends(get_db),
+):
+    """Keyset-paginated recipe listing ordered by ``(sort, recipe_id)``.
+
+    When sorting by ``cooking_time`` or ``calories`` recipes without that value
+    are excluded so the ordering stays index-backed.
+    """
+
+    route_reads(db)
+    sort_column = _SEARCH_SORT_COLUMNS[sort]
+    query = db.query(
+        Recipe.recipe_id,
+        Recipe.recipe_name,
+        Recipe.cooking_time,
+        Recipe.calories,
+        Recipe.image_url,
+        Recipe.feature_mask,
+    )
+    required = mask_for(_validate_flag_names(flags))
+    excluded = mask_for(_validate_flag_names(exclude_flags))
+    if required or excluded:
+        # 「必須フラグがすべて立ち、除外フラグが立っていない」を 1 回の AND と比較で判定
+        query = query.filter(
+            Recipe.feature_mask.op("&")(required | excluded) == required
+        )
+    if max_cooking_time is not None:
+        query = query.filter(Recipe.cooking_time <= max_cooking_time)
+    if max_calories is not None:
+        query = query.filter(Recipe.calories <= max_calories)
+
+    if sort != "recipe_id":
+        query = query.filter(sort_column.isnot(None))
+    if cursor:
+        last_key, last_id = _decode_search_cursor(cursor, sort)
+        if sort == "recipe_id":
+            query = query.filter(Recipe.recipe_id > last_id)
+        else:
+            query = query.filter(
+                or_(
+                    sort_column > last_key,
+                    and_(sort_column == last_key, Recipe.recipe_id > last_id),
+                )
+            )
+
+    order_by = (
+        [Recipe.recipe_id] if sort == "recipe_id" else [sort_column, Recipe.recipe_id]
+    )
+    rows = query.order_by(*order_by).limit(limit + 1).all()
+
+    items = [
+        RecipeSummary(
+            recipe_id=row.recipe_id,
+            recipe_name=row.recipe_name,
+            cooking_time=row.cooking_time,
+            calories=row.calories,
+            image_url=row.image_url,
+            flags=flag_names(row.feature_mask or 0),
+        )
+        for row in rows[:limit]
+    ]
+    next_cursor: Optional[str] = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        key = None if sort == "recipe_id" else getattr(last, sort)
+        next_cursor = _encode_search_cursor(sort, key, last.recipe_id)
+    return RecipeSearchResponse(items=items, next_cursor=next_cursor)
 
 
 def _serialize_recipe_flags(recipe: Recipe) -> Dict[str, bool]:
-    return {field: bool(getattr(recipe, field, False)) for field in RECIPE_FLAG_FIELDS}
+    return unpack_flags(getattr(recipe, "feature_mask", None) or 0)
 
 
-def _optional_current_user(
+async def _optional_current_user(
     request: Request,
     authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db),
-) -> Optional[User]:
-    override = request.app.dependency_overrides.get(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+) -> Optional[AuthenticatedUser]:
+    overrides = request.app.dependency_overrides
+    override = overrides.get(get_current_user_async) or overrides.get(get_current_user)
     if override:
         try:
             return override()
@@ -209,43 +495,36 @@ def _optional_current_user(
     if not authorization:
         return None
     try:
-        return get_current_user(authorization=authorization, db=db)
+        return await get_current_user_async(authorization=authorization, db=db)
     except HTTPException:
         return None
 
 
-def _record_transaction(
-    db: Session,
+def _transaction_row(
     *,
     user_id: int,
-    food_id: int,
-    user_food_id: int,
-    quantity_after: Decimal,
+    stock: UserFood,
     delta_g: Decimal,
     note: Optional[str] = None,
-):
-    from app.backend.models import UserFoodTransaction
-
-    transaction = UserFoodTransaction(
-        user_id=user_id,
-        food_id=food_id,
-        user_food_id=user_food_id,
-        delta_g=delta_g,
-        quantity_after_g=quantity_after,
-        source_type=InventoryChangeSource.RECIPE_COOK,
-        note=note,
-    )
-    db.add(transaction)
-
-
-def _record_recipe_history(
-    db: Session,
+) -> Dict[str, Any]:
+    return {
+        "user_id": user_id,
+        "food_id": _require_int(stock.food_id, "food_id"),
+        "user_food_id": _require_int(stock.user_food_id, "user_food_id"),
+        "delta_g": delta_g,
+        "quantity_after_g": Decimal(str(stock.quantity_g or 0)),
+        "source_type": InventoryChangeSource.RECIPE_COOK,
+        "note": note,
+    }
+
+
+def _history_row(
     *,
     user_id: int,
     recipe_id: int,
     servings: float,
     calories_per_serving: Optional[int],
-):
+) -> Dict[str, Any]:
     total_calories: Optional[int] = None
     if calories_per_serving is not None:
         try:
@@ -253,37 +532,103 @@ def _record_recipe_history(
         except (TypeError, ValueError):
             total_calories = None
 
-    history_row = UserRecipeHistory(
-        user_id=user_id,
-        recipe_id=recipe_id,
-        servings=Decimal(str(servings)),
-        calories_total=total_calories,
+    return {
+        "user_id": user_id,
+        "recipe_id": recipe_id,
+        "servings": Decimal(str(servings)),
+        "calories_total": total_calories,
+    }
+
+
+@router.post("/cook-batch", response_model=CookBatchResponse)
+def cook_recipe_batch(
+    body: CookBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """Cook several recipes at once: one lock pass, one validation, one commit."""
+
+    recipes = _fetch_recipes(db, [item.recipe_id for item in body.items])
+
+    requirements: Dict[int, Decimal] = {}
+    food_lookup: Dict[int, Food] = {}
+    for item in body.items:
+        recipe = recipes[item.recipe_id]
+        item_requirements, item_foods = _collect_requirements(
+            recipe, Decimal(str(item.servings))
+        )
+        if not item_requirements:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{recipe.recipe_name} の材料情報が登録されていません。",
+            )
+        for food_id, quantity in item_requirements.items():
+            requirements[food_id] = requirements.get(food_id, Decimal("0")) + quantity
+        food_lookup.update(item_foods)
+
+    user_id = _require_int(current_user.user_id, "user_id")
+    stock_map = _lock_user_stocks(db, user_id, list(requirements.keys()))
+    _validate_stock_sufficiency(stock_map, requirements, food_lookup)
+
+    note = "cook batch " + ", ".join(
+        f"#{item.recipe_id} x {item.servings}" for item in body.items
+    )
+    consumed_rows = _consume_ingredients(
+        db, user_id, stock_map, requirements, food_lookup, note=note[:255]
+    )
+
+    db.execute(
+        insert(UserRecipeHistory),
+        [
+            _history_row(
+                user_id=user_id,
+                recipe_id=item.recipe_id,
+                servings=item.servings,
+                calories_per_serving=getattr(recipes[item.recipe_id], "calories", None),
+            )
+            for item in body.items
+        ],
+    )
+
+    db.commit()
+
+    return CookBatchResponse(
+        recipes=[
+            CookedRecipe(
+                recipe_id=item.recipe_id,
+                recipe_name=str(getattr(recipes[item.recipe_id], "recipe_name", "")),
+                servings=item.servings,
+            )
+            for item in body.items
+        ],
+        consumed=consumed_rows,
     )
-    db.add(history_row)
 
 
 @router.get("/{recipe_id}", response_model=RecipeDetailResponse)
-def get_recipe_detail(
+async def get_recipe_detail(
     recipe_id: int,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(_optional_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Optional[AuthenticatedUser] = Depends(_optional_current_user),
 ):
-    recipe = _fetch_recipe(db, recipe_id)
-    if not recipe:
-        raise HTTPException(status_code=404, detail="レシピが見つかりません。")
+    route_reads(db, getattr(current_user, "user_id", None))
+    # 同期の取得処理とキャッシュをそのまま使い、I/O 待ちだけを非同期化する
+    return await db.run_sync(_recipe_detail_response, recipe_id, current_user)
 
-    items = _build_ingredient_rows(db, recipe, current_user)
-    flag_values = _serialize_recipe_flags(recipe)
 
-    return RecipeDetailResponse(
-        recipe_id=_require_int(recipe.recipe_id, "recipe_id"),
-        recipe_name=str(getattr(recipe, "recipe_name", "")),
-        description=getattr(recipe, "description", None),
-        instructions=getattr(recipe, "instructions", None),
-        cooking_time=getattr(recipe, "cooking_time", None),
-        calories=getattr(recipe, "calories", None),
-        **flag_values,
-        ingredients=items,
+def _recipe_detail_response(
+    db: Session, recipe_id: int, current_user: Optional[AuthenticatedUser]
+) -> RecipeDetailResponse:
+    base = _get_recipe_detail_base(db, recipe_id)
+    if not current_user:
+        return base.response
+
+    user_id = _require_int(current_user.user_id, "user_id")
+    stock = _load_stock_quantities(db, user_id, base.food_ids)
+    if not stock:
+        return base.response
+    return base.response.model_copy(
+        update={"ingredients": _overlay_stock(base.response.ingredients, stock)}
     )
 
 
@@ -292,7 +637,7 @@ def cook_recipe(
     recipe_id: int,
     body: CookRecipeRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
 ):
     recipe = _fetch_recipe(db, recipe_id)
 
@@ -306,16 +651,7 @@ def cook_recipe(
     if not recipe_foods:
         raise HTTPException(status_code=400, detail="材料情報が登録されていません。")
 
-    requirements: Dict[int, Decimal] = {}
-    food_lookup: Dict[int, Food] = {}
-    for rf in recipe_foods:
-        food_id = _as_int(getattr(rf, "food_id", None))
-        if food_id is None or not rf.food:
-            continue
-        required = Decimal(str(rf.quantity_g or 0)) * multiplier
-        requirements[food_id] = required
-        food_lookup[food_id] = rf.food
-
+    requirements, food_lookup = _collect_requirements(recipe, multiplier)
     if not requirements:
         raise HTTPException(status_code=400, detail="消費対象の食材がありません。")
 
@@ -326,20 +662,23 @@ def cook_recipe(
     recipe_id_int = _require_int(recipe.recipe_id, "recipe_id")
     consumed_rows = _consume_ingredients(
         db,
-        current_user,
+        user_id,
         stock_map,
         requirements,
         food_lookup,
-        servings=body.servings,
-        recipe_id=recipe_id_int,
+        note=f"cook recipe #{recipe_id_int} x {body.servings}",
     )
 
-    _record_recipe_history(
-        db,
-        user_id=user_id,
-        recipe_id=recipe_id_int,
-        servings=body.servings,
-        calories_per_serving=getattr(recipe, "calories", None),
+    db.execute(
+        insert(UserRecipeHistory),
+        [
+            _history_row(
+                user_id=user_id,
+                recipe_id=recipe_id_int,
+                servings=body.servings,
+                calories_per_serving=getattr(recipe, "calories", None),
+            )
+        ],
     )
 
     db.commit()
@@ -364,72 +703,129 @@ def _fetch_recipe(db: Session, recipe_id: int) -> Recipe:
     return recipe
 
 
-def _build_ingredient_rows(
-    db: Session, recipe: Recipe, current_user: Optional[User]
-) -> List[RecipeIngredientItem]:
-    recipe_foods = getattr(recipe, "recipe_foods", []) or []
-    if not recipe_foods:
-        return []
+def _fetch_recipes(db: Session, recipe_ids: List[int]) -> Dict[int, Recipe]:
+    unique_ids = sorted(set(recipe_ids))
+    recipes = (
+        db.query(Recipe)
+        .options(selectinload(Recipe.recipe_foods).joinedload(RecipeFood.food))
+        .filter(Recipe.recipe_id.in_(unique_ids))
+        .all()
+    )
+    found = {_require_int(recipe.recipe_id, "recipe_id"): recipe for recipe in recipes}
+    missing = [str(recipe_id) for recipe_id in unique_ids if recipe_id not in found]
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail="レシピが見つかりません: " + ", ".join(missing),
+        )
+    return found
 
-    stock_lookup = _build_stock_lookup(db, current_user, recipe_foods)
-    items: List[RecipeIngredientItem] = []
 
-    for rf in recipe_foods:
+def _collect_requirements(
+    recipe: Recipe, multiplier: Decimal
+) -> Tuple[Dict[int, Decimal], Dict[int, Food]]:
+    requirements: Dict[int, Decimal] = {}
+    food_lookup: Dict[int, Food] = {}
+    for rf in getattr(recipe, "recipe_foods", []) or []:
+        food_id = _as_int(getattr(rf, "food_id", None))
+        if food_id is None or not rf.food:
+            continue
+        required = Decimal(str(rf.quantity_g or 0)) * multiplier
+        requirements[food_id] = requirements.get(food_id, Decimal("0")) + required
+        food_lookup[food_id] = rf.food
+    return requirements, food_lookup
+
+
+def _get_recipe_detail_base(db: Session, recipe_id: int) -> _RecipeDetailBase:
+    """Return the user-independent part of the detail, cached per bind/recipe."""
+
+    version = get_recipe_catalog_version()
+    bind = canonical_bind(db.get_bind())
+    with _RECIPE_DETAIL_CACHE_LOCK:
+        per_bind = _RECIPE_DETAIL_CACHE.get(bind)
+        if per_bind is not None:
+            cached = per_bind.get(recipe_id)
+            if cached is not None and cached.catalog_version == version:
+                per_bind.move_to_end(recipe_id)
+                return cached
+
+    base = _build_recipe_detail_base(_fetch_recipe(db, recipe_id), version)
+    with _RECIPE_DETAIL_CACHE_LOCK:
+        per_bind = _RECIPE_DETAIL_CACHE.setdefault(bind, OrderedDict())
+        per_bind[recipe_id] = base
+        while len(per_bind) > RECIPE_DETAIL_CACHE_SIZE:
+            per_bind.popitem(last=False)
+    return base
+
+
+def _build_recipe_detail_base(recipe: Recipe, version: int) -> _RecipeDetailBase:
+    items: List[RecipeIngredientItem] = []
+    for rf in getattr(recipe, "recipe_foods", []) or []:
         if not rf.food:
             continue
         food_id = _as_int(rf.food_id)
         if food_id is None:
             continue
-        required_quantity = Decimal(str(rf.quantity_g or 0))
-        available: Optional[float] = None
-        missing: Optional[float] = None
-        if stock_lookup:
-            stock = stock_lookup.get(food_id)
-            if stock:
-                stock_quantity = Decimal(str(stock.quantity_g or 0))
-                available = float(stock_quantity)
-                shortage = required_quantity - stock_quantity
-                missing = float(shortage) if shortage > Decimal("0") else 0.0
-            else:
-                missing = float(required_quantity)
         items.append(
             RecipeIngredientItem(
                 food_id=food_id,
                 food_name=str(rf.food.food_name),
-                quantity_g=float(required_quantity),
-                available_quantity_g=available,
-                missing_quantity_g=missing,
+                quantity_g=float(Decimal(str(rf.quantity_g or 0))),
             )
         )
-    return items
 
+    response = RecipeDetailResponse(
+        recipe_id=_require_int(recipe.recipe_id, "recipe_id"),
+        recipe_name=str(getattr(recipe, "recipe_name", "")),
+        description=getattr(recipe, "description", None),
+        instructions=getattr(recipe, "instructions", None),
+        cooking_time=getattr(recipe, "cooking_time", None),
+        calories=getattr(recipe, "calories", None),
+        **_serialize_recipe_flags(recipe),
+        ingredients=items,
+    )
+    return _RecipeDetailBase(
+        catalog_version=version,
+        response=response,
+        food_ids=tuple(item.food_id for item in items),
+    )
 
-def _build_stock_lookup(
-    db: Session, current_user: Optional[User], recipe_foods: List[RecipeFood]
-) -> Dict[int, UserFood]:
-    if not current_user:
-        return {}
-    food_ids = [
-        fid for fid in (_as_int(rf.food_id) for rf in recipe_foods) if fid is not None
-    ]
+
+def _load_stock_quantities(
+    db: Session, user_id: int, food_ids: Tuple[int, ...]
+) -> Dict[int, Decimal]:
     if not food_ids:
         return {}
-    user_id = _require_int(current_user.user_id, "user_id")
-    stocks = (
-        db.query(UserFood)
-        .filter(
-            UserFood.user_id == user_id,
-            UserFood.food_id.in_(food_ids),
-            UserFood.status != IngredientStatus.DELETED,
+    snapshot = get_inventory_snapshot(db, user_id)
+    return {
+        food_id: Decimal(str(quantity))
+        for food_id, quantity in snapshot.quantities_for(food_ids).items()
+    }
+
+
+def _overlay_stock(
+    items: List[RecipeIngredientItem], stock: Dict[int, Decimal]
+) -> List[RecipeIngredientItem]:
+    overlaid: List[RecipeIngredientItem] = []
+    for item in items:
+        required_quantity = Decimal(str(item.quantity_g))
+        stock_quantity = stock.get(item.food_id)
+        if stock_quantity is None:
+            available: Optional[float] = None
+            missing = float(required_quantity)
+        else:
+            available = float(stock_quantity)
+            shortage = required_quantity - stock_quantity
+            missing = float(shortage) if shortage > Decimal("0") else 0.0
+        overlaid.append(
+            item.model_copy(
+                update={
+                    "available_quantity_g": available,
+                    "missing_quantity_g": missing,
+                }
+            )
         )
-        .all()
-    )
-    lookup: Dict[int, UserFood] = {}
-    for stock in stocks:
-        fid = _as_int(stock.food_id)
-        if fid is not None:
-            lookup[fid] = stock
-    return lookup
+    return overlaid
 
 
 def _lock_user_stocks(
@@ -444,6 +840,8 @@ def _lock_user_stocks(
             UserFood.food_id.in_(food_ids),
             UserFood.status != IngredientStatus.DELETED,
         )
+        # 常に food_id 順でロックを取り、並行する調理リクエスト同士のデッドロックを防ぐ
+        .order_by(UserFood.food_id, UserFood.user_food_id)
         .with_for_update()
         .all()
     )
@@ -476,19 +874,18 @@ def _validate_stock_sufficiency(
 
 def _consume_ingredients(
     db: Session,
-    current_user: User,
+    user_id: int,
     stock_map: Dict[int, UserFood],
     requirements: Dict[int, Decimal],
     food_lookup: Dict[int, Food],
     *,
-    servings: float,
-    recipe_id: int,
+    note: Optional[str] = None,
 ) -> List[CookedIngredient]:
     consumed_rows: List[CookedIngredient] = []
-    note = f"cook recipe #{recipe_id} x {servings}"
-    user_id = _require_int(current_user.user_id, "user_id")
+    transaction_rows: List[Dict[str, Any]] = []
 
-    for food_id, required_quantity in requirements.items():
+    for food_id in sorted(requirements):
+        required_quantity = requirements[food_id]
         stock = stock_map.get(food_id)
         if not stock:
             continue
@@ -499,17 +896,13 @@ def _consume_ingredients(
         setattr(stock, "quantity_g", remaining)
         setattr(stock, "status", IngredientStatus.USED)
 
-        stock_food_id = _require_int(stock.food_id, "food_id")
-        stock_user_food_id = _require_int(stock.user_food_id, "user_food_id")
-
-        _record_transaction(
-            db,
-            user_id=user_id,
-            food_id=stock_food_id,
-            user_food_id=stock_user_food_id,
-            quantity_after=Decimal(str(stock.quantity_g or 0)),
-            delta_g=required_quantity * Decimal("-1"),
-            note=note,
+        transaction_rows.append(
+            _transaction_row(
+                user_id=user_id,
+                stock=stock,
+                delta_g=required_quantity * Decimal("-1"),
+                note=note,
+            )
         )
 
         consumed_rows.append(
@@ -522,4 +915,7 @@ def _consume_ingredients(
             )
         )
 
+    if transaction_rows:
+        db.execute(insert(UserFoodTransaction), transaction_rows)
+
     return consumed_rows
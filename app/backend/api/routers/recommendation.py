@@ -1,15 +1,15 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, Header, HTTPException, status
-from pydantic import BaseModel, ConfigDict
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from sqlalchemy.orm import Session
 
-from app.backend.api.routers.auth_routes import get_current_user
-from app.backend.database import get_db
-from app.backend.models import User
+from app.backend.api.responses import validated_response
+from app.backend.api.routers.auth_routes import AuthenticatedUser, get_current_user
+from app.backend.database import get_db, route_reads
 from app.backend.services.recommendation.data_models import (
     Ingredient,
     RecommendationRequest,
@@ -19,12 +19,25 @@ from app.backend.services.recommendation.data_source import (
     InventoryManager,
     RecipeDataSource,
 )
+from app.backend.services.recipe_loader import get_recipe_catalog_version
+from app.backend.services.recommendation import result_cache
+from app.backend.services.recommendation.inventory_snapshot import (
+    NO_EXPIRY,
+    InventorySnapshot,
+)
 from app.backend.services.recommendation.proposer_logic import RecipeProposer
+from app.backend.services.recommendation.vector_index import (
+    RECOMMENDATION_CANDIDATE_LIMIT,
+    RECOMMENDATION_VECTOR_INDEX,
+    recipe_vector_index,
+)
 
 router = APIRouter()
 
 
-class RecommendationResult(BaseModel):
+class RecommendationItem(BaseModel):
+    """Per-recipe fields of a proposal (v2 ``results`` rows)."""
+
     model_config = ConfigDict(from_attributes=True)
 
     recipe_id: int
@@ -32,8 +45,6 @@ class RecommendationResult(BaseModel):
     final_score: float
     coverage_score: float
     preference_score: float
-    user_preference_vector: List[float]
-    user_preference_labels: List[str]
     prep_time: int
     calories: int
     is_boosted: bool
@@ -41,15 +52,51 @@ class RecommendationResult(BaseModel):
     required_qty: Dict[str, float]
     req_count: int
     image_url: Optional[str] = None
+
+
+class RecommendationResult(RecommendationItem):
+    user_preference_vector: List[float]
+    user_preference_labels: List[str]
     inventory_source: Optional[str] = None
     inventory_count: Optional[int] = None
     inventory_label: Optional[str] = None
 
 
+class UserPreference(BaseModel):
+    vector: List[float]
+    labels: List[str]
+
+
+class InventorySummary(BaseModel):
+    source: str
+    count: int
+    label: str
+
+
+class RecommendationEnvelope(BaseModel):
+    """v2 response: fields shared by every proposal appear once."""
+
+    user_preference: UserPreference
+    inventory: InventorySummary
+    results: List[RecommendationItem]
+
+
+class UseItUpResult(RecommendationResult):
+    expiring_grams: float
+    expiring_items: List[str]
+
+
+# 結果はここで一度だけ検証し、FastAPI による再検証と jsonable_encoder を通さない
+_RECOMMENDATION_RESULTS = TypeAdapter(List[RecommendationResult])
+_USE_IT_UP_RESULTS = TypeAdapter(List[UseItUpResult])
+_RECOMMENDATION_ITEMS = TypeAdapter(List[RecommendationItem])
+_RECOMMENDATION_ENVELOPE = TypeAdapter(RecommendationEnvelope)
+
+
 def _optional_current_user(
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-) -> Optional[User]:
+) -> Optional[AuthenticatedUser]:
     if not authorization:
         return None
     try:
@@ -85,7 +132,7 @@ def _parse_inventory_payload(payload: List[Dict]) -> List[Ingredient]:
 
 
 def _resolve_target_user(
-    body: RecommendationRequest, current_user: Optional[User]
+    body: RecommendationRequest, current_user: Optional[AuthenticatedUser]
 ) -> tuple[int, bool]:
     if current_user:
         current_user_id = getattr(current_user, "user_id", None)
@@ -114,10 +161,10 @@ def _resolve_inventory(
     db: Session,
     user_id: int,
     is_authenticated: bool,
-) -> tuple[List[Ingredient], str]:
+) -> tuple[Union[List[Ingredient], InventorySnapshot], str]:
     if is_authenticated:
-        items = InventoryManager(db_session=db).get_current_inventory(user_id)
-        return items, "server"
+        snapshot = InventoryManager(db_session=db).get_snapshot(user_id)
+        return snapshot, "server"
 
     if not body.inventory:
         raise HTTPException(
@@ -127,17 +174,21 @@ def _resolve_inventory(
     return _parse_inventory_payload(body.inventory), "client"
 
 
-@router.post("/propose", response_model=List[RecommendationResult])
-def propose_recommendations(
+def _inventory_key(
+    inventory_items: Union[List[Ingredient], InventorySnapshot],
     body: RecommendationRequest,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(_optional_current_user),
-):
-    target_user_id, is_authenticated = _resolve_target_user(body, current_user)
-    inventory_items, inventory_source = _resolve_inventory(
-        body, db, target_user_id, is_authenticated
-    )
+) -> Tuple[str, object]:
+    if isinstance(inventory_items, InventorySnapshot):
+        return ("server", inventory_items.version)
+    return ("client", result_cache.payload_digest(body.inventory))
+
 
+def _compute_proposals(
+    body: RecommendationRequest,
+    db: Session,
+    target_user_id: int,
+    inventory_items: Union[List[Ingredient], InventorySnapshot],
+) -> List[Dict]:
     recipe_source = RecipeDataSource(db_session=db)
     recipes = recipe_source.load_and_vectorize_recipes()
     if not recipes:
@@ -159,10 +210,20 @@ def propose_recommendations(
         allergies=set(body.allergies or []),
     )
 
+    vector_index = None
+    if RECOMMENDATION_CANDIDATE_LIMIT:
+        vector_index = recipe_vector_index(
+            recipes,
+            RECOMMENDATION_VECTOR_INDEX,
+            catalog_key=get_recipe_catalog_version(),
+        )
     proposer = RecipeProposer(
         all_recipes=recipes,
         user_inventory=inventory_items,
         user_profile_vector=user_profile_vector,
+        food_names=recipe_source.food_names,
+        candidate_limit=RECOMMENDATION_CANDIDATE_LIMIT,
+        vector_index=vector_index,
     )
 
     proposals = proposer.propose(params)
@@ -172,15 +233,136 @@ def propose_recommendations(
             detail="現在の在庫と条件に合うレシピが見つかりません。",
         )
 
+    return proposals
+
+
+def _inventory_label(inventory_source: str, inventory_count: int) -> str:
+    if inventory_source == "server":
+        return f"サーバー在庫 {inventory_count}件"
+    return f"指定在庫 {inventory_count}件"
+
+
+def _propose(
+    body: RecommendationRequest,
+    db: Session,
+    current_user: Optional[AuthenticatedUser],
+) -> Tuple[List[Dict], InventorySummary]:
+    target_user_id, is_authenticated = _resolve_target_user(body, current_user)
+    # 在庫を更新した直後のユーザーはプライマリから読む
+    route_reads(db, target_user_id)
+    inventory_items, inventory_source = _resolve_inventory(
+        body, db, target_user_id, is_authenticated
+    )
+
+    fingerprint = result_cache.build_fingerprint(
+        db,
+        target_user_id,
+        _inventory_key(inventory_items, body),
+        get_recipe_catalog_version(),
+        body.max_time,
+        body.max_calories,
+        tuple(sorted(set(body.allergies or []))),
+        result_cache.payload_digest(body.history, body.recipes)
+        if body.history and body.recipes
+        else None,
+    )
+    proposals = result_cache.get_cached_proposals(db, fingerprint)
+    if proposals is None:
+        proposals = _compute_proposals(body, db, target_user_id, inventory_items)
+        result_cache.store_proposals(db, fingerprint, proposals)
+
     inventory_count = len(inventory_items)
-    inventory_label = (
-        f"サーバー在庫 {inventory_count}件"
-        if inventory_source == "server"
-        else f"指定在庫 {inventory_count}件"
+    inventory = InventorySummary(
+        source=inventory_source,
+        count=inventory_count,
+        label=_inventory_label(inventory_source, inventory_count),
     )
+    return proposals, inventory
+
+
+@router.post("/propose", response_model=List[RecommendationResult])
+def propose_recommendations(
+    body: RecommendationRequest,
+    db: Session = Depends(get_db),
+    current_user: Optional[AuthenticatedUser] = Depends(_optional_current_user),
+):
+    proposals, inventory = _propose(body, db, current_user)
     for proposal in proposals:
-        proposal.setdefault("inventory_source", inventory_source)
-        proposal.setdefault("inventory_count", inventory_count)
-        proposal.setdefault("inventory_label", inventory_label)
+        proposal.setdefault("inventory_source", inventory.source)
+        proposal.setdefault("inventory_count", inventory.count)
+        proposal.setdefault("inventory_label", inventory.label)
 
-    return proposals
+    return validated_response(
+        _RECOMMENDATION_RESULTS, _RECOMMENDATION_RESULTS.validate_python(proposals)
+    )
+
+
+@router.post("/v2/propose", response_model=RecommendationEnvelope)
+def propose_recommendations_v2(
+    body: RecommendationRequest,
+    db: Session = Depends(get_db),
+    current_user: Optional[AuthenticatedUser] = Depends(_optional_current_user),
+):
+    """``/propose`` と同じ提案を、全件共通の項目をまとめた形式で返す。"""
+
+    proposals, inventory = _propose(body, db, current_user)
+    # 嗜好ベクトルとラベルは全提案で同一なので先頭から 1 回だけ取り出す
+    first = proposals[0]
+    envelope = RecommendationEnvelope(
+        user_preference=UserPreference(
+            vector=first["user_preference_vector"],
+            labels=first["user_preference_labels"],
+        ),
+        inventory=inventory,
+        # 行ごとの嗜好ベクトル・在庫情報は RecommendationItem に含まれず捨てられる
+        results=_RECOMMENDATION_ITEMS.validate_python(proposals),
+    )
+    return validated_response(_RECOMMENDATION_ENVELOPE, envelope)
+
+
+@router.get("/use-it-up", response_model=List[UseItUpResult])
+def list_use_it_up_recipes(
+    max_time: int = Query(60, ge=1),
+    max_calories: int = Query(2000, ge=1),
+    allergies: List[str] = Query(default_factory=list),
+    days: int = Query(3, ge=0, le=30),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+):
+    """期限切れ間近の在庫を多く使い切れるレシピ順に返す。"""
+
+    route_reads(db, current_user.user_id)
+    snapshot = InventoryManager(db_session=db).get_snapshot(current_user.user_id)
+    today = date.today().toordinal()
+    expiry = snapshot.expiry_ordinals
+    has_expiring = (
+        (expiry != NO_EXPIRY)
+        & (expiry >= today)
+        & (expiry <= today + days)
+        & (snapshot.quantities > 0)
+    )
+    # 期限の近い在庫がなければレシピを読み込まずに返す
+    if not bool(has_expiring.any()):
+        return []
+
+    recipe_source = RecipeDataSource(db_session=db)
+    proposer = RecipeProposer(
+        all_recipes=recipe_source.load_and_vectorize_recipes(),
+        user_inventory=snapshot,
+        user_profile_vector=recipe_source.create_user_profile_vector(
+            current_user.user_id
+        ),
+        food_names=recipe_source.food_names,
+    )
+    params = UserParameters(
+        max_time=max_time, max_calories=max_calories, allergies=set(allergies)
+    )
+    results = proposer.propose_use_it_up(params, days=days, limit=limit)
+    for result in results:
+        result["inventory_source"] = "server"
+        result["inventory_count"] = len(snapshot)
+        result["inventory_label"] = _inventory_label("server", len(snapshot))
+    return validated_response(
+        _USE_IT_UP_RESULTS, _USE_IT_UP_RESULTS.validate_python(results)
+    )
@@ -4,11 +4,13 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.backend.database import get_db
-from app.backend.models import User
+from app.backend.models import RefreshToken, User
+from app.backend.services import passwords
 
-from .auth_routes import _hash_password, _verify_password, get_current_user
+from .auth_routes import AuthenticatedUser, get_current_user, invalidate_principal
 
 router = APIRouter()
 
@@ -23,9 +25,21 @@ class UserResponse(BaseModel):
     created_at: datetime
 
 
+def _load_user(db: Session, current_user: AuthenticatedUser) -> User:
+    user = db.get(User, current_user.user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+        )
+    return user
+
+
 @router.get("/me", response_model=UserResponse)
-def read_me(current_user: User = Depends(get_current_user)) -> User:
-    return current_user
+def read_me(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> User:
+    return _load_user(db, current_user)
 
 
 class PasswordChangeRequest(BaseModel):
@@ -33,23 +47,34 @@ class PasswordChangeRequest(BaseModel):
     new_password: str
 
 
+def _store_new_password(db: Session, user: User, password_hash: str) -> None:
+    setattr(user, "password_hash", password_hash)
+    # 既存のアクセストークン・リフレッシュトークンをすべて無効化する
+    setattr(user, "token_version", int(getattr(user, "token_version", 0) or 0) + 1)
+    db.query(RefreshToken).filter(RefreshToken.user_id == user.user_id).delete(
+        synchronize_session=False
+    )
+    db.commit()
+
+
 @router.put("/me/password")
-def change_password(
+async def change_password(
     req: PasswordChangeRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    stored_hash = getattr(current_user, "password_hash", None)
+    user = await run_in_threadpool(_load_user, db, current_user)
+    stored_hash = getattr(user, "password_hash", None)
     if not isinstance(stored_hash, str):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="No password set for user"
         )
-    if not _verify_password(req.old_password, stored_hash):
+    if not await passwords.verify_password_async(req.old_password, stored_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Old password incorrect"
         )
 
-    setattr(current_user, "password_hash", _hash_password(req.new_password))
-    db.add(current_user)
-    db.commit()
+    new_hash = await passwords.hash_password_async(req.new_password)
+    await run_in_threadpool(_store_new_password, db, user, new_hash)
+    invalidate_principal(current_user.user_id)
     return {"message": "Password updated"}
@@ -1,22 +1,273 @@
+import itertools
 import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+)
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import numpy as np
+from sqlalchemy import Select, create_engine, event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import ORMExecuteState, Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
 
 DEFAULT_MYSQL_URL = "mysql+pymysql://user:password@db:3306/receipt_recipe_db"
 DATABASE_URL = os.getenv("DATABASE_URL", DEFAULT_MYSQL_URL)
+# 未指定なら DATABASE_URL のドライバを非同期版に置き換えて使う
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+# 読み取り専用レプリカ（カンマ区切り）。未指定なら読み取りもプライマリへ送る
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+# 書き込み後、この秒数は同じユーザーの読み取りをプライマリへ固定する（レプリカ遅延の上限目安）
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# 接続プール設定。合計 (プロセス数 x (DB_POOL_SIZE + DB_MAX_OVERFLOW)) を
+# MySQL の max_connections 未満に収める
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# MySQL の wait_timeout（既定 8 時間）より短い周期で接続を作り直す
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# 0 にするとチェックアウト毎の ping を省き、DB_POOL_RECYCLE による入れ替えだけに頼る
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") != "0"
+POOL_WAIT_SAMPLE_SIZE = 1024
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-    pool_pre_ping=True,
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class PoolStats:
+    """Checkout wait times and timeouts for one named pool (survives ``recreate``)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._recent: Deque[float] = deque(maxlen=POOL_WAIT_SAMPLE_SIZE)
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.wait_total += waited
+                self._recent.append(waited)
+            self.wait_max = max(self.wait_max, waited)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = np.array(self._recent) * 1000 if self._recent else None
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_total": round(self.wait_total * 1000, 3),
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+                "wait_ms_p50": (
+                    round(float(np.percentile(recent, 50)), 3)
+                    if recent is not None
+                    else 0.0
+                ),
+                "wait_ms_p99": (
+                    round(float(np.percentile(recent, 99)), 3)
+                    if recent is not None
+                    else 0.0
+                ),
+            }
+
+
+_POOL_STATS: Dict[str, PoolStats] = {}
+_POOL_STATS_LOCK = threading.Lock()
+
+
+def pool_stats(name: str) -> PoolStats:
+    with _POOL_STATS_LOCK:
+        return _POOL_STATS.setdefault(name, PoolStats())
+
+
+class _InstrumentedPoolMixin:
+    # pool_logging_name をメトリクスのキーに使う（dispose 後の recreate でも引き継がれる）
+    def _do_get(self):
+        stats = pool_stats(getattr(self, "_orig_logging_name", None) or "default")
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()  # type: ignore[misc]
+        except sa_exc.TimeoutError:
+            stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        stats.record(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, name: str, *, is_async: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for ``create_engine``/``create_async_engine``."""
+
+    if url.startswith("sqlite"):
+        if is_async:
+            return {}
+        return {"connect_args": {"check_same_thread": False}, "pool_pre_ping": True}
+    return {
+        "poolclass": (
+            InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool
+        ),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_logging_name": name,
+    }
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL, "primary"))
+
+# 非同期エンジンの sync_engine やレプリカ -> 同じデータを持つプライマリの同期エンジン。
+# 在庫スナップショット等のキャッシュをプライマリへの書き込みで無効化できるようにする
+_BIND_ALIASES: "weakref.WeakKeyDictionary[Any, Engine]" = weakref.WeakKeyDictionary()
+
+
+def register_bind_alias(alias: Any, primary: Engine) -> None:
+    _BIND_ALIASES[alias] = primary
+
+
+def canonical_bind(bind: Any) -> Any:
+    """Return the engine that per-bind caches should be keyed by."""
+
+    return _BIND_ALIASES.get(bind, bind)
+
+
+replica_engines: List[Engine] = [
+    create_engine(url, **engine_options(url, f"replica{idx}"))
+    for idx, url in enumerate(DATABASE_REPLICA_URLS, start=1)
+]
+
+_REPLICAS_KEY = "read_replicas"
+_ROUTED_KEY = "routed_replica"
+_WRITTEN_KEY = "replica_sticky_keys"
+# キー None はユーザーに属さない行（マスタ等）の書き込みを表す。
+# 期限はどれも DB_REPLICA_STICKY_SECONDS 後なので、挿入順がそのまま期限順になる
+_STICKY_UNTIL: "OrderedDict[Optional[int], float]" = OrderedDict()
+_STICKY_LOCK = threading.Lock()
+_REPLICA_COUNTER = itertools.count()
+
+
+def mark_sticky(user_ids: Iterable[Optional[int]]) -> None:
+    now = time.monotonic()
+    deadline = now + DB_REPLICA_STICKY_SECONDS
+    with _STICKY_LOCK:
+        # 期限切れのエントリを先頭から捨て、常駐プロセスでも肥大化させない
+        while _STICKY_UNTIL and next(iter(_STICKY_UNTIL.values())) <= now:
+            _STICKY_UNTIL.popitem(last=False)
+        for user_id in user_ids:
+            _STICKY_UNTIL[user_id] = deadline
+            _STICKY_UNTIL.move_to_end(user_id)
+
+
+def is_sticky(user_id: Optional[int] = None) -> bool:
+    now = time.monotonic()
+    with _STICKY_LOCK:
+        keys = (None,) if user_id is None else (None, user_id)
+        return any(_STICKY_UNTIL.get(key, 0.0) > now for key in keys)
+
+
+class RoutingSession(Session):
+    """Session that can serve its reads from a replica (see ``route_reads``).
+
+    Flushes, DML and ``SELECT ... FOR UPDATE`` always use the primary bind; after
+    the first of them the session stays on the primary to read its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get(_ROUTED_KEY)
+        if replica is not None:
+            if not self._flushing and not _is_write(clause):
+                return replica
+            self.info[_ROUTED_KEY] = None
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def _is_write(clause: Any) -> bool:
+    if isinstance(clause, UpdateBase):
+        return True
+    return isinstance(clause, Select) and clause._for_update_arg is not None
+
+
+def route_reads(session: Any, user_id: Optional[int] = None) -> None:
+    """Send the following reads of ``session`` to a replica.
+
+    Stays on the primary while ``user_id`` (or any catalog write) is within the
+    read-your-writes window. Accepts ``AsyncSession`` as well; sessions without
+    configured replicas are left untouched.
+    """
+
+    session = getattr(session, "sync_session", session)
+    replicas: Sequence[Engine] = session.info.get(_REPLICAS_KEY) or ()
+    if not replicas or is_sticky(user_id):
+        session.info.pop(_ROUTED_KEY, None)
+        return
+    session.info[_ROUTED_KEY] = replicas[next(_REPLICA_COUNTER) % len(replicas)]
+
+
+def routing_sessionmaker(primary: Engine, replicas: Sequence[Engine]) -> sessionmaker:
+    for replica in replicas:
+        register_bind_alias(replica, primary)
+    return sessionmaker(
+        class_=RoutingSession,
+        bind=primary,
+        autocommit=False,
+        autoflush=False,
+        info={_REPLICAS_KEY: list(replicas)},
+    )
+
+
+SessionLocal = routing_sessionmaker(engine, replica_engines)
 Base = declarative_base()
 
+_ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+_MONITORED_ENGINES: Dict[str, Engine] = {"primary": engine}
+_MONITORED_ENGINES.update(
+    (f"replica{idx}", replica) for idx, replica in enumerate(replica_engines, start=1)
+)
+_ASYNC_SESSIONMAKER: Optional[async_sessionmaker] = None
+_ASYNC_LOCK = threading.Lock()
+
 
 def get_db():
     db = SessionLocal()
@@ -24,3 +275,159 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return _ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+def async_sessionmaker_for(
+    sync_engine: Engine,
+    url: Optional[str] = None,
+    *,
+    replicas: Sequence[AsyncEngine] = (),
+    **engine_kwargs: Any,
+) -> async_sessionmaker:
+    """Build an ``AsyncSession`` factory for the database behind ``sync_engine``."""
+
+    target = url or to_async_url(sync_engine.url.render_as_string(hide_password=False))
+    async_engine = create_async_engine(target, **engine_kwargs)
+    register_bind_alias(async_engine.sync_engine, sync_engine)
+    for replica in replicas:
+        register_bind_alias(replica.sync_engine, sync_engine)
+    return async_sessionmaker(
+        async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+        sync_session_class=RoutingSession,
+        info={_REPLICAS_KEY: [replica.sync_engine for replica in replicas]},
+    )
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    # aiomysql 等のドライバは初回利用時まで読み込まない
+    global _ASYNC_SESSIONMAKER
+    with _ASYNC_LOCK:
+        if _ASYNC_SESSIONMAKER is None:
+            url = ASYNC_DATABASE_URL or to_async_url(DATABASE_URL)
+            replicas = []
+            for idx, replica_url in enumerate(DATABASE_REPLICA_URLS, start=1):
+                replica_url = to_async_url(replica_url)
+                name = f"async-replica{idx}"
+                replica = create_async_engine(
+                    replica_url, **engine_options(replica_url, name, is_async=True)
+                )
+                monitor_engine(name, replica.sync_engine)
+                replicas.append(replica)
+            _ASYNC_SESSIONMAKER = async_sessionmaker_for(
+                engine,
+                url,
+                replicas=replicas,
+                **engine_options(url, "async", is_async=True),
+            )
+            monitor_engine("async", _ASYNC_SESSIONMAKER.kw["bind"].sync_engine)
+        return _ASYNC_SESSIONMAKER
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+def monitor_engine(name: str, target: Engine) -> None:
+    _MONITORED_ENGINES[name] = target
+
+
+def pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Occupancy and checkout-wait statistics of every monitored engine's pool."""
+
+    metrics: Dict[str, Dict[str, Any]] = {}
+    for name, target in list(_MONITORED_ENGINES.items()):
+        pool = target.pool
+        entry: Dict[str, Any] = {"pool_class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=getattr(pool, "_max_overflow", None),
+                timeout=pool.timeout(),
+                recycle=getattr(pool, "_recycle", None),
+                pre_ping=bool(getattr(pool, "_pre_ping", False)),
+            )
+        if isinstance(pool, _InstrumentedPoolMixin):
+            label = getattr(pool, "_orig_logging_name", None) or "default"
+            entry.update(pool_stats(label).snapshot())
+        metrics[name] = entry
+    return metrics
+
+
+# 全ユーザーの読み取りをプライマリへ寄せるマスタ系テーブル（レプリカ経由で読むもの）。
+# 抽象化キャッシュ等ここにない共有テーブルへの書き込みでは固定しない
+_GLOBAL_STICKY_TABLES = frozenset(
+    {"foods", "food_categories", "recipes", "recipe_foods"}
+)
+
+
+# 書き込んだユーザー（またはマスタ）をコミット時に記録し、直後の読み取りをプライマリへ送る
+def _written_keys(session: Session) -> List[Optional[int]]:
+    keys: List[Optional[int]] = []
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if hasattr(obj, "user_id"):
+            if isinstance(obj.user_id, int):
+                keys.append(obj.user_id)
+        elif getattr(obj, "__tablename__", None) in _GLOBAL_STICKY_TABLES:
+            keys.append(None)
+    return keys
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_sticky_keys(session: Session, flush_context: Any) -> None:
+    keys = _written_keys(session)
+    if keys:
+        session.info.setdefault(_WRITTEN_KEY, set()).update(keys)
+
+
+def _statement_user_ids(statement: Any, params: Any) -> Set[int]:
+    rows = params if isinstance(params, list) else [params or {}]
+    user_ids = {row["user_id"] for row in rows if isinstance(row.get("user_id"), int)}
+    where = getattr(statement, "whereclause", None)
+    if where is not None:
+        for node in visitors.iterate(where):
+            if (
+                isinstance(node, BinaryExpression)
+                and getattr(node.left, "key", None) == "user_id"
+                and isinstance(node.right, BindParameter)
+                and isinstance(node.right.effective_value, int)
+            ):
+                user_ids.add(node.right.effective_value)
+    return user_ids
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_sticky_keys(state: ORMExecuteState) -> None:
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement, "table", None)
+    keys: Set[Optional[int]] = set()
+    if table is not None and "user_id" in getattr(table, "c", ()):
+        # user_id で絞れない一括処理（期限切れトークンの掃除等）は対象外
+        keys.update(_statement_user_ids(state.statement, state.parameters))
+    elif getattr(table, "name", None) in _GLOBAL_STICKY_TABLES:
+        keys.add(None)
+    if keys:
+        state.session.info.setdefault(_WRITTEN_KEY, set()).update(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_written_sticky(session: Session) -> None:
+    keys = session.info.pop(_WRITTEN_KEY, None)
+    if keys:
+        mark_sticky(keys)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_written_keys(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(_WRITTEN_KEY, None)
@@ -6,6 +6,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
@@ -47,6 +48,15 @@ class FoodCategory(Base):
 
 class Food(Base):
     __tablename__ = "foods"
+    __table_args__ = (
+        # 食材名の部分一致検索用（MySQL のみ。ngram で日本語も 2 文字単位に分割）
+        Index(
+            "ft_foods_food_name",
+            "food_name",
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram",
+        ).ddl_if(dialect="mysql"),
+    )
 
     food_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     food_name = Column(String(200), nullable=False, unique=True)
@@ -73,6 +83,11 @@ class Food(Base):
 
 class UserFood(Base):
     __tablename__ = "user_foods"
+    __table_args__ = (
+        # 在庫一覧 (user_id, status) と食材ごとの在庫引き当て (user_id, food_id, status)
+        Index("idx_user_foods_user_status", "user_id", "status"),
+        Index("idx_user_foods_user_food_status", "user_id", "food_id", "status"),
+    )
 
     user_food_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(
@@ -1,8 +1,19 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, Numeric, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+)
+from sqlalchemy import event, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.backend.database import Base
+from app.backend.services.recipe_flags import pack_flags
 
 
 class Recipe(Base):
@@ -33,6 +44,14 @@ class Recipe(Base):
     texture_stewed = Column(Boolean, nullable=False, default=False)
     texture_fried = Column(Boolean, nullable=False, default=False)
     texture_stir_fried = Column(Boolean, nullable=False, default=False)
+    # 上記フラグのビット表現（services/recipe_flags.py）。挿入・更新時に自動で再計算
+    feature_mask = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # /recipes/search のキーセットページング用 (ORDER BY <列>, recipe_id)
+        Index("idx_recipes_cooking_time_id", "cooking_time", "recipe_id"),
+        Index("idx_recipes_calories_id", "calories", "recipe_id"),
+    )
 
     recipe_foods = relationship(
         "RecipeFood",
@@ -46,6 +65,12 @@ class Recipe(Base):
     )
 
 
+@event.listens_for(Recipe, "before_insert")
+@event.listens_for(Recipe, "before_update")
+def _sync_feature_mask(mapper, connection, target: Recipe) -> None:
+    target.feature_mask = pack_flags(target)
+
+
 class RecipeFood(Base):
     __tablename__ = "recipe_foods"
 
@@ -70,6 +95,10 @@ class RecipeFood(Base):
 
 class UserRecipeHistory(Base):
     __tablename__ = "user_recipe_history"
+    __table_args__ = (
+        # 直近の調理履歴から嗜好ベクトルを作るための索引 (ORDER BY cooked_at DESC)
+        Index("idx_user_recipe_history_user", "user_id", text("cooked_at DESC")),
+    )
 
     history_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.backend.database import Base
@@ -8,9 +8,14 @@ from app.backend.database import Base
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("idx_refresh_tokens_user_created", "user_id", "created_at"),
+        Index("idx_refresh_tokens_expires_at", "expires_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String(512), unique=True, nullable=False, index=True)
+    # JWT 本体ではなく sha256 の 16 進表記だけを保存する
+    token_hash = Column(String(64), unique=True, nullable=False)
     user_id = Column(
         Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False
     )
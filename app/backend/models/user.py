@@ -12,6 +12,8 @@ class User(Base):
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
     birthday = Column(Date, nullable=True)
+    # パスワード変更時に加算し、それ以前に発行したアクセストークンを無効にする
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -0,0 +1,335 @@
+"""Substring search on ``foods.food_name``.
+
+On MySQL the ``ft_foods_food_name`` n-gram FULLTEXT index answers the query as
+a boolean-mode phrase match, which behaves like ``LIKE '%q%'`` without a full
+table scan. Other dialects, and terms shorter than the n-gram token size that
+the index cannot match, fall back to a case-insensitive ``LIKE``.
+
+``FoodSearchIndex`` is the in-memory variant used for autocomplete: names are
+normalized with ``normalize_raw_text`` (NFKC, lower case, katakana folded to
+hiragana) and also indexed in romaji, so ``とまと``, ``トマト`` and ``tomato``
+all find トマト. Prefix hits rank above substring hits.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import re
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.backend.database import canonical_bind
+from app.backend.models import Food, FoodCategory
+from app.backend.services.abstractor.ingredient_abstraction_service import (
+    normalize_raw_text,
+)
+
+# MySQL の ngram_token_size（サーバー設定と合わせる）
+MYSQL_NGRAM_TOKEN_SIZE = int(os.getenv("MYSQL_NGRAM_TOKEN_SIZE", "2"))
+
+# BOOLEAN MODE の演算子。フレーズ検索では空白として扱う
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+_LIKE_SPECIALS = re.compile(r"([\\%_])")
+
+
+def food_name_matches(query: str, dialect_name: str) -> ColumnElement:
+    """WHERE clause selecting foods whose name contains ``query``."""
+
+    term = query.strip()
+    if dialect_name == "mysql":
+        phrase = " ".join(_BOOLEAN_OPERATORS.sub(" ", term).split())
+        if len(phrase.replace(" ", "")) >= MYSQL_NGRAM_TOKEN_SIZE:
+            return match(Food.food_name, against=f'"{phrase}"').in_boolean_mode()
+    pattern = _LIKE_SPECIALS.sub(r"\\\1", term.lower())
+    return func.lower(Food.food_name).like(f"%{pattern}%", escape="\\")
+
+
+# --- 補完用のインメモリ索引 ------------------------------------------------
+
+# 他プロセスからのマスタ更新を拾うための再読み込み間隔（秒）
+FOOD_SEARCH_INDEX_TTL_SECONDS = float(os.getenv("FOOD_SEARCH_INDEX_TTL_SECONDS", "300"))
+
+_VOWELS = "aiueo"
+_KANA_ROWS = {
+    "": "あいうえお",
+    "k": "かきくけこ",
+    "s": "さしすせそ",
+    "t": "たちつてと",
+    "n": "なにぬねの",
+    "h": "はひふへほ",
+    "m": "まみむめも",
+    "r": "らりるれろ",
+    "g": "がぎぐげご",
+    "z": "ざじずぜぞ",
+    "d": "だぢづでど",
+    "b": "ばびぶべぼ",
+    "p": "ぱぴぷぺぽ",
+}
+_ROMAJI: Dict[str, str] = {
+    kana: consonant + vowel
+    for consonant, kanas in _KANA_ROWS.items()
+    for kana, vowel in zip(kanas, _VOWELS)
+}
+_ROMAJI.update(
+    {
+        "し": "shi",
+        "ち": "chi",
+        "つ": "tsu",
+        "ふ": "fu",
+        "じ": "ji",
+        "ぢ": "ji",
+        "づ": "zu",
+        "や": "ya",
+        "ゆ": "yu",
+        "よ": "yo",
+        "わ": "wa",
+        "を": "o",
+        "ん": "n",
+        "ゔ": "vu",
+        "ぁ": "a",
+        "ぃ": "i",
+        "ぅ": "u",
+        "ぇ": "e",
+        "ぉ": "o",
+        "ゃ": "ya",
+        "ゅ": "yu",
+        "ょ": "yo",
+        "ゎ": "wa",
+        "ー": "",
+    }
+)
+# 拗音（きゃ -> kya, しゃ -> sha）
+for _kana, _romaji in list(_ROMAJI.items()):
+    if len(_romaji) >= 2 and _romaji.endswith("i") and _kana not in "いぃ":
+        _stem = _romaji[:-1] if _romaji in ("shi", "chi", "ji") else _romaji[:-1] + "y"
+        for _small, _vowel in zip("ゃゅょ", "auo"):
+            _ROMAJI[_kana + _small] = _stem + _vowel
+
+# 訓令式・ワープロ入力の綴りをヘボン式へ寄せる（クエリ側のみ）
+_ROMAJI_SPELLINGS = {
+    "-": "",
+    "sy": "sh",
+    "ty": "ch",
+    "cy": "ch",
+    "zy": "j",
+    "jy": "j",
+    "si": "shi",
+    "ti": "chi",
+    "tu": "tsu",
+    "hu": "fu",
+    "zi": "ji",
+    "di": "ji",
+    "du": "zu",
+}
+# 1 回の走査で置換し、置換結果やヘボン式の shu / chu の hu は書き換えない
+_ROMAJI_SPELLING_PATTERN = re.compile(
+    "|".join(
+        "(?<![sc])hu" if src == "hu" else re.escape(src) for src in _ROMAJI_SPELLINGS
+    )
+)
+_ROMAJI_QUERY = re.compile(r"[a-z\-]+")
+# 長音は表記が揺れる（kyuuri / kyuri、shouyu / shoyu）ので、同じ母音の連続と ou を 1 文字に畳む
+_LONG_VOWELS = re.compile(r"([aiueo])\1+|(?<=o)u")
+
+
+def to_romaji(hiragana: str) -> str:
+    """Hepburn romaji for normalized (hiragana) text; other characters pass through."""
+
+    out: List[str] = []
+    sokuon = False
+    idx = 0
+    while idx < len(hiragana):
+        pair = hiragana[idx : idx + 2]
+        if pair in _ROMAJI:
+            romaji, idx = _ROMAJI[pair], idx + 2
+        elif hiragana[idx] == "っ":
+            sokuon, idx = True, idx + 1
+            continue
+        else:
+            romaji = _ROMAJI.get(hiragana[idx], hiragana[idx])
+            idx += 1
+        if sokuon and romaji and romaji[0] not in _VOWELS:
+            romaji = ("t" if romaji.startswith("ch") else romaji[0]) + romaji
+        sokuon = False
+        out.append(romaji)
+    return "".join(out)
+
+
+def fold_long_vowels(romaji: str) -> str:
+    """Romaji with long vowels shortened (``kyuuri`` -> ``kyuri``, ``ou`` -> ``o``)."""
+
+    return _LONG_VOWELS.sub(lambda m: m.group(1) or "", romaji)
+
+
+def _romaji_query(normalized: str) -> Optional[str]:
+    if not _ROMAJI_QUERY.fullmatch(normalized):
+        return None
+    return _ROMAJI_SPELLING_PATTERN.sub(
+        lambda m: _ROMAJI_SPELLINGS[m.group()], normalized
+    )
+
+
+def _grams(text: str) -> Set[str]:
+    if len(text) < 2:
+        return set(text)
+    return {text[idx : idx + 2] for idx in range(len(text) - 1)}
+
+
+@dataclass(frozen=True)
+class FoodEntry:
+    food_id: int
+    food_name: str
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+
+
+class FoodSearchIndex:
+    """Bigram inverted index over normalized and romaji food names."""
+
+    def __init__(self, entries: List[FoodEntry]):
+        self.entries = list(entries)
+        self._keys: List[Tuple[str, ...]] = []
+        self._postings: Dict[str, Set[int]] = {}
+        for idx, entry in enumerate(self.entries):
+            normalized = normalize_raw_text(entry.food_name)
+            romaji = to_romaji(normalized)
+            keys = (normalized,)
+            if romaji != normalized:
+                keys = tuple(
+                    dict.fromkeys((normalized, romaji, fold_long_vowels(romaji)))
+                )
+            self._keys.append(keys)
+            for key in keys:
+                # 1 文字クエリ用に単一文字も索引に入れる
+                for gram in _grams(key) | set(key):
+                    self._postings.setdefault(gram, set()).add(idx)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _candidates(self, term: str) -> Set[int]:
+        postings = sorted(
+            (self._postings.get(gram, set()) for gram in _grams(term)), key=len
+        )
+        if not postings:
+            return set()
+        return set(postings[0]).intersection(*postings[1:])
+
+    def search(self, query: str, limit: int = 20) -> List[FoodEntry]:
+        """Foods containing ``query``: exact, then prefix, then earliest match."""
+
+        normalized = normalize_raw_text(query)
+        if not normalized:
+            return []
+        terms = {normalized}
+        romaji = _romaji_query(normalized)
+        if romaji:
+            terms.update((romaji, fold_long_vowels(romaji)))
+
+        ranks: Dict[int, Tuple[int, int, int, str]] = {}
+        for term in terms:
+            for idx in self._candidates(term):
+                for key in self._keys[idx]:
+                    pos = key.find(term)
+                    if pos < 0:
+                        continue
+                    kind = 0 if key == term else 1 if pos == 0 else 2
+                    rank = (kind, pos, len(key), self.entries[idx].food_name)
+                    if idx not in ranks or rank < ranks[idx]:
+                        ranks[idx] = rank
+        best = sorted(ranks, key=ranks.__getitem__)[:limit]
+        return [self.entries[idx] for idx in best]
+
+
+_INDEX_CACHE: "weakref.WeakKeyDictionary[Any, Tuple[FoodSearchIndex, float]]" = (
+    weakref.WeakKeyDictionary()
+)
+_INDEX_LOCK = threading.Lock()
+_INVALIDATION_EPOCH = 0
+_FOODS_CHANGED_KEY = "food_search_index_dirty"
+
+
+def cached_food_search_index(bind: Any) -> Optional[FoodSearchIndex]:
+    """The loaded index for ``bind`` if still fresh; never touches the database."""
+
+    with _INDEX_LOCK:
+        cached = _INDEX_CACHE.get(canonical_bind(bind))
+    if cached is None:
+        return None
+    index, loaded_at = cached
+    if time.monotonic() - loaded_at >= FOOD_SEARCH_INDEX_TTL_SECONDS:
+        return None
+    return index
+
+
+def load_food_search_index(session: Session) -> FoodSearchIndex:
+    """Return the index for the session's database, (re)building it if stale."""
+
+    bind = canonical_bind(session.get_bind())
+    index = cached_food_search_index(bind)
+    if index is not None:
+        return index
+
+    epoch = _INVALIDATION_EPOCH
+    rows = session.execute(
+        select(
+            Food.food_id,
+            Food.food_name,
+            FoodCategory.category_id,
+            FoodCategory.category_name,
+        )
+        .join(FoodCategory, Food.category_id == FoodCategory.category_id, isouter=True)
+        .where(Food.is_trackable.is_(True))
+    ).all()
+    index = FoodSearchIndex(
+        [
+            FoodEntry(
+                food_id=int(row.food_id),
+                food_name=row.food_name,
+                category_id=row.category_id,
+                category_name=row.category_name,
+            )
+            for row in rows
+        ]
+    )
+    with _INDEX_LOCK:
+        # 読み込み中にマスタが更新された場合は次回また読み直す
+        if epoch == _INVALIDATION_EPOCH:
+            _INDEX_CACHE[bind] = (index, time.monotonic())
+    return index
+
+
+def invalidate_food_search_index(bind: Any) -> None:
+    global _INVALIDATION_EPOCH
+
+    with _INDEX_LOCK:
+        _INVALIDATION_EPOCH += 1
+        _INDEX_CACHE.pop(canonical_bind(bind), None)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_food_writes(session: Session, flush_context: Any) -> None:
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (Food, FoodCategory)):
+            session.info[_FOODS_CHANGED_KEY] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop(_FOODS_CHANGED_KEY, None):
+        invalidate_food_search_index(session.get_bind())
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(_FOODS_CHANGED_KEY, None)
@@ -0,0 +1,254 @@
+"""Set-based inventory updates shared by the bulk ingredient/receipt endpoints."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, joinedload
+
+from app.backend.models import (
+    Food,
+    IngredientStatus,
+    InventoryChangeSource,
+    UserFood,
+    UserFoodTransaction,
+)
+
+
+# (user_food, delta_g, quantity_after_g, source_reference, note)
+TransactionEntry = Tuple[UserFood, Decimal, Decimal, Optional[str], Optional[str]]
+
+
+@dataclass(frozen=True)
+class InventoryAddition:
+    food_id: int
+    quantity_g: Decimal
+    purchase_date: Optional[date] = None
+    expiration_date: Optional[date] = None
+    source_reference: Optional[str] = None
+    note: Optional[str] = None
+
+
+def _to_decimal(value: Any) -> Decimal:
+    if value is None:
+        return Decimal("0")
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _status_of(user_food: UserFood) -> IngredientStatus:
+    raw = getattr(user_food, "status")
+    return IngredientStatus(raw) if isinstance(raw, str) else raw
+
+
+def load_trackable_foods(db: Session, food_ids: Iterable[int]) -> Dict[int, Food]:
+    unique_ids = sorted(set(food_ids))
+    if not unique_ids:
+        return {}
+    foods = (
+        db.query(Food)
+        .filter(Food.food_id.in_(unique_ids), Food.is_trackable.is_(True))
+        .all()
+    )
+    return {int(getattr(food, "food_id")): food for food in foods}
+
+
+def load_active_user_foods(
+    db: Session, user_id: int, food_ids: Iterable[int]
+) -> Dict[int, UserFood]:
+    """Return the oldest non-deleted stock row per food (same pick as ``.first()``)."""
+
+    unique_ids = sorted(set(food_ids))
+    if not unique_ids:
+        return {}
+    rows = (
+        db.query(UserFood)
+        .filter(
+            UserFood.user_id == user_id,
+            UserFood.food_id.in_(unique_ids),
+            UserFood.status != IngredientStatus.DELETED,
+        )
+        .order_by(UserFood.food_id, UserFood.user_food_id)
+        .all()
+    )
+    stocks: Dict[int, UserFood] = {}
+    for row in rows:
+        stocks.setdefault(int(getattr(row, "food_id")), row)
+    return stocks
+
+
+def insert_transactions(
+    db: Session,
+    *,
+    user_id: int,
+    entries: Sequence[TransactionEntry],
+    source_type: InventoryChangeSource,
+) -> None:
+    if not entries:
+        return
+    db.execute(
+        insert(UserFoodTransaction),
+        [
+            {
+                "user_id": user_id,
+                "food_id": user_food.food_id,
+                "user_food_id": user_food.user_food_id,
+                "delta_g": delta,
+                "quantity_after_g": quantity_after,
+                "source_type": source_type,
+                "source_reference": reference,
+                "note": note,
+            }
+            for user_food, delta, quantity_after, reference, note in entries
+        ],
+    )
+
+
+def apply_inventory_additions(
+    db: Session,
+    user_id: int,
+    additions: Sequence[InventoryAddition],
+    *,
+    source_type: InventoryChangeSource,
+) -> List[Optional[UserFood]]:
+    """Upsert stock for every addition with two lookups and one bulk insert.
+
+    Returns the affected ``UserFood`` per addition (``None`` when the food does
+    not exist or is not trackable). The caller owns the commit.
+    """
+
+    food_ids = [addition.food_id for addition in additions]
+    foods = load_trackable_foods(db, food_ids)
+    stocks = load_active_user_foods(db, user_id, foods.keys())
+
+    results: List[Optional[UserFood]] = []
+    pending: List[TransactionEntry] = []
+    created: List[UserFood] = []
+    for addition in additions:
+        if addition.food_id not in foods:
+            results.append(None)
+            continue
+
+        delta = _to_decimal(addition.quantity_g)
+        user_food = stocks.get(addition.food_id)
+        if user_food is None:
+            user_food = UserFood(
+                user_id=user_id,
+                food_id=addition.food_id,
+                quantity_g=delta,
+                purchase_date=addition.purchase_date,
+                expiration_date=addition.expiration_date,
+                status=IngredientStatus.UNUSED,
+            )
+            stocks[addition.food_id] = user_food
+            created.append(user_food)
+        else:
+            updated = _to_decimal(user_food.quantity_g) + delta
+            setattr(user_food, "quantity_g", updated)
+            if addition.purchase_date:
+                setattr(user_food, "purchase_date", addition.purchase_date)
+            if addition.expiration_date:
+                setattr(user_food, "expiration_date", addition.expiration_date)
+            if (
+                updated > Decimal("0")
+                and _status_of(user_food) == IngredientStatus.USED
+            ):
+                setattr(user_food, "status", IngredientStatus.UNUSED)
+
+        pending.append(
+            (
+                user_food,
+                delta,
+                _to_decimal(user_food.quantity_g),
+                addition.source_reference,
+                addition.note,
+            )
+        )
+        results.append(user_food)
+
+    if created:
+        db.add_all(created)
+    # 新規行の user_food_id を確定させるため 1 回だけ flush する
+    db.flush()
+    insert_transactions(db, user_id=user_id, entries=pending, source_type=source_type)
+    return results
+
+
+@dataclass(frozen=True)
+class InventoryConsumption:
+    user_food_id: int
+    quantity_g: Decimal
+    note: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ConsumptionOutcome:
+    user_food: Optional[UserFood]
+    error: Optional[str] = None
+
+
+def _consume_one(
+    user_food: Optional[UserFood], consumption: InventoryConsumption
+) -> Tuple[Optional[Decimal], Optional[str]]:
+    if user_food is None:
+        return None, "食材が見つかりません。"
+    if _status_of(user_food) == IngredientStatus.DELETED:
+        return None, "削除済みの食材は更新できません。"
+    current = _to_decimal(user_food.quantity_g)
+    delta = _to_decimal(consumption.quantity_g)
+    if delta > current:
+        return None, "在庫を超える数量は指定できません。"
+    remaining = current - delta
+    setattr(user_food, "quantity_g", max(remaining, Decimal("0")))
+    setattr(user_food, "status", IngredientStatus.USED)
+    return delta, None
+
+
+def apply_inventory_consumptions(
+    db: Session,
+    user_id: int,
+    consumptions: Sequence[InventoryConsumption],
+    *,
+    source_type: InventoryChangeSource,
+) -> List[ConsumptionOutcome]:
+    """Consume stock rows in order; invalid items are reported, not raised.
+
+    All rows are fetched with one ``IN`` query (foods eagerly joined), updated in
+    memory and the transactions bulk-inserted. The caller owns the commit.
+    """
+
+    unique_ids = sorted({item.user_food_id for item in consumptions})
+    rows = (
+        db.query(UserFood)
+        .options(joinedload(UserFood.food))
+        .filter(UserFood.user_id == user_id, UserFood.user_food_id.in_(unique_ids))
+        .all()
+        if unique_ids
+        else []
+    )
+    stocks = {int(getattr(row, "user_food_id")): row for row in rows}
+
+    outcomes: List[ConsumptionOutcome] = []
+    pending: List[TransactionEntry] = []
+    for consumption in consumptions:
+        user_food = stocks.get(consumption.user_food_id)
+        delta, error = _consume_one(user_food, consumption)
+        if error is not None or user_food is None or delta is None:
+            outcomes.append(ConsumptionOutcome(user_food=None, error=error))
+            continue
+        pending.append(
+            (
+                user_food,
+                delta * Decimal("-1"),
+                _to_decimal(user_food.quantity_g),
+                None,
+                consumption.note,
+            )
+        )
+        outcomes.append(ConsumptionOutcome(user_food=user_food))
+
+    insert_transactions(db, user_id=user_id, entries=pending, source_type=source_type)
+    return outcomes
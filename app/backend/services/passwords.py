@@ -0,0 +1,91 @@
+"""Password hashing (PBKDF2-HMAC-SHA256) on a bounded dedicated thread pool.
+
+``hashlib.pbkdf2_hmac`` releases the GIL, so running it on a small private
+executor keeps the event loop and the regular request threadpool responsive
+while logins burn CPU. Hashes are stored as
+``pbkdf2_sha256$<iterations>$<salt>$<hash>``; the legacy ``<salt>$<sha256>``
+format is still accepted and reported by ``needs_rehash``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+PASSWORD_HASH_ALGORITHM = "pbkdf2_sha256"
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "600000"))
+# 同時に計算するハッシュ数の上限（= 専用スレッド数）
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=max(1, PASSWORD_HASH_WORKERS),
+                thread_name_prefix="password-hash",
+            )
+        return _EXECUTOR
+
+
+def _pbkdf2(password: str, salt: str, iterations: int) -> str:
+    return hashlib.pbkdf2_hmac(
+        "sha256", password.encode("utf-8"), salt.encode("utf-8"), iterations
+    ).hex()
+
+
+def _legacy_sha256(password: str, salt: str) -> str:
+    return hashlib.sha256((salt + password).encode("utf-8")).hexdigest()
+
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
+    rounds = iterations or PASSWORD_HASH_ITERATIONS
+    salt = secrets.token_hex(16)
+    return (
+        f"{PASSWORD_HASH_ALGORITHM}${rounds}${salt}${_pbkdf2(password, salt, rounds)}"
+    )
+
+
+def verify_password(password: str, stored: str) -> bool:
+    parts = stored.split("$")
+    if len(parts) == 4 and parts[0] == PASSWORD_HASH_ALGORITHM:
+        _, rounds, salt, expected = parts
+        if not rounds.isdigit():
+            return False
+        actual = _pbkdf2(password, salt, int(rounds))
+    elif len(parts) == 2:
+        # 旧形式: "<salt>$<sha256(salt + password)>"
+        salt, expected = parts
+        actual = _legacy_sha256(password, salt)
+    else:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def needs_rehash(stored: str) -> bool:
+    parts = stored.split("$")
+    if len(parts) != 4 or parts[0] != PASSWORD_HASH_ALGORITHM:
+        return True
+    return not parts[1].isdigit() or int(parts[1]) < PASSWORD_HASH_ITERATIONS
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor(), hash_password, password)
+
+
+async def verify_password_async(password: str, stored: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor(), verify_password, password, stored)
@@ -0,0 +1,72 @@
+"""Packed representation of the 18 boolean recipe feature flags.
+
+Bit ``i`` of ``recipes.feature_mask`` mirrors ``RECIPE_FLAG_FIELDS[i]``, so
+flag filters in SQL become a single AND/compare on one column.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Tuple, Union
+
+import numpy as np
+
+# ビット位置はこの順序で固定（並べ替えると既存の feature_mask が壊れる）
+RECIPE_FLAG_FIELDS: Tuple[str, ...] = (
+    "is_japanese",
+    "is_western",
+    "is_chinese",
+    "is_main_dish",
+    "is_side_dish",
+    "is_soup",
+    "is_dessert",
+    "type_meat",
+    "type_seafood",
+    "type_vegetarian",
+    "type_composite",
+    "type_other",
+    "flavor_sweet",
+    "flavor_spicy",
+    "flavor_salty",
+    "texture_stewed",
+    "texture_fried",
+    "texture_stir_fried",
+)
+FLAG_BITS: Dict[str, int] = {
+    name: 1 << bit for bit, name in enumerate(RECIPE_FLAG_FIELDS)
+}
+
+_BIT_VALUES = np.array([FLAG_BITS[name] for name in RECIPE_FLAG_FIELDS], np.uint32)
+
+
+def pack_flags(source: Union[Mapping[str, Any], Any]) -> int:
+    """Mask from a ``{flag: bool}`` mapping or an object with flag attributes."""
+
+    if isinstance(source, Mapping):
+        values = (source.get(name) for name in RECIPE_FLAG_FIELDS)
+    else:
+        values = (getattr(source, name, False) for name in RECIPE_FLAG_FIELDS)
+    mask = 0
+    for bit, value in zip(_BIT_VALUES.tolist(), values):
+        if value:
+            mask |= bit
+    return mask
+
+
+def mask_for(names: Iterable[str]) -> int:
+    mask = 0
+    for name in names:
+        mask |= FLAG_BITS[name]
+    return mask
+
+
+def flag_names(mask: int) -> List[str]:
+    return [name for name in RECIPE_FLAG_FIELDS if mask & FLAG_BITS[name]]
+
+
+def unpack_flags(mask: int) -> Dict[str, bool]:
+    return {name: bool(mask & FLAG_BITS[name]) for name in RECIPE_FLAG_FIELDS}
+
+
+def unpack_vectors(masks: Union[int, np.ndarray]) -> np.ndarray:
+    """0/1 float64 feature vectors (``masks`` x ``RECIPE_FLAG_FIELDS``)."""
+
+    packed = np.asarray(masks, dtype=np.uint32)
+    return ((packed[..., None] & _BIT_VALUES) != 0).astype(np.float64)
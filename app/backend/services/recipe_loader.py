@@ -4,7 +4,11 @@ from __future__ import annotations
 
 import html
 import json
+import os
 import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field, replace
 from decimal import Decimal
 from pathlib import Path
@@ -15,30 +19,17 @@ from sqlalchemy.orm import Session, joinedload
 from app.backend.database import SessionLocal
 from app.backend.models import Food
 from app.backend.models.recipe import Recipe, RecipeFood  # type: ignore[import]
+from app.backend.services.recipe_flags import RECIPE_FLAG_FIELDS
 
 RECIPES_JSON_REL_PATH = Path("data") / "recipes.json"
 RECIPE_HTML_REL_PATH = Path("data") / "recipe-list"
+RECIPE_HTML_INDEX_REL_PATH = Path("data") / "recipe-list" / ".detail-index.json"
 
-FLAG_FIELD_NAMES: Tuple[str, ...] = (
-    "is_japanese",
-    "is_western",
-    "is_chinese",
-    "is_main_dish",
-    "is_side_dish",
-    "is_soup",
-    "is_dessert",
-    "type_meat",
-    "type_seafood",
-    "type_vegetarian",
-    "type_composite",
-    "type_other",
-    "flavor_sweet",
-    "flavor_spicy",
-    "flavor_salty",
-    "texture_stewed",
-    "texture_fried",
-    "texture_stir_fried",
-)
+# 件数が少ない場合はプロセス起動コストの方が大きいため直列で解析する
+HTML_PARALLEL_THRESHOLD = int(os.getenv("RECIPE_HTML_PARALLEL_THRESHOLD", "200"))
+HTML_PARALLEL_MAX_WORKERS = int(os.getenv("RECIPE_HTML_PARALLEL_WORKERS", "4"))
+
+FLAG_FIELD_NAMES: Tuple[str, ...] = RECIPE_FLAG_FIELDS
 
 _CUISINE_KEYWORDS = {
     "is_western": [
@@ -162,6 +153,8 @@ _TEXTURE_KEYWORDS = {
 }
 
 _HTML_DETAIL_CACHE: Optional[Dict[str, Dict[str, str]]] = None
+_CATALOG_VERSION = 0
+_HTML_INDEX_VERSION = 1
 
 
 @dataclass(frozen=True)
@@ -182,6 +175,17 @@ class _RecipeRow:
     flags: Dict[str, bool] = field(default_factory=dict)
 
 
+def get_recipe_catalog_version() -> int:
+    """Monotonic counter bumped whenever the recipe master is re-synced."""
+
+    return _CATALOG_VERSION
+
+
+def _bump_catalog_version() -> None:
+    global _CATALOG_VERSION
+    _CATALOG_VERSION += 1
+
+
 def _resolve_json_path() -> Path:
     return Path(__file__).resolve().parents[3] / RECIPES_JSON_REL_PATH
 
@@ -190,6 +194,13 @@ def _resolve_recipe_html_dir() -> Path:
     return Path(__file__).resolve().parents[3] / RECIPE_HTML_REL_PATH
 
 
+def _resolve_recipe_html_index_path() -> Path:
+    override = os.getenv("RECIPE_HTML_INDEX_PATH")
+    if override:
+        return Path(override)
+    return Path(__file__).resolve().parents[3] / RECIPE_HTML_INDEX_REL_PATH
+
+
 _H1_PATTERN = re.compile(r"<h1[^>]*>(.*?)</h1>", re.IGNORECASE | re.DOTALL)
 _INGREDIENT_SECTION_PATTERN = re.compile(
     r'<div\s+class="ingredients"[^>]*>(.*?)</div>', re.IGNORECASE | re.DOTALL
@@ -397,26 +408,122 @@ def _load_html_detail_lookup() -> Dict[str, Dict[str, str]]:
         _HTML_DETAIL_CACHE = lookup
         return lookup
 
-    for html_file in sorted(directory.glob("*.html")):
-        try:
-            raw = html_file.read_text(encoding="utf-8")
-        except OSError:  # pragma: no cover - filesystem guard
-            continue
-        title = _extract_section_text(_H1_PATTERN, raw)
+    entries = _refresh_html_detail_index(directory)
+    for file_name in sorted(entries):
+        entry = entries[file_name]
+        title = entry.get("title")
         if not title:
             continue
-        ingredients_text = _extract_section_text(_INGREDIENT_SECTION_PATTERN, raw)
-        steps_text = _extract_section_text(_STEP_SECTION_PATTERN, raw)
         lookup[title] = {
-            "ingredients": ingredients_text or "",
-            "instructions": steps_text or "",
-            "file_name": html_file.name,
+            "ingredients": entry.get("ingredients") or "",
+            "instructions": entry.get("instructions") or "",
+            "file_name": file_name,
         }
 
     _HTML_DETAIL_CACHE = lookup
     return lookup
 
 
+def _refresh_html_detail_index(directory: Path) -> Dict[str, Dict[str, Any]]:
+    """Return per-file details, re-parsing only pages whose mtime/size changed."""
+
+    index_path = _resolve_recipe_html_index_path()
+    previous = _read_html_detail_index(index_path)
+    entries: Dict[str, Dict[str, Any]] = {}
+    stale: List[Path] = []
+    for html_file in sorted(directory.glob("*.html")):
+        try:
+            stat = html_file.stat()
+        except OSError:  # pragma: no cover - filesystem guard
+            continue
+        cached = previous.get(html_file.name)
+        if (
+            cached
+            and cached.get("mtime_ns") == stat.st_mtime_ns
+            and cached.get("size") == stat.st_size
+        ):
+            entries[html_file.name] = cached
+            continue
+        entries[html_file.name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        stale.append(html_file)
+
+    for file_name, detail in _extract_html_details(stale):
+        entries[file_name].update(detail)
+
+    if stale or len(entries) != len(previous):
+        _write_html_detail_index(index_path, entries)
+    return entries
+
+
+def _extract_html_details(
+    html_files: Sequence[Path],
+) -> List[Tuple[str, Dict[str, str]]]:
+    """Parse HTML pages, fanning out to a process pool for large batches."""
+
+    if len(html_files) < HTML_PARALLEL_THRESHOLD:
+        results = [_extract_html_detail(path) for path in html_files]
+    else:
+        workers = _html_worker_count()
+        chunksize = max(1, len(html_files) // (workers * 4))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(
+                    executor.map(_extract_html_detail, html_files, chunksize=chunksize)
+                )
+        except (OSError, BrokenProcessPool):  # pragma: no cover - sandboxed hosts
+            results = [_extract_html_detail(path) for path in html_files]
+    return [(path.name, detail) for path, detail in zip(html_files, results)]
+
+
+def _extract_html_detail(html_file: Path) -> Dict[str, str]:
+    try:
+        raw = html_file.read_text(encoding="utf-8")
+    except OSError:  # pragma: no cover - filesystem guard
+        return {}
+    title = _extract_section_text(_H1_PATTERN, raw)
+    if not title:
+        return {}
+    return {
+        "title": title,
+        "ingredients": _extract_section_text(_INGREDIENT_SECTION_PATTERN, raw) or "",
+        "instructions": _extract_section_text(_STEP_SECTION_PATTERN, raw) or "",
+    }
+
+
+def _html_worker_count() -> int:
+    return max(1, min(HTML_PARALLEL_MAX_WORKERS, os.cpu_count() or 1))
+
+
+def _read_html_detail_index(path: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        with path.open(encoding="utf-8") as fp:
+            payload = json.load(fp)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(payload, dict) or payload.get("version") != _HTML_INDEX_VERSION:
+        return {}
+    files = payload.get("files")
+    if not isinstance(files, dict):
+        return {}
+    return {
+        str(name): entry for name, entry in files.items() if isinstance(entry, dict)
+    }
+
+
+def _write_html_detail_index(path: Path, entries: Dict[str, Dict[str, Any]]) -> None:
+    payload = {"version": _HTML_INDEX_VERSION, "files": entries}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent)
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as fp:
+            json.dump(payload, fp, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_name, path)
+    except OSError:  # pragma: no cover - read-only deployments
+        return
+
+
 def _extract_section_text(pattern: re.Pattern[str], raw_html: str) -> Optional[str]:
     match = pattern.search(raw_html)
     if not match:
@@ -597,6 +704,7 @@ def sync_recipe_master() -> None:
             _sync_recipe_foods(session, recipe, mapped_ingredients)
 
         session.commit()
+    _bump_catalog_version()
 
 
 def _apply_recipe_metadata(recipe: Recipe, row: _RecipeRow) -> None:
@@ -0,0 +1,478 @@
+"""Nightly multi-user recommendation run.
+
+The catalog is loaded once and turned into matrices (a CSR recipe x food
+requirement matrix and a normalized recipe x feature matrix). Users with stock
+are streamed from the database in chunks; each chunk is scored as a handful of
+matrix operations, optionally across a process pool, and the top-K results per
+user are appended to a JSONL file. Scoring mirrors ``RecipeProposer``.
+
+    python -m app.backend.services.recommendation.batch --output recs.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from app.backend.database import SessionLocal
+from app.backend.models import IngredientStatus, UserFood, UserRecipeHistory
+
+from .data_source import FEATURE_DIMENSIONS, RecipeDataSource
+from .proposer_logic import SEASONING_NAMES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 10
+DEFAULT_CHUNK_SIZE = 256
+HISTORY_LIMIT = 200
+
+WEIGHT_INVENTORY = 0.7
+WEIGHT_PREFERENCE = 0.3
+MIN_COVERAGE_THRESHOLD = 0.2
+EXPIRATION_BOOST_DAYS = 3
+EXPIRATION_BONUS_FACTOR = 0.1
+# 充足率計算の作業配列（ユーザー数 x 必要量の非ゼロ要素数）の上限バイト数
+BATCH_COVERAGE_WORK_BYTES = int(
+    os.getenv("BATCH_COVERAGE_WORK_BYTES", str(64 * 1024 * 1024))
+)
+
+
+@dataclass(frozen=True)
+class BatchCatalog:
+    recipe_ids: np.ndarray
+    recipe_names: Tuple[str, ...]
+    # recipes x foods、調味料を除いた必要量 (g)
+    requirements: sparse.csr_matrix
+    total_required: np.ndarray
+    # recipes x FEATURE_DIMENSIONS、行ごとに L2 正規化済み
+    features: np.ndarray
+    # 時間・カロリー・アレルギー条件を満たすレシピ
+    eligible: np.ndarray
+    food_columns: Dict[int, int]
+
+
+@dataclass(frozen=True)
+class UserChunk:
+    user_ids: np.ndarray
+    # users x foods (catalog の列順)
+    stock: np.ndarray
+    expiring: np.ndarray
+    # users x FEATURE_DIMENSIONS
+    profiles: np.ndarray
+
+
+@dataclass(frozen=True)
+class BatchSummary:
+    users: int
+    output_path: Path
+    elapsed_seconds: float
+
+
+def build_batch_catalog(
+    source: RecipeDataSource,
+    *,
+    max_time: Optional[int] = None,
+    max_calories: Optional[int] = None,
+    allergies: Sequence[str] = (),
+) -> BatchCatalog:
+    recipes = source.load_and_vectorize_recipes()
+    name_to_id = {name: fid for fid, name in source.food_names.items()}
+    seasoning_ids = {name_to_id[n] for n in SEASONING_NAMES if n in name_to_id}
+    allergy_ids = {name_to_id[n] for n in allergies if n in name_to_id}
+
+    food_columns: Dict[int, int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    amounts: List[float] = []
+    eligible = np.ones(len(recipes), dtype=bool)
+    for row, recipe in enumerate(recipes):
+        if max_time is not None and recipe.prep_time > max_time:
+            eligible[row] = False
+        if max_calories is not None and recipe.calories > max_calories:
+            eligible[row] = False
+        if allergy_ids.intersection(recipe.required_qty):
+            eligible[row] = False
+        for food_id, quantity in recipe.required_qty.items():
+            if food_id in seasoning_ids:
+                continue
+            column = food_columns.setdefault(food_id, len(food_columns))
+            rows.append(row)
+            cols.append(column)
+            amounts.append(quantity)
+
+    requirements = sparse.csr_matrix(
+        (amounts, (rows, cols)),
+        shape=(len(recipes), max(len(food_columns), 1)),
+        dtype=np.float64,
+    )
+    requirements.sum_duplicates()
+    requirements.sort_indices()
+
+    features = np.vstack(
+        [recipe.feature_vector for recipe in recipes]
+        or [np.zeros(len(FEATURE_DIMENSIONS))]
+    )[: len(recipes)]
+    return BatchCatalog(
+        recipe_ids=np.array([recipe.id for recipe in recipes], dtype=np.int64),
+        recipe_names=tuple(recipe.name for recipe in recipes),
+        requirements=requirements,
+        total_required=np.asarray(requirements.sum(axis=1)).ravel(),
+        features=_normalize_rows(features),
+        eligible=eligible,
+        food_columns=food_columns,
+    )
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _coverage_block_rows(nnz: int, work_bytes: int = BATCH_COVERAGE_WORK_BYTES) -> int:
+    """Users per block so a users x ``nnz`` float64 array fits in ``work_bytes``."""
+
+    return max(1, work_bytes // max(nnz * 8, 1))
+
+
+def _covered_quantities(
+    requirements: sparse.csr_matrix, stock: np.ndarray, work_bytes: int
+) -> np.ndarray:
+    """``sum(min(stock, required))`` per user x recipe, in bounded user blocks."""
+
+    covered = np.zeros((stock.shape[0], requirements.shape[0]))
+    nonempty = np.diff(requirements.indptr) > 0
+    if not nonempty.any():
+        return covered
+    # 空のレシピ行を除けば、各開始位置から次の開始位置までがちょうど 1 レシピ分
+    starts = requirements.indptr[:-1][nonempty]
+    step = max(
+        1, min(_coverage_block_rows(requirements.nnz, work_bytes), stock.shape[0])
+    )
+    indices = requirements.indices.astype(np.intp)
+    # 作業配列は 1 つだけ確保してブロック間で使い回す
+    buffer = np.empty((step, requirements.nnz))
+    for lo in range(0, stock.shape[0], step):
+        block = stock[lo : lo + step]
+        gathered = buffer[: block.shape[0]]
+        # mode="raise" だと out がもう一つバッファされるので clip（添字は常に範囲内）
+        np.take(block, indices, axis=1, out=gathered, mode="clip")
+        np.maximum(gathered, 0.0, out=gathered)
+        np.minimum(gathered, requirements.data, out=gathered)
+        covered[lo : lo + step, nonempty] = np.add.reduceat(gathered, starts, axis=1)
+    return covered
+
+
+def score_user_chunk(
+    catalog: BatchCatalog,
+    chunk: UserChunk,
+    top_k: int = DEFAULT_TOP_K,
+    work_bytes: int = BATCH_COVERAGE_WORK_BYTES,
+) -> List[Dict[str, Any]]:
+    """Score every user in the chunk against every recipe and keep the top-K."""
+
+    n_users = chunk.user_ids.size
+    n_recipes = catalog.recipe_ids.size
+    if not n_users or not n_recipes:
+        return [{"user_id": int(uid), "recommendations": []} for uid in chunk.user_ids]
+
+    req = catalog.requirements
+    covered = _covered_quantities(req, chunk.stock, work_bytes)
+    coverage = np.divide(
+        covered,
+        catalog.total_required,
+        out=np.zeros_like(covered),
+        where=catalog.total_required > 0,
+    )
+
+    preference = _normalize_rows(chunk.profiles) @ catalog.features.T
+
+    presence = req.copy()
+    presence.data = np.ones_like(presence.data)
+    boosted = np.asarray(presence @ chunk.expiring.T.astype(np.float64)).T > 0
+
+    scores = (coverage * WEIGHT_INVENTORY + preference * WEIGHT_PREFERENCE) * (
+        1 + EXPIRATION_BONUS_FACTOR * boosted
+    )
+    valid = (coverage >= MIN_COVERAGE_THRESHOLD) & catalog.eligible
+    scores = np.where(valid, scores, -np.inf)
+
+    k = min(top_k, n_recipes)
+    results: List[Dict[str, Any]] = []
+    for row, user_id in enumerate(chunk.user_ids):
+        row_scores = scores[row]
+        if k < n_recipes:
+            candidates = np.argpartition(-row_scores, k - 1)[:k]
+        else:
+            candidates = np.arange(n_recipes)
+        order = candidates[np.argsort(-row_scores[candidates], kind="stable")]
+        recommendations = [
+            {
+                "recipe_id": int(catalog.recipe_ids[col]),
+                "recipe_name": catalog.recipe_names[col],
+                "final_score": float(row_scores[col]),
+                "coverage_score": float(coverage[row, col]),
+                "preference_score": float(preference[row, col]),
+                "is_boosted": bool(boosted[row, col]),
+            }
+            for col in order
+            if np.isfinite(row_scores[col])
+        ]
+        results.append({"user_id": int(user_id), "recommendations": recommendations})
+    return results
+
+
+def iter_user_chunks(
+    session: Session,
+    catalog: BatchCatalog,
+    source: RecipeDataSource,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    today: Optional[date] = None,
+) -> Iterator[UserChunk]:
+    """Yield users with stock in user_id order, one keyset page at a time."""
+
+    today_ordinal = (today or date.today()).toordinal()
+    last_user_id = 0
+    while True:
+        user_ids = [
+            int(uid)
+            for (uid,) in session.query(UserFood.user_id)
+            .filter(
+                UserFood.user_id > last_user_id,
+                UserFood.status != IngredientStatus.DELETED,
+            )
+            .distinct()
+            .order_by(UserFood.user_id)
+            .limit(chunk_size)
+        ]
+        if not user_ids:
+            return
+        last_user_id = user_ids[-1]
+        yield _load_chunk(session, catalog, source, user_ids, today_ordinal)
+
+
+def _load_chunk(
+    session: Session,
+    catalog: BatchCatalog,
+    source: RecipeDataSource,
+    user_ids: List[int],
+    today_ordinal: int,
+) -> UserChunk:
+    row_of = {user_id: row for row, user_id in enumerate(user_ids)}
+    n_foods = catalog.requirements.shape[1]
+    stock = np.zeros((len(user_ids), n_foods))
+    expiry_positive = np.zeros((len(user_ids), n_foods), dtype=bool)
+
+    inventory_rows = (
+        session.query(
+            UserFood.user_id,
+            UserFood.food_id,
+            UserFood.quantity_g,
+            UserFood.expiration_date,
+        )
+        .filter(
+            UserFood.user_id.in_(user_ids),
+            UserFood.status != IngredientStatus.DELETED,
+        )
+        .all()
+    )
+    deadline = today_ordinal + EXPIRATION_BOOST_DAYS
+    for user_id, food_id, quantity, expiry in inventory_rows:
+        column = catalog.food_columns.get(int(food_id))
+        if column is None:
+            continue
+        row = row_of[int(user_id)]
+        stock[row, column] += float(quantity or 0)
+        if expiry and today_ordinal <= expiry.toordinal() <= deadline:
+            expiry_positive[row, column] = True
+    expiring = expiry_positive & (stock > 0)
+
+    return UserChunk(
+        user_ids=np.array(user_ids, dtype=np.int64),
+        stock=stock,
+        expiring=expiring,
+        profiles=_load_profiles(session, source, user_ids),
+    )
+
+
+def _load_profiles(
+    session: Session, source: RecipeDataSource, user_ids: List[int]
+) -> np.ndarray:
+    history_rows = (
+        session.query(
+            UserRecipeHistory.user_id,
+            UserRecipeHistory.recipe_id,
+            UserRecipeHistory.cooked_at,
+            UserRecipeHistory.servings,
+        )
+        .filter(UserRecipeHistory.user_id.in_(user_ids))
+        .order_by(UserRecipeHistory.user_id, UserRecipeHistory.cooked_at.desc())
+        .all()
+    )
+    per_user: Dict[int, List[Tuple[int, Optional[datetime], Optional[float]]]] = {}
+    for user_id, recipe_id, cooked_at, servings in history_rows:
+        items = per_user.setdefault(int(user_id), [])
+        if len(items) < HISTORY_LIMIT:
+            servings_value = float(servings) if servings is not None else None
+            items.append((int(recipe_id), cooked_at, servings_value))
+
+    return np.vstack(
+        [
+            source.build_profile_vector_from_history(per_user.get(user_id, []))
+            for user_id in user_ids
+        ]
+    )
+
+
+_WORKER_CATALOG: Optional[BatchCatalog] = None
+
+
+def _init_worker(catalog: BatchCatalog) -> None:
+    global _WORKER_CATALOG
+    _WORKER_CATALOG = catalog
+
+
+def _score_in_worker(chunk: UserChunk, top_k: int) -> List[Dict[str, Any]]:
+    assert _WORKER_CATALOG is not None, "worker not initialised"
+    return score_user_chunk(_WORKER_CATALOG, chunk, top_k)
+
+
+def _write_results(fp, results: List[Dict[str, Any]], generated_at: str) -> int:
+    for entry in results:
+        entry["generated_at"] = generated_at
+        fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return len(results)
+
+
+def run_batch_recommendations(
+    output_path: Path,
+    *,
+    session_factory: Callable[[], Session] = SessionLocal,
+    top_k: int = DEFAULT_TOP_K,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    max_time: Optional[int] = None,
+    max_calories: Optional[int] = None,
+    allergies: Sequence[str] = (),
+    today: Optional[date] = None,
+) -> BatchSummary:
+    """Compute top-K recipes for every user with stock and write them as JSONL.
+
+    ``workers`` <= 1 scores chunks in-process; otherwise chunks are scored in a
+    process pool while the next chunks are loaded from the database.
+    """
+
+    started = time.perf_counter()
+    generated_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    worker_count = workers if workers is not None else (os.cpu_count() or 1)
+
+    session = session_factory()
+    written = 0
+    try:
+        source = RecipeDataSource(db_session=session)
+        catalog = build_batch_catalog(
+            source, max_time=max_time, max_calories=max_calories, allergies=allergies
+        )
+        chunks = iter_user_chunks(
+            session, catalog, source, chunk_size=chunk_size, today=today
+        )
+        with output_path.open("w", encoding="utf-8") as fp:
+            if worker_count <= 1:
+                for chunk in chunks:
+                    results = score_user_chunk(catalog, chunk, top_k)
+                    written += _write_results(fp, results, generated_at)
+            else:
+                written = _run_in_pool(
+                    fp, catalog, chunks, top_k, worker_count, generated_at
+                )
+    finally:
+        session.close()
+
+    elapsed = time.perf_counter() - started
+    logger.info("Batch recommendations for %d users in %.1fs", written, elapsed)
+    return BatchSummary(users=written, output_path=output_path, elapsed_seconds=elapsed)
+
+
+def _run_in_pool(
+    fp,
+    catalog: BatchCatalog,
+    chunks: Iterator[UserChunk],
+    top_k: int,
+    worker_count: int,
+    generated_at: str,
+) -> int:
+    written = 0
+    # 読み込みが先行しすぎないよう、実行中のチャンク数をワーカー数の 2 倍までに抑える
+    in_flight: Deque[Future] = deque()
+    with ProcessPoolExecutor(
+        max_workers=worker_count, initializer=_init_worker, initargs=(catalog,)
+    ) as executor:
+        for chunk in chunks:
+            in_flight.append(executor.submit(_score_in_worker, chunk, top_k))
+            if len(in_flight) >= worker_count * 2:
+                written += _write_results(
+                    fp, in_flight.popleft().result(), generated_at
+                )
+        while in_flight:
+            written += _write_results(fp, in_flight.popleft().result(), generated_at)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="全ユーザー分のレシピ推薦を一括計算する"
+    )
+    parser.add_argument("--output", type=Path, required=True, help="出力先 JSONL")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="プロセス数 (既定: CPU 数)"
+    )
+    parser.add_argument("--max-time", type=int, default=None)
+    parser.add_argument("--max-calories", type=int, default=None)
+    parser.add_argument("--allergy", action="append", default=[])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    summary = run_batch_recommendations(
+        args.output,
+        top_k=args.top_k,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        max_time=args.max_time,
+        max_calories=args.max_calories,
+        allergies=args.allergy,
+    )
+    print(
+        f"{summary.users} users -> {summary.output_path} "
+        f"({summary.elapsed_seconds:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
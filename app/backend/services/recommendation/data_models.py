@@ -12,10 +12,17 @@ UserParameters = namedtuple("UserParameters", ["max_time", "max_calories", "alle
 class Ingredient:
     """現在の在庫アイテム（データベースから取得）"""
 
-    def __init__(self, name: str, quantity: float, expiration_date=None):
+    def __init__(
+        self,
+        name: str,
+        quantity: float,
+        expiration_date=None,
+        food_id: Optional[int] = None,
+    ):
         self.name = name
         self.quantity = quantity  # 単位はグラム(g)に統一
         self.expiration_date = expiration_date
+        self.food_id = food_id  # 未指定の場合は食材名から解決する
 
 
 # レシピの定義
@@ -26,19 +33,26 @@ class Recipe:
         self,
         id: int,
         name: str,
-        req_qty: Dict[str, float],
+        req_qty: Dict[int, float],
         prep_time: int,
         calories: int,
         feature_vector: np.ndarray,
         image_url: Optional[str] = None,
+        feature_mask: int = 0,
     ):
         self.id = id
         self.name = name
-        self.required_qty = req_qty  # {'食材名': 必要量(g)}
+        self.required_qty = req_qty  # {food_id: 必要量(g)}
+        # 在庫配列をそのまま添字参照できるよう food_id / 必要量を配列でも保持する
+        self.food_ids = np.fromiter(req_qty.keys(), dtype=np.int64, count=len(req_qty))
+        self.amounts = np.fromiter(
+            req_qty.values(), dtype=np.float64, count=len(req_qty)
+        )
         self.prep_time = prep_time  # 調理時間（分）
         self.calories = calories  # カロリー（kcal）
         self.feature_vector = feature_vector  # コサイン類似度計算用の特徴ベクトル
         self.image_url = image_url
+        self.feature_mask = feature_mask  # フラグのビット表現（recipe_flags 参照）
 
 
 class RecommendationRequest(BaseModel):
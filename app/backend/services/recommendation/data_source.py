@@ -2,10 +2,10 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
 from app.backend.database import SessionLocal
-from app.backend.models import Food, IngredientStatus, UserFood, UserRecipeHistory
+from app.backend.models import Food, UserRecipeHistory
 from app.backend.models import (
     Recipe as RecipeModel,  # type: ignore[attr-defined]
 )
@@ -13,29 +13,12 @@ from app.backend.models import (
     RecipeFood as RecipeFoodModel,  # type: ignore[attr-defined]
 )
 
+from ..recipe_flags import RECIPE_FLAG_FIELDS, unpack_vectors
 from .data_models import Ingredient, Recipe
+from .inventory_snapshot import InventorySnapshot, get_inventory_snapshot
 
 # レシピ特徴ベクトルの次元定義 (18次元)
-FEATURE_DIMENSIONS = [
-    "is_japanese",
-    "is_western",
-    "is_chinese",
-    "is_main_dish",
-    "is_side_dish",
-    "is_soup",
-    "is_dessert",
-    "type_meat",
-    "type_seafood",
-    "type_vegetarian",
-    "type_composite",
-    "type_other",
-    "flavor_sweet",
-    "flavor_spicy",
-    "flavor_salty",
-    "texture_stewed",
-    "texture_fried",
-    "texture_stir_fried",
-]
+FEATURE_DIMENSIONS = list(RECIPE_FLAG_FIELDS)
 
 
 class RecipeDataSource:
@@ -44,51 +27,67 @@ class RecipeDataSource:
     def __init__(self, db_session: Optional[Session] = None):
         self.session = db_session
         self._recipe_vector_map: Dict[int, np.ndarray] = {}
+        # food_id -> 食材名。提案結果の表示用にのみ使う
+        self.food_names: Dict[int, str] = {}
 
     def _ensure_recipe_vectors(self) -> None:
         if not self._recipe_vector_map:
             self.load_and_vectorize_recipes()
 
     def load_and_vectorize_recipes(self) -> List[Recipe]:
+        # ORM オブジェクトを組み立てず、必要な列だけを 3 本のクエリで読む
         session = self.session or SessionLocal()
         should_close = self.session is None
         try:
-            recipes_query = (
-                session.query(RecipeModel)
-                .options(
-                    joinedload(RecipeModel.recipe_foods).joinedload(
-                        RecipeFoodModel.food
-                    )
+            recipe_rows = (
+                session.query(
+                    RecipeModel.recipe_id,
+                    RecipeModel.recipe_name,
+                    RecipeModel.cooking_time,
+                    RecipeModel.calories,
+                    RecipeModel.image_url,
+                    RecipeModel.feature_mask,
                 )
+                .order_by(RecipeModel.recipe_id)
                 .all()
             )
+            requirement_rows = session.query(
+                RecipeFoodModel.recipe_id,
+                RecipeFoodModel.food_id,
+                RecipeFoodModel.quantity_g,
+            ).all()
+            self.food_names = {
+                int(food_id): str(name)
+                for food_id, name in session.query(Food.food_id, Food.food_name)
+                if food_id is not None and name is not None
+            }
         finally:
             if should_close:
                 session.close()
 
+        requirements: Dict[int, Dict[int, float]] = {}
+        for recipe_id, food_id, quantity in requirement_rows:
+            if recipe_id is None or food_id is None or food_id not in self.food_names:
+                continue
+            req_qty = requirements.setdefault(int(recipe_id), {})
+            req_qty[int(food_id)] = req_qty.get(int(food_id), 0.0) + float(
+                quantity or 0
+            )
+
+        # 18 個のフラグ列ではなくビットマスク 1 列を読み、まとめて 0/1 ベクトルへ展開する
+        vectors = unpack_vectors([row[5] or 0 for row in recipe_rows])
         recipes: List[Recipe] = []
-        for record in recipes_query:
-            req_qty: Dict[str, float] = {}
-            for rf in getattr(record, "recipe_foods", []) or []:
-                food = getattr(rf, "food", None)
-                name = getattr(food, "food_name", None)
-                if not isinstance(name, str):
-                    continue
-                quantity = getattr(rf, "quantity_g", 0) or 0
-                req_qty[name] = float(quantity)
-
-            vector = np.zeros(len(FEATURE_DIMENSIONS), dtype=np.float64)
-            for idx, field in enumerate(FEATURE_DIMENSIONS):
-                if bool(getattr(record, field, False)):
-                    vector[idx] = 1.0
+        for row, vector in zip(recipe_rows, vectors):
+            recipe_id, name, cooking_time, calories, image_url, feature_mask = row
             recipe_obj = Recipe(
-                id=getattr(record, "recipe_id"),
-                name=getattr(record, "recipe_name", ""),
-                prep_time=getattr(record, "cooking_time", None) or 30,
-                calories=getattr(record, "calories", None) or 0,
-                req_qty=req_qty,
+                id=recipe_id,
+                name=name or "",
+                prep_time=cooking_time or 30,
+                calories=calories or 0,
+                req_qty=requirements.get(recipe_id, {}),
                 feature_vector=vector,
-                image_url=getattr(record, "image_url", None),
+                image_url=image_url,
+                feature_mask=feature_mask or 0,
             )
             recipes.append(recipe_obj)
             if isinstance(recipe_obj.id, int):
@@ -166,6 +165,12 @@ class RecipeDataSource:
                     servings_float = None
             history_items.append((rid, cooked_at, servings_float))
 
+        return self.build_profile_vector_from_history(history_items)
+
+    def build_profile_vector_from_history(
+        self, history_items: Sequence[Tuple[int, Optional[datetime], Optional[float]]]
+    ) -> np.ndarray:
+        self._ensure_recipe_vectors()
         return self._build_vector_from_history_items(
             history_items, self._recipe_vector_map
         )
@@ -262,37 +267,19 @@ class RecipeDataSource:
 
 
 class InventoryManager:
-    """データベースの在庫を直接参照して Ingredient リストを構築する"""
+    """在庫スナップショット (inventory_snapshot) から Ingredient リストを構築する"""
 
     def __init__(self, db_session: Optional[Session] = None):
         self.session = db_session
 
-    def get_current_inventory(self, user_id: int = 1) -> List[Ingredient]:
+    def get_snapshot(self, user_id: int = 1) -> InventorySnapshot:
         session = self.session or SessionLocal()
         should_close = self.session is None
         try:
-            inventory = (
-                session.query(UserFood)
-                .join(Food)
-                .filter(
-                    UserFood.user_id == user_id,
-                    UserFood.status != IngredientStatus.DELETED,
-                )
-                .all()
-            )
+            return get_inventory_snapshot(session, user_id)
         finally:
             if should_close:
                 session.close()
 
-        items: List[Ingredient] = []
-        for record in inventory:
-            food = getattr(record, "food", None)
-            name = getattr(food, "food_name", None)
-            if not isinstance(name, str):
-                continue
-            quantity = getattr(record, "quantity_g", 0) or 0
-            expiry = getattr(record, "expiration_date", None)
-            items.append(
-                Ingredient(name=name, quantity=float(quantity), expiration_date=expiry)
-            )
-        return items
+    def get_current_inventory(self, user_id: int = 1) -> List[Ingredient]:
+        return self.get_snapshot(user_id).to_ingredients()
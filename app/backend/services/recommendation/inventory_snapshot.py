@@ -0,0 +1,225 @@
+"""Compact per-user inventory snapshots kept in sync with ``user_foods`` writes.
+
+A snapshot is a set of food_id-sorted NumPy arrays (quantity, expiry ordinal)
+built from a single column query, so readers never hydrate ``UserFood`` ORM
+objects. Snapshots are cached per engine and user, and dropped whenever a
+session commits (or rolls back) a change touching that user's ``UserFood`` rows.
+A short TTL bounds staleness for writes made by other processes.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.backend.database import canonical_bind
+from app.backend.models import Food, IngredientStatus, UserFood
+
+from .data_models import Ingredient
+
+INVENTORY_SNAPSHOT_TTL_SECONDS = float(
+    os.getenv("INVENTORY_SNAPSHOT_TTL_SECONDS", "60")
+)
+INVENTORY_SNAPSHOT_CACHE_SIZE = 1024
+# expiry_ordinals でこの値は「賞味期限なし」を表す
+NO_EXPIRY = 0
+
+_DIRTY_USERS_KEY = "inventory_snapshot_dirty_users"
+_VERSION_COUNTER = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class InventorySnapshot:
+    user_id: int
+    version: int
+    food_ids: np.ndarray
+    quantities: np.ndarray
+    expiry_ordinals: np.ndarray
+    names: Tuple[str, ...]
+
+    def __len__(self) -> int:
+        return int(self.food_ids.size)
+
+    def positions(self, food_ids: Iterable[int]) -> np.ndarray:
+        """Index of each food_id in the arrays, ``-1`` where not in stock."""
+
+        query = np.fromiter(food_ids, dtype=np.int64)
+        if not self.food_ids.size or not query.size:
+            return np.full(query.shape, -1, dtype=np.int64)
+        idx = np.searchsorted(self.food_ids, query)
+        idx = np.minimum(idx, self.food_ids.size - 1)
+        return np.where(self.food_ids[idx] == query, idx, -1)
+
+    def quantities_for(self, food_ids: Iterable[int]) -> Dict[int, float]:
+        ids = list(food_ids)
+        positions = self.positions(ids)
+        return {
+            food_id: float(self.quantities[pos])
+            for food_id, pos in zip(ids, positions)
+            if pos >= 0
+        }
+
+    def expiry_of(self, position: int) -> Optional[date]:
+        ordinal = int(self.expiry_ordinals[position])
+        return date.fromordinal(ordinal) if ordinal != NO_EXPIRY else None
+
+    def to_ingredients(self) -> List[Ingredient]:
+        return [
+            Ingredient(
+                name=self.names[pos],
+                quantity=float(self.quantities[pos]),
+                expiration_date=self.expiry_of(pos),
+                food_id=int(self.food_ids[pos]),
+            )
+            for pos in range(len(self))
+        ]
+
+
+@dataclass(frozen=True)
+class _CachedSnapshot:
+    snapshot: InventorySnapshot
+    loaded_at: float
+
+
+_SNAPSHOT_CACHE: weakref.WeakKeyDictionary[Any, OrderedDict[int, _CachedSnapshot]] = (
+    weakref.WeakKeyDictionary()
+)
+_SNAPSHOT_LOCK = threading.Lock()
+_INVALIDATION_EPOCH = 0
+
+
+def build_inventory_snapshot(session: Session, user_id: int) -> InventorySnapshot:
+    rows = (
+        session.query(
+            UserFood.food_id,
+            Food.food_name,
+            UserFood.quantity_g,
+            UserFood.expiration_date,
+        )
+        .join(Food, Food.food_id == UserFood.food_id)
+        .filter(
+            UserFood.user_id == user_id,
+            UserFood.status != IngredientStatus.DELETED,
+        )
+        .all()
+    )
+
+    # 同じ食材の在庫行が複数ある場合は数量を合算し、最も早い期限を採用する
+    merged: Dict[int, Tuple[str, float, int]] = {}
+    for food_id, name, quantity, expiry in rows:
+        if food_id is None or not isinstance(name, str):
+            continue
+        amount = float(quantity or 0)
+        ordinal = expiry.toordinal() if expiry else NO_EXPIRY
+        previous = merged.get(int(food_id))
+        if previous is not None:
+            _, prev_amount, prev_ordinal = previous
+            amount += prev_amount
+            if prev_ordinal != NO_EXPIRY and (
+                ordinal == NO_EXPIRY or prev_ordinal < ordinal
+            ):
+                ordinal = prev_ordinal
+        merged[int(food_id)] = (name, amount, ordinal)
+
+    ordered = sorted(merged.items())
+    return InventorySnapshot(
+        user_id=user_id,
+        version=next(_VERSION_COUNTER),
+        food_ids=np.array([fid for fid, _ in ordered], dtype=np.int64),
+        quantities=np.array([entry[1] for _, entry in ordered], dtype=np.float64),
+        expiry_ordinals=np.array([entry[2] for _, entry in ordered], dtype=np.int64),
+        names=tuple(entry[0] for _, entry in ordered),
+    )
+
+
+def get_inventory_snapshot(session: Session, user_id: int) -> InventorySnapshot:
+    # 未コミットの変更を含むセッションでは共有キャッシュを読まず・書かない
+    if user_id in session.info.get(_DIRTY_USERS_KEY, ()):
+        return build_inventory_snapshot(session, user_id)
+
+    bind = canonical_bind(session.get_bind())
+    now = time.monotonic()
+    with _SNAPSHOT_LOCK:
+        epoch = _INVALIDATION_EPOCH
+        per_bind = _SNAPSHOT_CACHE.get(bind)
+        if per_bind is not None:
+            cached = per_bind.get(user_id)
+            if (
+                cached is not None
+                and now - cached.loaded_at < INVENTORY_SNAPSHOT_TTL_SECONDS
+            ):
+                per_bind.move_to_end(user_id)
+                return cached.snapshot
+
+    snapshot = build_inventory_snapshot(session, user_id)
+    with _SNAPSHOT_LOCK:
+        # 読み込み中に無効化が走った場合、古い内容をキャッシュに戻さない
+        if epoch != _INVALIDATION_EPOCH:
+            return snapshot
+        per_bind = _SNAPSHOT_CACHE.setdefault(bind, OrderedDict())
+        per_bind[user_id] = _CachedSnapshot(snapshot=snapshot, loaded_at=now)
+        per_bind.move_to_end(user_id)
+        while len(per_bind) > INVENTORY_SNAPSHOT_CACHE_SIZE:
+            per_bind.popitem(last=False)
+    return snapshot
+
+
+def invalidate_inventory_snapshot(bind: Any, user_ids: Iterable[int]) -> None:
+    global _INVALIDATION_EPOCH
+
+    with _SNAPSHOT_LOCK:
+        _INVALIDATION_EPOCH += 1
+        per_bind = _SNAPSHOT_CACHE.get(bind)
+        if per_bind is None:
+            return
+        for user_id in user_ids:
+            per_bind.pop(user_id, None)
+
+
+def _touched_user_ids(session: Session) -> Set[int]:
+    user_ids: Set[int] = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, UserFood):
+            user_id = getattr(obj, "user_id", None)
+            if user_id is not None:
+                user_ids.add(int(user_id))
+    return user_ids
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_inventory_writes(session: Session, flush_context: Any) -> None:
+    touched = _touched_user_ids(session)
+    if touched:
+        session.info.setdefault(_DIRTY_USERS_KEY, set()).update(touched)
+
+
+def _drop_dirty_snapshots(session: Session) -> None:
+    dirty = session.info.pop(_DIRTY_USERS_KEY, None)
+    if not dirty:
+        return
+    try:
+        bind = canonical_bind(session.get_bind())
+    except Exception:  # pragma: no cover - unbound session
+        return
+    invalidate_inventory_snapshot(bind, dirty)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    _drop_dirty_snapshots(session)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _invalidate_after_rollback(session: Session, previous_transaction: Any) -> None:
+    _drop_dirty_snapshots(session)
@@ -1,24 +1,70 @@
-from datetime import date, timedelta
-from typing import Dict, List, Set, Tuple
+from datetime import date
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
 
 import numpy as np
+from scipy import sparse
 
 from .data_models import Ingredient, Recipe, UserParameters
 from .data_source import FEATURE_DIMENSIONS
+from .inventory_snapshot import NO_EXPIRY, InventorySnapshot
+from .vector_index import VectorIndex, recipe_vector_index
+
+SEASONING_NAMES = frozenset(
+    {
+        "醤油",
+        "塩",
+        "砂糖",
+        "みりん",
+        "酒",
+        "料理酒",
+        "胡椒",
+        "こしょう",
+        "ごま油",
+        "オリーブオイル",
+        "酢",
+        "味噌",
+        "だし",
+        "鶏ガラスープの素",
+        "片栗粉",
+        "小麦粉",
+        "豆板醤",
+        "ケチャップ",
+        "ソース",
+        "バター",
+        "マヨネーズ",
+        "白ごま",
+        "すりごま",
+        "カレールウ",
+        "ケチャップ・ソース",
+        "揚げ油",
+        "水",
+    }
+)
 
 
 class RecipeProposer:
+    """food_id をキーに在庫とレシピを突き合わせてスコアリングする。
+
+    在庫・調味料・期限は food_id を添字とする密な配列に展開しておき、
+    食材名は最終的な提案ペイロードを組み立てるときだけ ``food_names`` から引く。
+    """
+
     def __init__(
         self,
         all_recipes: List[Recipe],
-        user_inventory: List[Ingredient],
+        user_inventory: Union[List[Ingredient], InventorySnapshot],
         user_profile_vector: np.ndarray,
+        food_names: Optional[Mapping[int, str]] = None,
+        candidate_limit: Optional[int] = None,
+        vector_index: Optional[VectorIndex] = None,
     ) -> None:
         self.all_recipes = all_recipes
-        self.inventory_dict = {
-            ingredient.name: (ingredient.quantity, ingredient.expiration_date)
-            for ingredient in user_inventory
-        }
+        # 指定時は嗜好の近いレシピ上位 candidate_limit 件だけを在庫判定にかける
+        self.candidate_limit = candidate_limit or None
+        self._vector_index = vector_index
+        self.food_names: Mapping[int, str] = food_names or {}
+        self._name_to_id = {name: fid for fid, name in self.food_names.items()}
+        self.inventory_dict = self._build_inventory_dict(user_inventory)
         self.user_profile_vector = user_profile_vector
         self.feature_labels = list(FEATURE_DIMENSIONS)
 
@@ -28,35 +74,98 @@ class RecipeProposer:
         self.EXPIRATION_BOOST_DAYS = 3
         self.EXPIRATION_BONUS_FACTOR = 0.1
 
-        self.SEASONING_NAMES = {
-            "醤油",
-            "塩",
-            "砂糖",
-            "みりん",
-            "酒",
-            "料理酒",
-            "胡椒",
-            "こしょう",
-            "ごま油",
-            "オリーブオイル",
-            "酢",
-            "味噌",
-            "だし",
-            "鶏ガラスープの素",
-            "片栗粉",
-            "小麦粉",
-            "豆板醤",
-            "ケチャップ",
-            "ソース",
-            "バター",
-            "マヨネーズ",
-            "白ごま",
-            "すりごま",
-            "カレールウ",
-            "ケチャップ・ソース",
-            "揚げ油",
-            "水",
-        }
+        self.SEASONING_NAMES = SEASONING_NAMES
+        self.seasoning_ids = frozenset(self.resolve_food_ids(SEASONING_NAMES))
+        self._build_dense_arrays()
+        self._build_recipe_matrix()
+
+    def resolve_food_ids(self, names: Iterable[str]) -> List[int]:
+        return [self._name_to_id[name] for name in names if name in self._name_to_id]
+
+    def _build_inventory_dict(
+        self, user_inventory: Union[List[Ingredient], InventorySnapshot]
+    ) -> Dict[int, Tuple[float, Optional[date]]]:
+        if isinstance(user_inventory, InventorySnapshot):
+            return {
+                int(food_id): (
+                    float(user_inventory.quantities[pos]),
+                    user_inventory.expiry_of(pos),
+                )
+                for pos, food_id in enumerate(user_inventory.food_ids)
+            }
+        inventory: Dict[int, Tuple[float, Optional[date]]] = {}
+        for ingredient in user_inventory:
+            food_id = getattr(ingredient, "food_id", None)
+            if food_id is None:
+                # クライアント指定の在庫は名前しか持たないため、マスタ名で解決する
+                food_id = self._name_to_id.get(ingredient.name)
+            if food_id is None:
+                continue
+            inventory[int(food_id)] = (
+                ingredient.quantity,
+                ingredient.expiration_date,
+            )
+        return inventory
+
+    def _build_dense_arrays(self) -> None:
+        max_id = max(
+            [0, *self.inventory_dict.keys(), *self.seasoning_ids]
+            + [int(r.food_ids.max()) for r in self.all_recipes if r.food_ids.size],
+        )
+        size = max_id + 1
+        self._stock = np.zeros(size, dtype=np.float64)
+        self._expiry = np.full(size, NO_EXPIRY, dtype=np.int64)
+        for food_id, (quantity, expiry) in self.inventory_dict.items():
+            self._stock[food_id] = float(quantity or 0.0)
+            if expiry:
+                self._expiry[food_id] = expiry.toordinal()
+        self._is_seasoning = np.zeros(size, dtype=bool)
+        self._is_seasoning[list(self.seasoning_ids)] = True
+
+    def _build_recipe_matrix(self) -> None:
+        # レシピ×食材の必要量行列。期限切れ間近の判定はこの行列と食材マスクの積で行う
+        indptr = np.zeros(len(self.all_recipes) + 1, dtype=np.int64)
+        for row, recipe in enumerate(self.all_recipes):
+            indptr[row + 1] = indptr[row] + recipe.food_ids.size
+        indices = np.concatenate(
+            [recipe.food_ids for recipe in self.all_recipes] or [np.zeros(0, np.int64)]
+        )
+        amounts = np.concatenate(
+            [recipe.amounts for recipe in self.all_recipes] or [np.zeros(0)]
+        )
+        self._recipe_matrix = sparse.csr_matrix(
+            (amounts, indices, indptr),
+            shape=(len(self.all_recipes), self._stock.size),
+        )
+
+    def expiring_mask(
+        self, today: Optional[date] = None, days: Optional[int] = None
+    ) -> np.ndarray:
+        """Boolean mask over food_id of in-stock items expiring within ``days``."""
+
+        start = (today or date.today()).toordinal()
+        deadline = start + (self.EXPIRATION_BOOST_DAYS if days is None else days)
+        return (
+            ~self._is_seasoning
+            & (self._stock > 0)
+            & (self._expiry != NO_EXPIRY)
+            & (self._expiry >= start)
+            & (self._expiry <= deadline)
+        )
+
+    def _expiring_grams(self, expiring: np.ndarray) -> np.ndarray:
+        """Per recipe, grams of expiring stock the recipe would use up."""
+
+        matrix = self._recipe_matrix
+        used = np.minimum(matrix.data, self._stock[matrix.indices])
+        used = used * expiring[matrix.indices]
+        per_recipe = sparse.csr_matrix(
+            (used, matrix.indices, matrix.indptr), shape=matrix.shape
+        )
+        return np.asarray(per_recipe.sum(axis=1)).ravel()
+
+    def _food_name(self, food_id: int) -> str:
+        return self.food_names.get(food_id, str(food_id))
 
     def _calculate_cosine_similarity(self, recipe_vector: np.ndarray) -> float:
         dot_product = float(np.dot(self.user_profile_vector, recipe_vector))
@@ -68,96 +177,166 @@ class RecipeProposer:
             return 0.0
         return dot_product / denominator
 
-    def _calculate_inventory_coverage(self, recipe: Recipe) -> Tuple[float, Set[str]]:
-        total_required_amount = 0.0
-        total_covered_amount = 0.0
-        missing_ingredients: Set[str] = set()
+    def _calculate_inventory_coverage(self, recipe: Recipe) -> float:
+        ids = recipe.food_ids
+        keep = ~self._is_seasoning[ids]
+        required = recipe.amounts[keep]
+        total_required_amount = float(required.sum())
+        if total_required_amount == 0:
+            return 0.0
+        stock = self._stock[ids[keep]]
+        covered = np.minimum(required, np.maximum(stock, 0.0))
+        return float(covered.sum()) / total_required_amount
 
-        for name, required_qty in recipe.required_qty.items():
-            if name in self.SEASONING_NAMES:
+    def _missing_items(self, recipe: Recipe) -> List[str]:
+        missing: List[str] = []
+        for food_id, required_qty in recipe.required_qty.items():
+            if self._is_seasoning[food_id]:
                 continue
-            inventory_info = self.inventory_dict.get(name)
-            stock_qty = inventory_info[0] if inventory_info else 0.0
-            total_required_amount += required_qty
+            stock_qty = float(self._stock[food_id])
             if stock_qty >= required_qty:
-                total_covered_amount += required_qty
-            elif stock_qty > 0:
-                total_covered_amount += stock_qty
-                missing_ingredients.add(f"{name} ({required_qty - stock_qty:.1f}g不足)")
+                continue
+            name = self._food_name(food_id)
+            if stock_qty > 0:
+                missing.append(f"{name} ({required_qty - stock_qty:.1f}g不足)")
             else:
-                missing_ingredients.add(f"{name} ({required_qty:.1f}g必要)")
+                missing.append(f"{name} ({required_qty:.1f}g必要)")
+        return sorted(set(missing))
 
-        if total_required_amount == 0:
-            return 0.0, missing_ingredients
+    def _score(
+        self,
+        recipe: Recipe,
+        params: UserParameters,
+        allergy_ids: np.ndarray,
+        boosted: bool,
+    ) -> Optional[Tuple[float, float, float, float]]:
+        coverage_score = self._calculate_inventory_coverage(recipe)
+        if coverage_score < self.MIN_COVERAGE_THRESHOLD:
+            return None
+        if allergy_ids.size and bool(np.isin(recipe.food_ids, allergy_ids).any()):
+            return None
+        if recipe.prep_time > params.max_time or recipe.calories > params.max_calories:
+            return None
 
-        coverage_rate = total_covered_amount / total_required_amount
-        return coverage_rate, missing_ingredients
+        preference_score = self._calculate_cosine_similarity(recipe.feature_vector)
+        final_score_base = (
+            coverage_score * self.WEIGHT_INVENTORY
+            + preference_score * self.WEIGHT_PREFERENCE
+        )
+        boost_factor = self.EXPIRATION_BONUS_FACTOR if boosted else 0.0
+        final_score = final_score_base * (1 + boost_factor)
+        return final_score, coverage_score, preference_score, boost_factor
 
-    def _get_expiration_boost_factor(self, recipe: Recipe) -> float:
-        today = date.today()
-        deadline = today + timedelta(days=self.EXPIRATION_BOOST_DAYS)
+    def _candidate_rows(self) -> Iterable[int]:
+        if self.candidate_limit is None or self.candidate_limit >= len(
+            self.all_recipes
+        ):
+            return range(len(self.all_recipes))
+        if self._vector_index is None:
+            self._vector_index = recipe_vector_index(self.all_recipes, "exact")
+        positions, _ = self._vector_index.search(
+            self.user_profile_vector, self.candidate_limit
+        )
+        return sorted(int(pos) for pos in positions)
 
-        for name in recipe.required_qty.keys():
-            if name in self.SEASONING_NAMES:
-                continue
-            inventory_info = self.inventory_dict.get(name)
-            if not inventory_info:
-                continue
-            quantity, expiry_date = inventory_info
-            if quantity <= 0 or not expiry_date:
-                continue
-            if today <= expiry_date <= deadline:
-                return self.EXPIRATION_BONUS_FACTOR
-        return 0.0
+    def _scored(
+        self,
+        params: UserParameters,
+        expiring: np.ndarray,
+        rows: Optional[Iterable[int]] = None,
+    ) -> List[Tuple[float, float, float, float, int]]:
+        allergies = getattr(params, "allergies", set()) or set()
+        allergy_ids = np.array(self.resolve_food_ids(allergies), dtype=np.int64)
+        # 期限切れ間近の食材マスクはリクエストごとに 1 回だけ作り、行列積で全レシピへ当てる
+        boosted = self._recipe_matrix @ expiring.astype(np.float64) > 0
+
+        scored: List[Tuple[float, float, float, float, int]] = []
+        for row in range(len(self.all_recipes)) if rows is None else rows:
+            recipe = self.all_recipes[row]
+            scores = self._score(recipe, params, allergy_ids, bool(boosted[row]))
+            if scores is not None:
+                scored.append((*scores, row))
+        return scored
+
+    def _payload(
+        self,
+        recipe: Recipe,
+        scores: Tuple[float, float, float, float],
+        user_vector_values: List[float],
+    ) -> Dict:
+        final_score, coverage_score, preference_score, boost = scores
+        return {
+            "recipe_id": recipe.id,
+            "recipe_name": recipe.name,
+            "final_score": final_score,
+            "coverage_score": coverage_score,
+            "preference_score": preference_score,
+            "user_preference_vector": user_vector_values.copy(),
+            "user_preference_labels": self.feature_labels,
+            "prep_time": recipe.prep_time,
+            "calories": recipe.calories,
+            "is_boosted": boost > 0,
+            "missing_items": self._missing_items(recipe),
+            "required_qty": {
+                self._food_name(food_id): quantity
+                for food_id, quantity in recipe.required_qty.items()
+            },
+            "req_count": len(recipe.required_qty),
+            "image_url": getattr(recipe, "image_url", None),
+        }
 
-    def propose(self, params: UserParameters) -> List[Dict]:
-        final_proposals: List[Dict] = []
+    def _user_vector_values(self) -> List[float]:
         try:
-            user_vector_values = [float(v) for v in np.ravel(self.user_profile_vector)]
+            return [float(v) for v in np.ravel(self.user_profile_vector)]
         except Exception:
-            user_vector_values = []
+            return []
 
-        for recipe in self.all_recipes:
-            coverage_score, missing = self._calculate_inventory_coverage(recipe)
-            if coverage_score < self.MIN_COVERAGE_THRESHOLD:
-                continue
+    def propose(
+        self, params: UserParameters, today: Optional[date] = None
+    ) -> List[Dict]:
+        scored = self._scored(params, self.expiring_mask(today), self._candidate_rows())
+        scored.sort(key=lambda item: item[0], reverse=True)
 
-            allergies = getattr(params, "allergies", set()) or set()
-            if any(ingredient in allergies for ingredient in recipe.required_qty):
-                continue
+        # 食材名の解決はスコアリング後、返却する提案に対してのみ行う
+        user_vector_values = self._user_vector_values()
+        return [
+            self._payload(self.all_recipes[row], scores, user_vector_values)
+            for *scores, row in scored
+        ]
 
-            if (
-                recipe.prep_time > params.max_time
-                or recipe.calories > params.max_calories
-            ):
-                continue
+    def propose_use_it_up(
+        self,
+        params: UserParameters,
+        *,
+        days: Optional[int] = None,
+        limit: int = 10,
+        today: Optional[date] = None,
+    ) -> List[Dict]:
+        """Recipes that consume soon-to-expire stock, most expiring grams first."""
 
-            preference_score = self._calculate_cosine_similarity(recipe.feature_vector)
-            final_score_base = (
-                coverage_score * self.WEIGHT_INVENTORY
-                + preference_score * self.WEIGHT_PREFERENCE
-            )
-            boost_factor = self._get_expiration_boost_factor(recipe)
-            final_score = final_score_base * (1 + boost_factor)
-
-            final_proposals.append(
-                {
-                    "recipe_id": recipe.id,
-                    "recipe_name": recipe.name,
-                    "final_score": final_score,
-                    "coverage_score": coverage_score,
-                    "preference_score": preference_score,
-                    "user_preference_vector": user_vector_values.copy(),
-                    "user_preference_labels": self.feature_labels,
-                    "prep_time": recipe.prep_time,
-                    "calories": recipe.calories,
-                    "is_boosted": boost_factor > 0,
-                    "missing_items": sorted(missing),
-                    "required_qty": recipe.required_qty,
-                    "req_count": len(recipe.required_qty),
-                    "image_url": getattr(recipe, "image_url", None),
-                }
-            )
+        expiring = self.expiring_mask(today, days)
+        if not expiring.any():
+            return []
+        expiring_grams = self._expiring_grams(expiring)
+        # days の範囲は絞り込みと並び順にだけ使い、スコアのブーストは propose と同じ基準にする
+        boost_mask = self.expiring_mask(today)
+        scored = [
+            item
+            for item in self._scored(params, boost_mask)
+            if expiring_grams[item[4]] > 0
+        ]
+        scored.sort(key=lambda item: (expiring_grams[item[4]], item[0]), reverse=True)
 
-        final_proposals.sort(key=lambda item: item["final_score"], reverse=True)
-        return final_proposals
+        user_vector_values = self._user_vector_values()
+        results: List[Dict] = []
+        for *scores, row in scored[:limit]:
+            recipe = self.all_recipes[row]
+            payload = self._payload(recipe, scores, user_vector_values)
+            payload["expiring_grams"] = float(expiring_grams[row])
+            payload["expiring_items"] = sorted(
+                self._food_name(int(food_id))
+                for food_id in recipe.food_ids
+                if expiring[food_id]
+            )
+            results.append(payload)
+        return results
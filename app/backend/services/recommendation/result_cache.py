@@ -0,0 +1,176 @@
+"""LRU + TTL cache of proposal lists for ``/recommendation/propose``.
+
+Entries are keyed by a fingerprint of every input that affects the result
+(user, per-user write version, inventory snapshot version or client payload,
+catalog version and the request parameters). Any committed write to a user's
+``user_foods`` or ``user_recipe_history`` bumps that user's version and evicts
+their entries, so a hit never returns proposals computed from older state.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.backend.models import UserFood, UserRecipeHistory
+
+RECOMMENDATION_CACHE_TTL_SECONDS = float(
+    os.getenv("RECOMMENDATION_CACHE_TTL_SECONDS", "300")
+)
+RECOMMENDATION_CACHE_SIZE = 512
+
+_DIRTY_USERS_KEY = "recommendation_cache_dirty_users"
+_HISTORY_TABLE_NAME = UserRecipeHistory.__tablename__
+
+
+@dataclass(frozen=True)
+class _Entry:
+    proposals: Tuple[Dict[str, Any], ...]
+    stored_at: float
+
+
+_CACHE: weakref.WeakKeyDictionary[Any, OrderedDict[Tuple, _Entry]] = (
+    weakref.WeakKeyDictionary()
+)
+_USER_VERSIONS: weakref.WeakKeyDictionary[Any, Dict[int, int]] = (
+    weakref.WeakKeyDictionary()
+)
+_VERSION_COUNTER = itertools.count(1)
+_LOCK = threading.Lock()
+
+
+def payload_digest(*parts: Any) -> str:
+    """Stable digest of request payload fragments (client inventory, history...)."""
+
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def _user_version(bind: Any, user_id: int) -> int:
+    return _USER_VERSIONS.get(bind, {}).get(user_id, 0)
+
+
+def _has_pending_writes(session: Session, user_id: int) -> bool:
+    return user_id in session.info.get(_DIRTY_USERS_KEY, ())
+
+
+def build_fingerprint(
+    session: Session, user_id: int, *parts: Hashable
+) -> Tuple[Hashable, ...]:
+    with _LOCK:
+        version = _user_version(session.get_bind(), user_id)
+    return (user_id, version, *parts)
+
+
+def get_cached_proposals(
+    session: Session, fingerprint: Tuple[Hashable, ...]
+) -> Optional[List[Dict[str, Any]]]:
+    if _has_pending_writes(session, fingerprint[0]):
+        return None
+    now = time.monotonic()
+    with _LOCK:
+        per_bind = _CACHE.get(session.get_bind())
+        if per_bind is None:
+            return None
+        entry = per_bind.get(fingerprint)
+        if entry is None:
+            return None
+        if now - entry.stored_at >= RECOMMENDATION_CACHE_TTL_SECONDS:
+            del per_bind[fingerprint]
+            return None
+        per_bind.move_to_end(fingerprint)
+    # 呼び出し側が dict を書き換えてもキャッシュが汚れないよう浅いコピーを返す
+    return [dict(proposal) for proposal in entry.proposals]
+
+
+def store_proposals(
+    session: Session,
+    fingerprint: Tuple[Hashable, ...],
+    proposals: List[Dict[str, Any]],
+) -> None:
+    user_id = fingerprint[0]
+    # 未コミットの変更を見て計算した結果は共有しない
+    if _has_pending_writes(session, user_id):
+        return
+    bind = session.get_bind()
+    entry = _Entry(
+        proposals=tuple(dict(proposal) for proposal in proposals),
+        stored_at=time.monotonic(),
+    )
+    with _LOCK:
+        # 計算中に書き込みがコミットされた場合は古い結果を保存しない
+        if _user_version(bind, user_id) != fingerprint[1]:
+            return
+        per_bind = _CACHE.setdefault(bind, OrderedDict())
+        per_bind[fingerprint] = entry
+        per_bind.move_to_end(fingerprint)
+        while len(per_bind) > RECOMMENDATION_CACHE_SIZE:
+            per_bind.popitem(last=False)
+
+
+def invalidate_users(bind: Any, user_ids: Iterable[int]) -> None:
+    targets = set(user_ids)
+    if not targets:
+        return
+    with _LOCK:
+        versions = _USER_VERSIONS.setdefault(bind, {})
+        for user_id in targets:
+            versions[user_id] = next(_VERSION_COUNTER)
+        per_bind = _CACHE.get(bind)
+        if per_bind is None:
+            return
+        for key in [key for key in per_bind if key[0] in targets]:
+            del per_bind[key]
+
+
+def _mark_dirty(session: Session, user_ids: Set[int]) -> None:
+    if user_ids:
+        session.info.setdefault(_DIRTY_USERS_KEY, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_orm_writes(session: Session, flush_context: Any) -> None:
+    user_ids: Set[int] = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (UserFood, UserRecipeHistory)):
+            user_id = getattr(obj, "user_id", None)
+            if user_id is not None:
+                user_ids.add(int(user_id))
+    _mark_dirty(session, user_ids)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_history_inserts(state: ORMExecuteState) -> None:
+    # 調理系エンドポイントは履歴を insert(UserRecipeHistory) でバルク登録する
+    table_name = getattr(getattr(state.statement, "table", None), "name", None)
+    if not state.is_insert or table_name != _HISTORY_TABLE_NAME:
+        return
+    params = state.parameters
+    rows = params if isinstance(params, list) else [params or {}]
+    _mark_dirty(
+        state.session,
+        {int(row["user_id"]) for row in rows if row.get("user_id") is not None},
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    dirty = session.info.pop(_DIRTY_USERS_KEY, None)
+    if dirty:
+        invalidate_users(session.get_bind(), dirty)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(_DIRTY_USERS_KEY, None)
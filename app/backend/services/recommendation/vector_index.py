@@ -0,0 +1,220 @@
+"""Nearest-neighbour indexes over recipe feature vectors (cosine similarity).
+
+``ExactIndex`` is the brute-force baseline (one matrix-vector product).
+``HNSWIndex`` is a small in-process Hierarchical Navigable Small World graph
+for when the feature dimension / catalog grows enough that the exact scan
+dominates. Both return positions into the vectors they were built from, so
+callers can map hits back to their own recipe list.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from .data_models import Recipe
+
+# "exact" または "hnsw"
+RECOMMENDATION_VECTOR_INDEX = os.getenv("RECOMMENDATION_VECTOR_INDEX", "exact")
+# 0 の場合は候補を絞らず全レシピをスコアリングする
+RECOMMENDATION_CANDIDATE_LIMIT = int(os.getenv("RECOMMENDATION_CANDIDATE_LIMIT", "0"))
+
+_INDEX_CACHE_SIZE = 4
+_INDEX_CACHE: "OrderedDict[Tuple[Hashable, ...], VectorIndex]" = OrderedDict()
+_INDEX_LOCK = threading.Lock()
+
+SearchResult = Tuple[np.ndarray, np.ndarray]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float64))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    # ゼロベクトルはどのクエリとも類似度 0 として扱う
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _normalize_query(query: np.ndarray) -> np.ndarray:
+    return _normalize(np.ravel(query))[0]
+
+
+class VectorIndex(Protocol):
+    """Common interface: ``search(query, k) -> (positions, similarities)``."""
+
+    def __len__(self) -> int: ...
+
+    def search(self, query: np.ndarray, k: int) -> SearchResult: ...
+
+
+class ExactIndex:
+    def __init__(self, vectors: np.ndarray) -> None:
+        self._vectors = _normalize(vectors) if len(vectors) else np.zeros((0, 0))
+
+    def __len__(self) -> int:
+        return int(self._vectors.shape[0])
+
+    def search(self, query: np.ndarray, k: int) -> SearchResult:
+        size = len(self)
+        k = min(k, size)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        sims = self._vectors @ _normalize_query(query)
+        top = np.argpartition(-sims, k - 1)[:k] if k < size else np.arange(size)
+        # 類似度の降順、同値は位置の昇順
+        order = np.lexsort((top, -sims[top]))
+        positions = top[order].astype(np.int64)
+        return positions, sims[positions]
+
+
+class HNSWIndex:
+    """Hierarchical Navigable Small World graph (Malkov & Yashunin, 2016)."""
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        *,
+        m: int = 16,
+        ef_construction: int = 100,
+        ef_search: int = 64,
+        seed: int = 0,
+    ) -> None:
+        self._vectors = _normalize(vectors) if len(vectors) else np.zeros((0, 0))
+        self.m = m
+        self.max_links_layer0 = 2 * m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._level_mult = 1.0 / math.log(max(m, 2))
+        self._rng = random.Random(seed)
+        self._layers: List[Dict[int, List[int]]] = []
+        self._entry: Optional[int] = None
+        self._entry_level = 0
+        for node in range(len(self)):
+            self._insert(node)
+
+    def __len__(self) -> int:
+        return int(self._vectors.shape[0])
+
+    def _search_layer(
+        self, query: np.ndarray, entries: Sequence[int], ef: int, layer: int
+    ) -> List[Tuple[float, int]]:
+        links = self._layers[layer]
+        visited = set(entries)
+        entry_sims = (self._vectors[list(entries)] @ query).tolist()
+        candidates = [(-sim, node) for sim, node in zip(entry_sims, entries)]
+        heapq.heapify(candidates)
+        results = [(sim, node) for sim, node in zip(entry_sims, entries)]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if len(results) >= ef and -neg_sim < results[0][0]:
+                break
+            neighbors = [n for n in links.get(node, ()) if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            sims = (self._vectors[neighbors] @ query).tolist()
+            for sim, neighbor in zip(sims, neighbors):
+                if len(results) < ef or sim > results[0][0]:
+                    heapq.heappush(candidates, (-sim, neighbor))
+                    heapq.heappush(results, (sim, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted(results, reverse=True)
+
+    def _prune(self, node: int, links: List[int], cap: int) -> List[int]:
+        sims = self._vectors[links] @ self._vectors[node]
+        keep = np.argsort(-sims, kind="stable")[:cap]
+        return [links[i] for i in keep]
+
+    def _insert(self, node: int) -> None:
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+        while len(self._layers) <= level:
+            self._layers.append({})
+        for layer in range(level + 1):
+            self._layers[layer][node] = []
+        if self._entry is None:
+            self._entry, self._entry_level = node, level
+            return
+
+        query = self._vectors[node]
+        entry_level = self._entry_level
+        entries = [self._entry]
+        for layer in range(entry_level, level, -1):
+            entries = [self._search_layer(query, entries, 1, layer)[0][1]]
+
+        for layer in range(min(level, entry_level), -1, -1):
+            found = self._search_layer(query, entries, self.ef_construction, layer)
+            cap = self.max_links_layer0 if layer == 0 else self.m
+            neighbors = [n for _, n in found if n != node][: self.m]
+            self._layers[layer][node] = neighbors
+            for neighbor in neighbors:
+                links = self._layers[layer][neighbor]
+                links.append(node)
+                if len(links) > cap:
+                    self._layers[layer][neighbor] = self._prune(neighbor, links, cap)
+            entries = [n for _, n in found]
+
+        if level > entry_level:
+            self._entry, self._entry_level = node, level
+
+    def search(self, query: np.ndarray, k: int) -> SearchResult:
+        k = min(k, len(self))
+        if k <= 0 or self._entry is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        normalized = _normalize_query(query)
+        entries = [self._entry]
+        for layer in range(self._entry_level, 0, -1):
+            entries = [self._search_layer(normalized, entries, 1, layer)[0][1]]
+        found = self._search_layer(normalized, entries, max(self.ef_search, k), 0)[:k]
+        positions = np.array([node for _, node in found], dtype=np.int64)
+        return positions, np.array([sim for sim, _ in found])
+
+
+def build_vector_index(kind: str, vectors: np.ndarray, **params) -> VectorIndex:
+    if kind == "exact":
+        return ExactIndex(vectors)
+    if kind == "hnsw":
+        return HNSWIndex(vectors, **params)
+    raise ValueError(f"unknown vector index kind: {kind}")
+
+
+def recipe_vector_index(
+    recipes: Sequence[Recipe],
+    kind: str = RECOMMENDATION_VECTOR_INDEX,
+    *,
+    catalog_key: Hashable = None,
+) -> VectorIndex:
+    """Index over ``recipe.feature_vector``.
+
+    With a ``catalog_key`` (e.g. the recipe catalog version) the index is kept
+    and reused until the key or the recipe ids change.
+    """
+
+    key = (kind, catalog_key, tuple(recipe.id for recipe in recipes))
+    if catalog_key is not None:
+        with _INDEX_LOCK:
+            cached = _INDEX_CACHE.get(key)
+            if cached is not None:
+                _INDEX_CACHE.move_to_end(key)
+                return cached
+    vectors = (
+        np.vstack([recipe.feature_vector for recipe in recipes])
+        if recipes
+        else np.zeros((0, 0))
+    )
+    index = build_vector_index(kind, vectors)
+    if catalog_key is not None:
+        with _INDEX_LOCK:
+            _INDEX_CACHE[key] = index
+            while len(_INDEX_CACHE) > _INDEX_CACHE_SIZE:
+                _INDEX_CACHE.popitem(last=False)
+    return index
@@ -0,0 +1,180 @@
+"""Refresh token persistence keyed by a fixed-size SHA-256 digest.
+
+Only ``sha256(token)`` is stored, so the unique index stays 64 characters wide
+and a leaked table cannot be replayed. Each user keeps at most
+``REFRESH_TOKEN_LIMIT_PER_USER`` tokens (oldest are evicted on issue), and
+``run_sweeper`` deletes expired rows in batches in the background.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.backend.models import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+# 1 ユーザーが同時に保持できるリフレッシュトークン数（0 以下で無制限）
+REFRESH_TOKEN_LIMIT_PER_USER = int(os.getenv("REFRESH_TOKEN_LIMIT_PER_USER", "10"))
+REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS = float(
+    os.getenv("REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS", "600")
+)
+REFRESH_TOKEN_SWEEP_BATCH_SIZE = int(
+    os.getenv("REFRESH_TOKEN_SWEEP_BATCH_SIZE", "1000")
+)
+
+_SWEEPER_TASK: Optional["asyncio.Task[None]"] = None
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def store_token(
+    db: Session,
+    token: str,
+    user_id: int,
+    expires_at: datetime,
+    *,
+    limit: Optional[int] = None,
+) -> None:
+    """Persist ``token`` and evict the user's oldest tokens beyond ``limit``.
+
+    The insert and the eviction share one commit (no refresh round-trip).
+    """
+
+    max_tokens = REFRESH_TOKEN_LIMIT_PER_USER if limit is None else limit
+    db.add(
+        RefreshToken(
+            token_hash=hash_token(token),
+            user_id=user_id,
+            created_at=datetime.utcnow(),
+            expires_at=expires_at,
+        )
+    )
+    if max_tokens > 0:
+        db.flush()
+        stale_ids = (
+            db.execute(
+                select(RefreshToken.id)
+                .where(RefreshToken.user_id == user_id)
+                .order_by(RefreshToken.created_at.desc(), RefreshToken.id.desc())
+                .offset(max_tokens)
+            )
+            .scalars()
+            .all()
+        )
+        if stale_ids:
+            db.execute(
+                delete(RefreshToken)
+                .where(RefreshToken.id.in_(stale_ids))
+                .execution_options(synchronize_session=False)
+            )
+    db.commit()
+
+
+def find_token(db: Session, token: str) -> Optional[RefreshToken]:
+    return (
+        db.query(RefreshToken)
+        .filter(RefreshToken.token_hash == hash_token(token))
+        .first()
+    )
+
+
+def revoke_token(db: Session, token: str) -> bool:
+    deleted = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.token_hash == hash_token(token))
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return bool(deleted)
+
+
+def purge_expired(
+    db: Session,
+    *,
+    now: Optional[datetime] = None,
+    batch_size: int = REFRESH_TOKEN_SWEEP_BATCH_SIZE,
+) -> int:
+    """Delete expired tokens ``batch_size`` rows per transaction; return the count."""
+
+    cutoff = now or datetime.utcnow()
+    total = 0
+    while True:
+        ids = (
+            db.execute(
+                select(RefreshToken.id)
+                .where(RefreshToken.expires_at < cutoff)
+                .limit(batch_size)
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            return total
+        db.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        total += len(ids)
+        if len(ids) < batch_size:
+            return total
+
+
+def _purge_with_new_session(session_factory: Callable[[], Session]) -> int:
+    db = session_factory()
+    try:
+        return purge_expired(db)
+    finally:
+        db.close()
+
+
+async def run_sweeper(
+    session_factory: Callable[[], Session],
+    interval_seconds: float = REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS,
+) -> None:
+    while True:
+        try:
+            deleted = await run_in_threadpool(_purge_with_new_session, session_factory)
+            if deleted:
+                logger.info("Purged %d expired refresh tokens", deleted)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # 失敗しても次回の掃除で再試行する
+            logger.exception("Refresh token sweep failed")
+        await asyncio.sleep(interval_seconds)
+
+
+def start_sweeper(session_factory: Callable[[], Session]) -> None:
+    global _SWEEPER_TASK
+    if REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS <= 0:
+        return
+    if _SWEEPER_TASK is None or _SWEEPER_TASK.done():
+        _SWEEPER_TASK = asyncio.get_running_loop().create_task(
+            run_sweeper(session_factory)
+        )
+
+
+async def stop_sweeper() -> None:
+    global _SWEEPER_TASK
+    task, _SWEEPER_TASK = _SWEEPER_TASK, None
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
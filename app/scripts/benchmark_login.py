@@ -0,0 +1,143 @@
+"""ログイン集中時のスループットとイベントループの応答性を計測する。
+
+インメモリ SQLite に利用者を作成し、同時ログインを流しながら
+``/health`` を一定間隔で叩いて応答時間を記録する。パスワードハッシュが
+イベントループを塞いでいれば health の p99 が大きく悪化する。
+
+例:
+    python -m app.scripts.benchmark_login --users 50 --logins 200 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.backend.api.routers.auth_routes import router as auth_router
+from app.backend.database import Base, get_db
+from app.backend.models import User
+from app.backend.services import passwords
+
+PASSWORD = "benchmark-password"
+
+
+def build_app(users: int) -> FastAPI:
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    password_hash = passwords.hash_password(PASSWORD)
+    with SessionLocal() as session:
+        session.add_all(
+            User(
+                username=f"bench{idx}",
+                email=f"bench{idx}@example.com",
+                password_hash=password_hash,
+            )
+            for idx in range(users)
+        )
+        session.commit()
+
+    app = FastAPI()
+    app.include_router(auth_router, prefix="/api/v1/auth")
+
+    @app.get("/api/v1/health")
+    async def health():
+        return {"status": "ok"}
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return app
+
+
+def _percentiles(samples: List[float]) -> str:
+    values = np.array(samples) * 1000
+    return (
+        f"p50={np.percentile(values, 50):8.2f}ms "
+        f"p99={np.percentile(values, 99):8.2f}ms max={values.max():8.2f}ms"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    app = build_app(args.users)
+    transport = httpx.ASGITransport(app=app)
+    login_latencies: List[float] = []
+    health_latencies: List[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def login(idx: int) -> None:
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                resp = await client.post(
+                    "/api/v1/auth/login",
+                    json={
+                        "email": f"bench{idx % args.users}@example.com",
+                        "password": PASSWORD,
+                    },
+                )
+                login_latencies.append(time.perf_counter() - started)
+                if resp.status_code != 200:
+                    failures += 1
+
+        async def probe() -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/api/v1/health")
+                health_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(args.probe_interval)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(idx) for idx in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    print(
+        f"iterations={passwords.PASSWORD_HASH_ITERATIONS} "
+        f"hash_workers={passwords.PASSWORD_HASH_WORKERS}"
+    )
+    print(
+        f"logins: {args.logins} in {elapsed:.2f}s "
+        f"({args.logins / elapsed:.1f}/s, failures={failures})"
+    )
+    print(f"login  {_percentiles(login_latencies)}")
+    print(f"health {_percentiles(health_latencies)} (n={len(health_latencies)})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--probe-interval", type=float, default=0.01, help="health を叩く間隔（秒）"
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""Latency / memory benchmark for the recommendation pipeline.
+
+Builds a synthetic SQLite database (foods from ``foodlist.json`` with a
+Zipf-like popularity, recipes, inventories and cooking histories), then times
+the three stages the API runs per request:
+
+* ``catalog_load``  - ``RecipeDataSource.load_and_vectorize_recipes``
+* ``profile_build`` - ``RecipeDataSource.create_user_profile_vector``
+* ``propose``       - ``RecipeProposer(...).propose``
+
+Results (p50/p99 latency, peak traced memory) can be saved as JSON and
+compared against a previous run to fail CI on regressions::
+
+    python -m app.scripts.benchmark_recommendation \\
+        --recipes 1000 10000 --output bench.json --baseline main-bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.backend.database import Base
+from app.backend.models import (
+    Food,
+    FoodCategory,
+    IngredientStatus,
+    Recipe,
+    RecipeFood,
+    User,
+    UserFood,
+    UserRecipeHistory,
+)
+from app.backend.services.food_master_loader import (
+    CATEGORY_LABELS,
+    FOODLIST_RELATIVE_PATH,
+)
+
+from app.backend.services.recipe_flags import RECIPE_FLAG_FIELDS, pack_flags
+from app.backend.services.recommendation.data_models import UserParameters
+from app.backend.services.recommendation.data_source import (
+    InventoryManager,
+    RecipeDataSource,
+)
+from app.backend.services.recommendation.proposer_logic import (
+    SEASONING_NAMES,
+    RecipeProposer,
+)
+
+STAGES = ("catalog_load", "profile_build", "propose")
+
+# カテゴリごとの 1 レシピあたり使用量 (g) の中央値
+_CATEGORY_MEDIAN_G = {
+    "meat": 200.0,
+    "seafood": 150.0,
+    "vegetables_fungi": 100.0,
+    "fruits": 80.0,
+    "dairy_eggs": 60.0,
+    "soy_processed": 120.0,
+    "grains_noodles": 180.0,
+    "pantry_others": 30.0,
+    "seasoning": 8.0,
+}
+_CATEGORY_FLAGS = {
+    "meat": "type_meat",
+    "seafood": "type_seafood",
+    "vegetables_fungi": "type_vegetarian",
+}
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    recipes: int = 1000
+    users: int = 20
+    inventory_size: int = 25
+    history_size: int = 30
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class StageResult:
+    recipes: int
+    stage: str
+    runs: int
+    p50_ms: float
+    p99_ms: float
+    peak_mb: float
+
+
+def load_food_catalog(
+    project_root: Optional[Path] = None,
+) -> List[Tuple[str, str]]:
+    """``(category_key, food_name)`` pairs from ``foodlist.json`` plus seasonings."""
+
+    root = project_root or Path(__file__).resolve().parents[2]
+    with (root / FOODLIST_RELATIVE_PATH).open(encoding="utf-8") as fp:
+        data = json.load(fp)
+    foods = [(key, name) for key, names in data.items() for name in names]
+    known = {name for _, name in foods}
+    foods.extend(
+        ("seasoning", name) for name in sorted(SEASONING_NAMES) if name not in known
+    )
+    return foods
+
+
+def _zipf_weights(count: int, rng: np.random.Generator) -> np.ndarray:
+    # 少数の定番食材が多くのレシピに現れる分布（順位はランダム）
+    weights = 1.0 / np.arange(1, count + 1) ** 1.1
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def populate_database(session: Session, config: SyntheticConfig) -> None:
+    """Fill an empty schema with a synthetic catalog, inventories and histories."""
+
+    rng = np.random.default_rng(config.seed)
+    foods = load_food_catalog()
+    categories = sorted({key for key, _ in foods})
+    category_ids = {key: idx for idx, key in enumerate(categories, start=1)}
+    session.execute(
+        insert(FoodCategory),
+        [
+            {"category_id": cid, "category_name": CATEGORY_LABELS.get(key, key)}
+            for key, cid in category_ids.items()
+        ],
+    )
+    session.execute(
+        insert(Food),
+        [
+            {
+                "food_id": food_id,
+                "food_name": name,
+                "category_id": category_ids[key],
+                "is_trackable": key != "seasoning",
+            }
+            for food_id, (key, name) in enumerate(foods, start=1)
+        ],
+    )
+
+    food_ids = np.arange(1, len(foods) + 1)
+    food_keys = [key for key, _ in foods]
+    popularity = _zipf_weights(len(foods), rng)
+    recipe_rows = []
+    requirement_rows = []
+    for recipe_id in range(1, config.recipes + 1):
+        count = int(np.clip(rng.poisson(6), 2, 15))
+        chosen = rng.choice(food_ids, size=count, replace=False, p=popularity)
+        flags = {name: bool(rng.random() < 0.15) for name in RECIPE_FLAG_FIELDS}
+        for food_id in chosen.tolist():
+            key = food_keys[food_id - 1]
+            median = _CATEGORY_MEDIAN_G.get(key, 50.0)
+            quantity = round(float(median * rng.lognormal(0.0, 0.4)), 1)
+            requirement_rows.append(
+                {"recipe_id": recipe_id, "food_id": food_id, "quantity_g": quantity}
+            )
+            if key in _CATEGORY_FLAGS:
+                flags[_CATEGORY_FLAGS[key]] = True
+        recipe_rows.append(
+            {
+                "recipe_id": recipe_id,
+                "recipe_name": f"synthetic-{recipe_id}",
+                "cooking_time": int(rng.integers(5, 90)),
+                "calories": int(rng.integers(80, 1200)),
+                "feature_mask": pack_flags(flags),
+                **flags,
+            }
+        )
+    # Core の一括 INSERT は mapper イベントを通らないため feature_mask も明示する
+    session.execute(insert(Recipe), recipe_rows)
+    session.execute(insert(RecipeFood), requirement_rows)
+
+    today = date.today()
+    now = datetime.now(timezone.utc)
+    user_rows = []
+    stock_rows = []
+    history_rows = []
+    for user_id in range(1, config.users + 1):
+        user_rows.append(
+            {
+                "user_id": user_id,
+                "username": f"bench{user_id}",
+                "email": f"bench{user_id}@example.com",
+                "password_hash": "x",
+            }
+        )
+        size = min(config.inventory_size, len(foods))
+        for food_id in rng.choice(food_ids, size=size, replace=False, p=popularity):
+            days = int(rng.integers(-2, 21))
+            stock_rows.append(
+                {
+                    "user_id": user_id,
+                    "food_id": int(food_id),
+                    "quantity_g": round(float(rng.uniform(20, 600)), 1),
+                    "expiration_date": today + timedelta(days=days),
+                    "status": IngredientStatus.UNUSED,
+                }
+            )
+        for _ in range(config.history_size):
+            history_rows.append(
+                {
+                    "user_id": user_id,
+                    "recipe_id": int(rng.integers(1, config.recipes + 1)),
+                    "servings": 1,
+                    "cooked_at": now - timedelta(days=int(rng.integers(0, 120))),
+                }
+            )
+    session.execute(insert(User), user_rows)
+    session.execute(insert(UserFood), stock_rows)
+    if history_rows:
+        session.execute(insert(UserRecipeHistory), history_rows)
+    session.commit()
+
+
+def create_benchmark_database(config: SyntheticConfig) -> sessionmaker:
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as session:
+        populate_database(session, config)
+    return SessionLocal
+
+
+def _measure(
+    recipes: int, stage: str, runs: Sequence[Callable[[], object]]
+) -> StageResult:
+    # ピークメモリは tracemalloc のオーバーヘッドを避けるため別の 1 回で計る
+    tracemalloc.start()
+    runs[0]()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = []
+    for run in runs:
+        started = time.perf_counter()
+        run()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return StageResult(
+        recipes=recipes,
+        stage=stage,
+        runs=len(runs),
+        p50_ms=float(np.percentile(latencies, 50)),
+        p99_ms=float(np.percentile(latencies, 99)),
+        peak_mb=peak / (1024 * 1024),
+    )
+
+
+def run_benchmark(config: SyntheticConfig, repeats: int = 20) -> List[StageResult]:
+    SessionLocal = create_benchmark_database(config)
+    engine = SessionLocal.kw["bind"]
+    params = UserParameters(max_time=60, max_calories=900, allergies=set())
+    user_ids = [(i % config.users) + 1 for i in range(repeats)]
+    try:
+        with SessionLocal() as session:
+            source = RecipeDataSource(db_session=session)
+            recipes = source.load_and_vectorize_recipes()
+            snapshots = {
+                user_id: InventoryManager(db_session=session).get_snapshot(user_id)
+                for user_id in set(user_ids)
+            }
+            profiles = {
+                user_id: source.create_user_profile_vector(user_id)
+                for user_id in set(user_ids)
+            }
+
+            def catalog_load() -> object:
+                return RecipeDataSource(db_session=session).load_and_vectorize_recipes()
+
+            def profile_build(user_id: int) -> Callable[[], object]:
+                return lambda: source.create_user_profile_vector(user_id)
+
+            def propose(user_id: int) -> Callable[[], object]:
+                return lambda: RecipeProposer(
+                    recipes,
+                    snapshots[user_id],
+                    profiles[user_id],
+                    food_names=source.food_names,
+                ).propose(params)
+
+            return [
+                _measure(config.recipes, "catalog_load", [catalog_load] * repeats),
+                _measure(
+                    config.recipes,
+                    "profile_build",
+                    [profile_build(user_id) for user_id in user_ids],
+                ),
+                _measure(
+                    config.recipes,
+                    "propose",
+                    [propose(user_id) for user_id in user_ids],
+                ),
+            ]
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def find_regressions(
+    results: Sequence[StageResult],
+    baseline: Sequence[StageResult],
+    tolerance: float = 0.2,
+) -> List[str]:
+    """Stages whose p50 latency or peak memory grew by more than ``tolerance``."""
+
+    previous: Dict[Tuple[int, str], StageResult] = {
+        (item.recipes, item.stage): item for item in baseline
+    }
+    messages: List[str] = []
+    for item in results:
+        before = previous.get((item.recipes, item.stage))
+        if before is None:
+            continue
+        for metric in ("p50_ms", "peak_mb"):
+            old, new = getattr(before, metric), getattr(item, metric)
+            if old > 0 and new > old * (1 + tolerance):
+                messages.append(
+                    f"{item.stage}@{item.recipes}: {metric} {old:.2f} -> {new:.2f}"
+                )
+    return messages
+
+
+def _load_results(path: Path) -> List[StageResult]:
+    with path.open(encoding="utf-8") as fp:
+        return [StageResult(**item) for item in json.load(fp)]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="レコメンド処理のベンチマーク")
+    parser.add_argument("--recipes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--inventory-size", type=int, default=25)
+    parser.add_argument("--history-size", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="結果を JSON で保存")
+    parser.add_argument("--baseline", type=Path, help="比較対象の過去の結果 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results: List[StageResult] = []
+    for recipes in args.recipes:
+        config = SyntheticConfig(
+            recipes=recipes,
+            users=args.users,
+            inventory_size=args.inventory_size,
+            history_size=args.history_size,
+            seed=args.seed,
+        )
+        for item in run_benchmark(config, repeats=args.repeats):
+            results.append(item)
+            print(
+                f"{item.recipes:>7} {item.stage:<14} p50={item.p50_ms:9.2f}ms "
+                f"p99={item.p99_ms:9.2f}ms peak={item.peak_mb:8.2f}MB"
+            )
+
+    if args.output:
+        args.output.write_text(
+            json.dumps([asdict(item) for item in results], indent=2), encoding="utf-8"
+        )
+    if args.baseline:
+        regressions = find_regressions(
+            results, _load_results(args.baseline), args.tolerance
+        )
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""レコメンド結果とレシート詳細のレスポンス生成コストを比較する。
+
+同じペイロードを (1) FastAPI 既定の経路（``response_model`` の検証 +
+``jsonable_encoder`` + 標準 json）と (2) ``app.backend.api.responses`` の高速経路
+で返し、レコメンドは共通項目をまとめた v2 形式 (3) も加えて、圧縮なし / gzip / brotli（インストール時のみ）それぞれのレイテンシと
+転送サイズを表示する。DB は使わない。
+
+例:
+    python -m app.scripts.benchmark_responses --proposals 200 --lines 300
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+from app.backend.api import compression
+from app.backend.api.compression import CompressionMiddleware
+from app.backend.api.responses import FastJSONResponse, validated_response
+from app.backend.api.routers.recommendation import (
+    _RECOMMENDATION_ENVELOPE,
+    _RECOMMENDATION_ITEMS,
+    _RECOMMENDATION_RESULTS,
+    InventorySummary,
+    RecommendationEnvelope,
+    RecommendationResult,
+    UserPreference,
+)
+from app.backend.services.recipe_flags import RECIPE_FLAG_FIELDS
+
+
+def build_proposals(count: int) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(0)
+    vector = rng.random(len(RECIPE_FLAG_FIELDS)).tolist()
+    labels = list(RECIPE_FLAG_FIELDS)
+    return [
+        {
+            "recipe_id": idx,
+            "recipe_name": f"レシピ{idx}",
+            "final_score": float(rng.random()),
+            "coverage_score": float(rng.random()),
+            "preference_score": float(rng.random()),
+            "user_preference_vector": vector,
+            "user_preference_labels": labels,
+            "prep_time": 30,
+            "calories": 500,
+            "is_boosted": False,
+            "missing_items": ["玉ねぎ", "にんじん"],
+            "required_qty": {f"食材{k}": 100.0 for k in range(8)},
+            "req_count": 8,
+            "image_url": f"/recipe-pages/{idx}.png",
+            "inventory_source": "server",
+            "inventory_count": 40,
+            "inventory_label": "サーバー在庫 40件",
+        }
+        for idx in range(count)
+    ]
+
+
+def build_receipt(lines: int) -> Dict[str, Any]:
+    def line(idx: int) -> Dict[str, Any]:
+        return {
+            "line_id": idx,
+            "text": f"トマト 2個 {idx * 10}円",
+            "confidence": 0.93,
+            "bbox": [
+                [10, 20 * idx],
+                [300, 20 * idx],
+                [300, 20 * idx + 18],
+                [10, 20 * idx + 18],
+            ],
+            "center": [155.0, 20.0 * idx + 9],
+        }
+
+    return {
+        "receipt_id": 1,
+        "status": "completed",
+        "items": [
+            {"detail_id": idx, "raw_text": f"トマト{idx}"} for idx in range(lines // 3)
+        ],
+        "text_lines": [line(idx) for idx in range(lines)],
+        "raw_text_lines": [line(idx) for idx in range(lines)],
+        "text_content": "\n".join(f"トマト {idx}" for idx in range(lines)),
+    }
+
+
+def build_app(proposals: List[Dict[str, Any]], receipt: Dict[str, Any]) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/default/recommendation", response_model=List[RecommendationResult])
+    def default_recommendation():
+        return proposals
+
+    @app.get("/fast/recommendation", response_model=List[RecommendationResult])
+    def fast_recommendation():
+        return validated_response(
+            _RECOMMENDATION_RESULTS, _RECOMMENDATION_RESULTS.validate_python(proposals)
+        )
+
+    @app.get("/v2/recommendation", response_model=RecommendationEnvelope)
+    def v2_recommendation():
+        first = proposals[0]
+        envelope = RecommendationEnvelope(
+            user_preference=UserPreference(
+                vector=first["user_preference_vector"],
+                labels=first["user_preference_labels"],
+            ),
+            inventory=InventorySummary(
+                source="server", count=40, label="サーバー在庫 40件"
+            ),
+            results=_RECOMMENDATION_ITEMS.validate_python(proposals),
+        )
+        return validated_response(_RECOMMENDATION_ENVELOPE, envelope)
+
+    @app.get("/default/receipt")
+    def default_receipt():
+        return receipt
+
+    @app.get("/fast/receipt")
+    def fast_receipt():
+        return FastJSONResponse(receipt)
+
+    return app
+
+
+async def measure(
+    client: httpx.AsyncClient, path: str, encoding: str, requests: int
+) -> Dict[str, float]:
+    headers = {"Accept-Encoding": encoding}
+    latencies: List[float] = []
+    size = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        resp = await client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        size = (
+            len(resp.content)
+            if encoding == "identity"
+            else int(resp.headers["content-length"])
+        )
+    ms = np.array(latencies) * 1000
+    return {
+        "p50": float(np.percentile(ms, 50)),
+        "p99": float(np.percentile(ms, 99)),
+        "bytes": size,
+    }
+
+
+async def run(args: argparse.Namespace) -> None:
+    app = build_app(build_proposals(args.proposals), build_receipt(args.lines))
+    encodings = ["identity", "gzip"] + (
+        ["br"] if compression.brotli is not None else []
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for payload, modes in (
+            ("recommendation", ("default", "fast", "v2")),
+            ("receipt", ("default", "fast")),
+        ):
+            for encoding in encodings:
+                for mode in modes:
+                    path = f"/{mode}/{payload}"
+                    await measure(client, path, encoding, 5)  # warm-up
+                    stats = await measure(client, path, encoding, args.requests)
+                    print(
+                        f"{payload:<14} {encoding:<8} {mode:<7} "
+                        f"p50={stats['p50']:7.2f}ms p99={stats['p99']:7.2f}ms "
+                        f"size={stats['bytes'] / 1024:8.1f}KiB"
+                    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--proposals", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=300, help="レシートの OCR 行数")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
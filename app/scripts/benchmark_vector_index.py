@@ -0,0 +1,96 @@
+"""レシピ特徴ベクトル向けインデックスの recall / レイテンシ計測。
+
+例:
+    python -m app.scripts.benchmark_vector_index --recipes 20000 --dim 64 --k 50
+"""
+
+import argparse
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.backend.services.recommendation.vector_index import (
+    ExactIndex,
+    HNSWIndex,
+    VectorIndex,
+)
+
+
+def make_vectors(
+    rng: np.random.Generator, count: int, dim: int, density: float
+) -> np.ndarray:
+    """0/1 の旗フラグ（density > 0）または連続値の埋め込みを模した行列を作る"""
+    if density > 0:
+        return (rng.random((count, dim)) < density).astype(np.float64)
+    return rng.normal(size=(count, dim))
+
+
+def measure(
+    index: VectorIndex, queries: np.ndarray, k: int, truth: List[set]
+) -> Dict[str, float]:
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        positions, _ = index.search(query, k)
+        latencies.append(time.perf_counter() - started)
+        hits += len(expected.intersection(positions.tolist()))
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "recall": hits / max(1, sum(len(expected) for expected in truth)),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=18)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument(
+        "--density",
+        type=float,
+        default=0.0,
+        help="0 より大きい場合は 0/1 ベクトル（現行の旗フラグ相当）",
+    )
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=100)
+    parser.add_argument(
+        "--ef-search", type=int, nargs="+", default=[50, 100, 200], dest="ef_search"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = make_vectors(rng, args.recipes, args.dim, args.density)
+    queries = make_vectors(rng, args.queries, args.dim, args.density)
+
+    started = time.perf_counter()
+    exact = ExactIndex(vectors)
+    print(f"exact  build={time.perf_counter() - started:.3f}s")
+    truth = [set(exact.search(query, args.k)[0].tolist()) for query in queries]
+    result = measure(exact, queries, args.k, truth)
+    print(
+        f"exact  recall@{args.k}={result['recall']:.3f} "
+        f"p50={result['p50_ms']:.3f}ms p95={result['p95_ms']:.3f}ms"
+    )
+
+    started = time.perf_counter()
+    hnsw = HNSWIndex(
+        vectors, m=args.m, ef_construction=args.ef_construction, seed=args.seed
+    )
+    print(f"hnsw   build={time.perf_counter() - started:.3f}s (m={args.m})")
+    for ef_search in args.ef_search:
+        hnsw.ef_search = ef_search
+        result = measure(hnsw, queries, args.k, truth)
+        print(
+            f"hnsw   ef_search={ef_search} recall@{args.k}={result['recall']:.3f} "
+            f"p50={result['p50_ms']:.3f}ms p95={result['p95_ms']:.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ CREATE TABLE users (
     email VARCHAR(255) NOT NULL UNIQUE,
     password_hash VARCHAR(255) NOT NULL,
     birthday DATE NULL,
+    token_version INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -78,7 +79,8 @@ CREATE TABLE recipes (
     flavor_salty TINYINT(1) NOT NULL DEFAULT 0,
     texture_stewed TINYINT(1) NOT NULL DEFAULT 0,
     texture_fried TINYINT(1) NOT NULL DEFAULT 0,
-    texture_stir_fried TINYINT(1) NOT NULL DEFAULT 0
+    texture_stir_fried TINYINT(1) NOT NULL DEFAULT 0,
+    feature_mask INT NOT NULL DEFAULT 0
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 CREATE TABLE recipe_foods (
@@ -135,20 +137,25 @@ CREATE TABLE ingredient_abstractions (
 
 CREATE TABLE refresh_tokens (
     id INT PRIMARY KEY AUTO_INCREMENT,
-    token VARCHAR(512) NOT NULL UNIQUE,
+    token_hash CHAR(64) NOT NULL UNIQUE,
     user_id INT NOT NULL,
     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     expires_at DATETIME NOT NULL,
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
-CREATE INDEX idx_refresh_tokens_token ON refresh_tokens(token);
+CREATE INDEX idx_refresh_tokens_user_created ON refresh_tokens(user_id, created_at);
+CREATE INDEX idx_refresh_tokens_expires_at ON refresh_tokens(expires_at);
 
 CREATE INDEX idx_foods_category_id ON foods(category_id);
 CREATE INDEX idx_user_foods_user_id ON user_foods(user_id);
 CREATE INDEX idx_user_foods_food_id ON user_foods(food_id);
+CREATE INDEX idx_user_foods_user_status ON user_foods(user_id, status);
+CREATE INDEX idx_user_foods_user_food_status ON user_foods(user_id, food_id, status);
 CREATE INDEX idx_user_food_transactions_user_food ON user_food_transactions(user_id, food_id, created_at);
 CREATE INDEX idx_user_food_transactions_user_food_id ON user_food_transactions(user_food_id);
+CREATE INDEX idx_recipes_cooking_time_id ON recipes(cooking_time, recipe_id);
+CREATE INDEX idx_recipes_calories_id ON recipes(calories, recipe_id);
 CREATE INDEX idx_recipe_foods_recipe_id ON recipe_foods(recipe_id);
 CREATE INDEX idx_recipe_foods_food_id ON recipe_foods(food_id);
 CREATE INDEX idx_user_recipe_history_user ON user_recipe_history(user_id, cooked_at DESC);
@@ -157,6 +164,9 @@ CREATE INDEX idx_receipts_user_id ON receipts(user_id);
 CREATE INDEX idx_raw_food_mappings_food_id ON raw_food_mappings(food_id);
 CREATE INDEX idx_ingredient_abstractions_food_id ON ingredient_abstractions(food_id);
 CREATE INDEX idx_ingredient_abstractions_resolved_food_name ON ingredient_abstractions(resolved_food_name);
+-- 食材名の部分一致検索用 (ngram)。ローマ字名の "to" 等が落ちないようストップワードを無効化
+SET SESSION innodb_ft_enable_stopword = OFF;
+CREATE FULLTEXT INDEX ft_foods_food_name ON foods(food_name) WITH PARSER ngram;
 
 DELIMITER //
 
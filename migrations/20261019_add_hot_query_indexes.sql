@@ -0,0 +1,9 @@
+-- Composite indexes backing the inventory list (user_id, status) and per-food
+-- stock lookups (user_id, food_id, status)
+CREATE INDEX idx_user_foods_user_status ON user_foods(user_id, status);
+CREATE INDEX idx_user_foods_user_food_status ON user_foods(user_id, food_id, status);
+
+-- n-gram full-text index for substring search on food names (GET /foods?q=).
+-- Stopwords are disabled so bigrams such as "to" / "at" in romaji names are kept.
+SET SESSION innodb_ft_enable_stopword = OFF;
+CREATE FULLTEXT INDEX ft_foods_food_name ON foods(food_name) WITH PARSER ngram;
@@ -0,0 +1,24 @@
+-- Packed copy of the 18 recipe flag columns (bit i = RECIPE_FLAG_FIELDS[i] in
+-- app/backend/services/recipe_flags.py). The ORM keeps it in sync on insert/update.
+ALTER TABLE recipes
+    ADD COLUMN feature_mask INT NOT NULL DEFAULT 0 AFTER texture_stir_fried;
+
+UPDATE recipes SET feature_mask =
+    is_japanese |
+    (is_western << 1) |
+    (is_chinese << 2) |
+    (is_main_dish << 3) |
+    (is_side_dish << 4) |
+    (is_soup << 5) |
+    (is_dessert << 6) |
+    (type_meat << 7) |
+    (type_seafood << 8) |
+    (type_vegetarian << 9) |
+    (type_composite << 10) |
+    (type_other << 11) |
+    (flavor_sweet << 12) |
+    (flavor_spicy << 13) |
+    (flavor_salty << 14) |
+    (texture_stewed << 15) |
+    (texture_fried << 16) |
+    (texture_stir_fried << 17);
@@ -0,0 +1,3 @@
+-- Composite indexes backing keyset pagination on GET /recipes/search
+CREATE INDEX idx_recipes_cooking_time_id ON recipes(cooking_time, recipe_id);
+CREATE INDEX idx_recipes_calories_id ON recipes(calories, recipe_id);
@@ -0,0 +1,3 @@
+-- Bumped on password change to revoke previously issued access tokens
+ALTER TABLE users
+    ADD COLUMN token_version INT NOT NULL DEFAULT 0 AFTER birthday;
@@ -0,0 +1,16 @@
+-- Store refresh tokens as sha256 digests instead of the raw JWT
+DELETE FROM refresh_tokens WHERE expires_at < UTC_TIMESTAMP();
+
+ALTER TABLE refresh_tokens
+    ADD COLUMN token_hash CHAR(64) NULL AFTER id;
+
+UPDATE refresh_tokens SET token_hash = SHA2(token, 256);
+
+ALTER TABLE refresh_tokens
+    MODIFY COLUMN token_hash CHAR(64) NOT NULL,
+    ADD UNIQUE INDEX uq_refresh_tokens_token_hash (token_hash),
+    DROP INDEX idx_refresh_tokens_token,
+    DROP COLUMN token;
+
+CREATE INDEX idx_refresh_tokens_user_created ON refresh_tokens(user_id, created_at);
+CREATE INDEX idx_refresh_tokens_expires_at ON refresh_tokens(expires_at);
@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import importlib
+from collections import OrderedDict
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.backend.api.routers.auth_routes import get_current_user
+from app.backend.api.routers.auth_routes import router as auth_router
+from app.backend.api.routers.users import router as users_router
+from app.backend.database import Base, get_db
+from app.backend.models import User
+from app.backend.services import passwords
+
+# routers パッケージは auth_routes という名前で APIRouter を公開しているためモジュールを直接取る
+auth_routes = importlib.import_module("app.backend.api.routers.auth_routes")
+
+
+def _setup_database():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return engine, SessionLocal
+
+
+def _build_test_app(SessionLocal):
+    app = FastAPI()
+    app.include_router(auth_router, prefix="/api/v1/auth")
+    app.include_router(users_router, prefix="/api/v1/users")
+
+    @app.get("/whoami")
+    def whoami(current_user=Depends(get_current_user)):
+        return {"user_id": current_user.user_id}
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return app
+
+
+def test_access_token_is_verified_without_user_query_until_password_change(
+    monkeypatch,
+):
+    monkeypatch.setattr(passwords, "PASSWORD_HASH_ITERATIONS", 1000)
+    engine, SessionLocal = _setup_database()
+    app = _build_test_app(SessionLocal)
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    credentials = {"email": "alice@example.com", "password": "password123"}
+    try:
+        with TestClient(app) as client:
+            registered = client.post(
+                "/api/v1/auth/register", json={**credentials, "username": "alice"}
+            )
+            assert registered.status_code == 201
+            user_id = registered.json()["user_id"]
+
+            token = client.post("/api/v1/auth/login", json=credentials).json()
+            headers = {"Authorization": f"Bearer {token['access_token']}"}
+            assert client.get("/whoami", headers=headers).json() == {"user_id": user_id}
+
+            statements.clear()
+            assert client.get("/whoami", headers=headers).status_code == 200
+            assert statements == []
+
+            changed = client.put(
+                "/api/v1/users/me/password",
+                json={"old_password": "password123", "new_password": "password456"},
+                headers=headers,
+            )
+            assert changed.status_code == 200
+
+            revoked = client.get("/whoami", headers=headers)
+            assert revoked.status_code == 401
+            refreshed = client.post(
+                "/api/v1/auth/refresh",
+                json={"refresh_token": token["refresh_token"]},
+            )
+            assert refreshed.status_code == 401
+
+            token = client.post(
+                "/api/v1/auth/login",
+                json={**credentials, "password": "password456"},
+            ).json()
+            headers = {"Authorization": f"Bearer {token['access_token']}"}
+            me = client.get("/api/v1/users/me", headers=headers)
+            assert me.status_code == 200
+            assert me.json()["email"] == "alice@example.com"
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_cached_principal_is_reloaded_for_newer_token_version(monkeypatch):
+    monkeypatch.setattr(passwords, "PASSWORD_HASH_ITERATIONS", 1000)
+    monkeypatch.setattr(auth_routes, "_PRINCIPAL_CACHE", OrderedDict())
+    engine, SessionLocal = _setup_database()
+    app = _build_test_app(SessionLocal)
+    credentials = {"email": "carol@example.com", "password": "password123"}
+    try:
+        with TestClient(app) as client:
+            client.post(
+                "/api/v1/auth/register", json={**credentials, "username": "carol"}
+            )
+            token = client.post("/api/v1/auth/login", json=credentials).json()
+            old_headers = {"Authorization": f"Bearer {token['access_token']}"}
+            # このワーカーのキャッシュに版数 0 の principal を載せる
+            assert client.get("/whoami", headers=old_headers).status_code == 200
+
+            # 別ワーカーでのパスワード変更（DB の版数だけが進む）
+            with SessionLocal() as session:
+                user = session.query(User).filter_by(email=credentials["email"]).one()
+                user.token_version = 1
+                session.commit()
+                new_token = auth_routes._create_access_token(user)
+            new_headers = {"Authorization": f"Bearer {new_token}"}
+
+            assert client.get("/whoami", headers=new_headers).status_code == 200
+            revoked = client.get("/whoami", headers=old_headers)
+            assert revoked.status_code == 401
+            assert revoked.json()["detail"] == "Token revoked"
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_login_rehashes_legacy_sha256_password(monkeypatch):
+    monkeypatch.setattr(passwords, "PASSWORD_HASH_ITERATIONS", 1000)
+    engine, SessionLocal = _setup_database()
+    app = _build_test_app(SessionLocal)
+    legacy_hash = "abcd$" + hashlib.sha256(b"abcdpassword123").hexdigest()
+    with SessionLocal() as session:
+        session.add(
+            User(
+                user_id=5,
+                username="legacy",
+                email="legacy@example.com",
+                password_hash=legacy_hash,
+            )
+        )
+        session.commit()
+
+    credentials = {"email": "legacy@example.com", "password": "password123"}
+    try:
+        with TestClient(app) as client:
+            assert (
+                client.post("/api/v1/auth/login", json=credentials).status_code == 200
+            )
+            with SessionLocal() as session:
+                stored = session.get(User, 5).password_hash
+            assert stored.startswith("pbkdf2_sha256$1000$")
+            assert not passwords.needs_rehash(stored)
+
+            assert (
+                client.post("/api/v1/auth/login", json=credentials).status_code == 200
+            )
+            wrong = client.post(
+                "/api/v1/auth/login", json={**credentials, "password": "nope12345"}
+            )
+            assert wrong.status_code == 401
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_unknown_email_login_hashes_dummy_password_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(passwords, "PASSWORD_HASH_ITERATIONS", 1000)
+    monkeypatch.setattr(auth_routes, "_DUMMY_PASSWORD_HASH", None)
+    engine, SessionLocal = _setup_database()
+    app = _build_test_app(SessionLocal)
+    hashed_on_loop = []
+    original_hash = passwords.hash_password
+
+    def _hash(password, iterations=None):
+        try:
+            asyncio.get_running_loop()
+            hashed_on_loop.append(True)
+        except RuntimeError:
+            hashed_on_loop.append(False)
+        return original_hash(password, iterations)
+
+    monkeypatch.setattr(passwords, "hash_password", _hash)
+    credentials = {"email": "nobody@example.com", "password": "password123"}
+    try:
+        with TestClient(app) as client:
+            for _ in range(2):
+                resp = client.post("/api/v1/auth/login", json=credentials)
+                assert resp.status_code == 401
+        # ダミーハッシュは 1 回だけ、イベントループ外で計算される
+        assert hashed_on_loop == [False]
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
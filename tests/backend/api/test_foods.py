@@ -0,0 +1,136 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.backend.api.routers.auth_routes import (
+    _create_access_token,
+    invalidate_principal,
+)
+from app.backend.api.routers.foods import router as foods_router
+from app.backend.database import Base, async_sessionmaker_for, get_async_db
+from app.backend.models import Food, FoodCategory, User
+
+
+def test_food_search_runs_on_async_session_with_bearer_token(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'foods.db'}")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as session:
+        session.add(
+            User(user_id=1, username="u", email="u@example.com", password_hash="x")
+        )
+        session.add(FoodCategory(category_id=1, category_name="野菜"))
+        session.add_all(
+            [
+                Food(food_id=1, food_name="Tomato", category_id=1),
+                Food(food_id=2, food_name="Cherry tomato", category_id=1),
+                Food(food_id=3, food_name="Onion", category_id=1),
+                Food(
+                    food_id=4,
+                    food_name="Tomato sauce",
+                    category_id=1,
+                    is_trackable=False,
+                ),
+            ]
+        )
+        session.commit()
+    AsyncSessionLocal = async_sessionmaker_for(engine, poolclass=NullPool)
+
+    app = FastAPI()
+    app.include_router(foods_router, prefix="/api/v1/foods")
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    invalidate_principal(1)
+    token = _create_access_token(
+        SimpleNamespace(user_id=1, email="u@example.com", token_version=0)
+    )
+    try:
+        with TestClient(app) as client:
+            assert client.get("/api/v1/foods/").status_code == 401
+            resp = client.get(
+                "/api/v1/foods/",
+                params={"q": "TOMATO"},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            assert resp.status_code == 200
+            body = resp.json()
+            assert body["total"] == 2
+            assert [food["food_name"] for food in body["foods"]] == [
+                "Cherry tomato",
+                "Tomato",
+            ]
+            assert body["foods"][0]["category_name"] == "野菜"
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_autocomplete_serves_from_memory_and_refreshes_after_food_writes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'autocomplete.db'}")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as session:
+        session.add(
+            User(user_id=1, username="u", email="u@example.com", password_hash="x")
+        )
+        session.add(FoodCategory(category_id=1, category_name="野菜"))
+        session.add_all(
+            [
+                Food(food_id=1, food_name="トマト", category_id=1),
+                Food(food_id=2, food_name="ミニトマト", category_id=1),
+                Food(food_id=3, food_name="ブロッコリー", category_id=1),
+            ]
+        )
+        session.commit()
+    AsyncSessionLocal = async_sessionmaker_for(engine, poolclass=NullPool)
+    statements = []
+    event.listen(
+        AsyncSessionLocal.kw["bind"].sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+
+    app = FastAPI()
+    app.include_router(foods_router, prefix="/api/v1/foods")
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    invalidate_principal(1)
+    token = _create_access_token(
+        SimpleNamespace(user_id=1, email="u@example.com", token_version=0)
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        with TestClient(app) as client:
+
+            def names(q):
+                resp = client.get(
+                    "/api/v1/foods/autocomplete", params={"q": q}, headers=headers
+                )
+                assert resp.status_code == 200
+                return [food["food_name"] for food in resp.json()["foods"]]
+
+            assert names("とま") == ["トマト", "ミニトマト"]
+            statements.clear()
+            assert names("tomato") == ["トマト", "ミニトマト"]
+            assert names("ブロッコリ") == ["ブロッコリー"]
+            assert statements == []
+
+            with SessionLocal() as session:
+                session.add(Food(food_id=4, food_name="トマト缶", category_id=1))
+                session.commit()
+            assert names("トマト") == ["トマト", "トマト缶", "ミニトマト"]
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
@@ -4,27 +4,36 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
-from app.backend.api.routers.auth_routes import get_current_user
+from app.backend.api.routers.auth_routes import (
+    get_current_user,
+    get_current_user_async,
+)
 from app.backend.api.routers.ingredients import router as ingredients_router
-from app.backend.database import Base, get_db
-from app.backend.models import Food, FoodCategory, User, UserFood
+from app.backend.database import Base, async_sessionmaker_for, get_async_db, get_db
+from app.backend.models import Food, FoodCategory, User, UserFood, UserFoodTransaction
 
 _ = (Food, FoodCategory, UserFood)
 
 
-def _build_test_app():
+def _build_test_app(AsyncSessionLocal):
     app = FastAPI()
     app.include_router(ingredients_router, prefix="/api/v1/ingredients")
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
     return app
 
 
-def _setup_database():
+def _setup_database(tmp_path):
+    # 一覧は非同期セッション (aiosqlite) で読むため、両方から見えるファイル DB を使う
     engine = create_engine(
-        "sqlite://",
+        f"sqlite:///{tmp_path / 'ingredients.db'}",
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
     )
     Base.metadata.create_all(bind=engine)
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -49,7 +58,8 @@ def _setup_database():
             ]
         )
         session.commit()
-    return engine, TestingSessionLocal
+    AsyncSessionLocal = async_sessionmaker_for(engine, poolclass=NullPool)
+    return engine, TestingSessionLocal, AsyncSessionLocal
 
 
 def _get_food_id(session_factory, name: str) -> int:
@@ -59,9 +69,9 @@ def _get_food_id(session_factory, name: str) -> int:
         return food.food_id
 
 
-def test_create_and_list_ingredients():
-    engine, SessionLocal = _setup_database()
-    app = _build_test_app()
+def test_create_and_list_ingredients(tmp_path):
+    engine, SessionLocal, AsyncSessionLocal = _setup_database(tmp_path)
+    app = _build_test_app(AsyncSessionLocal)
 
     def override_get_db():
         db = SessionLocal()
@@ -75,6 +85,7 @@ def test_create_and_list_ingredients():
 
     app.dependency_overrides[get_db] = override_get_db
     app.dependency_overrides[get_current_user] = override_get_current_user
+    app.dependency_overrides[get_current_user_async] = override_get_current_user
 
     try:
         with TestClient(app) as client:
@@ -157,9 +168,9 @@ def test_create_and_list_ingredients():
         engine.dispose()
 
 
-def test_delete_ingredient():
-    engine, SessionLocal = _setup_database()
-    app = _build_test_app()
+def test_delete_ingredient(tmp_path):
+    engine, SessionLocal, AsyncSessionLocal = _setup_database(tmp_path)
+    app = _build_test_app(AsyncSessionLocal)
 
     def override_get_db():
         db = SessionLocal()
@@ -173,6 +184,7 @@ def test_delete_ingredient():
 
     app.dependency_overrides[get_db] = override_get_db
     app.dependency_overrides[get_current_user] = override_get_current_user
+    app.dependency_overrides[get_current_user_async] = override_get_current_user
 
     try:
         with TestClient(app) as client:
@@ -203,3 +215,70 @@ def test_delete_ingredient():
     finally:
         Base.metadata.drop_all(bind=engine)
         engine.dispose()
+
+
+def test_batch_create_and_consume_report_per_item_results(tmp_path):
+    engine, SessionLocal, AsyncSessionLocal = _setup_database(tmp_path)
+    app = _build_test_app(AsyncSessionLocal)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(user_id=1)
+    app.dependency_overrides[get_current_user_async] = lambda: SimpleNamespace(
+        user_id=1
+    )
+
+    try:
+        with TestClient(app) as client:
+            create_resp = client.post(
+                "/api/v1/ingredients/batch",
+                json={
+                    "items": [
+                        {"food_id": 1, "quantity_g": 100},
+                        {"food_id": 2, "quantity_g": 50},
+                        {"food_id": 1, "quantity_g": 20},
+                        {"food_id": 999, "quantity_g": 10},
+                    ]
+                },
+            )
+            assert create_resp.status_code == 200
+            created = create_resp.json()
+            assert (created["succeeded"], created["failed"]) == (3, 1)
+            assert created["results"][3]["error"]
+            tomato = created["results"][0]["ingredient"]
+            assert tomato["food_name"] == "トマト"
+            assert tomato["quantity_g"] == 120.0
+            cucumber_id = created["results"][1]["ingredient"]["user_food_id"]
+
+            consume_resp = client.post(
+                "/api/v1/ingredients/consume-batch",
+                json={
+                    "items": [
+                        {"user_food_id": tomato["user_food_id"], "quantity_g": 20},
+                        {"user_food_id": cucumber_id, "quantity_g": 80},
+                        {"user_food_id": 9999, "quantity_g": 1},
+                    ]
+                },
+            )
+            assert consume_resp.status_code == 200
+            consumed = consume_resp.json()
+            assert [r["ok"] for r in consumed["results"]] == [True, False, False]
+            assert consumed["results"][0]["ingredient"]["quantity_g"] == 100.0
+
+        with SessionLocal() as session:
+            transactions = session.query(UserFoodTransaction).all()
+            assert len(transactions) == 4
+            quantities = {
+                row.food_id: float(row.quantity_g)
+                for row in session.query(UserFood).all()
+            }
+            assert quantities == {1: 100.0, 2: 50.0}
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
@@ -0,0 +1,54 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy import exc as sa_exc
+
+from app.backend import database
+from app.backend.api.routers import metrics as metrics_module  # type: ignore[import]
+from app.backend.api.routers.metrics import router as metrics_router
+
+
+def test_pool_metrics_report_occupancy_waits_and_timeouts(tmp_path, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=database.InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+        pool_logging_name="metrics-test",
+    )
+    monkeypatch.setattr(database, "_MONITORED_ENGINES", {"test": engine})
+    monkeypatch.setattr(database, "_POOL_STATS", {})
+
+    app = FastAPI()
+    app.include_router(metrics_router, prefix="/api/v1/metrics")
+    headers = {"X-Metrics-Token": "secret"}
+    try:
+        with TestClient(app) as client:
+            # トークン未設定なら公開しない
+            monkeypatch.setattr(metrics_module, "METRICS_TOKEN", None)
+            disabled = client.get("/api/v1/metrics/db-pool", headers=headers)
+            assert disabled.status_code == 404
+
+            monkeypatch.setattr(metrics_module, "METRICS_TOKEN", "secret")
+            assert client.get("/api/v1/metrics/db-pool").status_code == 403
+
+            first, second = engine.connect(), engine.connect()
+            with pytest.raises(sa_exc.TimeoutError):
+                engine.connect()
+            busy = client.get("/api/v1/metrics/db-pool", headers=headers).json()
+            pool = busy["pools"]["test"]
+            assert pool["pool_class"] == "InstrumentedQueuePool"
+            assert pool["checked_out"] == 2
+            assert pool["overflow"] == 1
+            assert pool["checkouts"] == 2
+            assert pool["timeouts"] == 1
+            assert pool["wait_ms_max"] >= 50
+
+            first.close()
+            second.close()
+            idle = client.get("/api/v1/metrics/db-pool", headers=headers).json()
+            assert idle["pools"]["test"]["checked_out"] == 0
+    finally:
+        engine.dispose()
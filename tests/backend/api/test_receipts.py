@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import importlib
 import io
+from decimal import Decimal
 from pathlib import Path
 from types import SimpleNamespace
 from typing import Any
@@ -11,8 +12,18 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.backend.api.routers.auth_routes import get_current_user
 from app.backend.database import Base, get_db
-from app.backend.models import Food, FoodCategory, IngredientAbstraction
+from app.backend.models import (
+    Food,
+    FoodCategory,
+    IngredientAbstraction,
+    IngredientStatus,
+    InventoryChangeSource,
+    User,
+    UserFood,
+    UserFoodTransaction,
+)
 
 receipts_module = importlib.import_module("app.backend.api.routers.receipts")
 receipts_router = receipts_module.router
@@ -356,3 +367,96 @@ def test_manual_resolution_persists_to_db(tmp_path):
         app.dependency_overrides.pop(get_db, None)
         Base.metadata.drop_all(engine)
         engine.dispose()
+
+
+def test_commit_receipt_to_inventory_bulk_upserts_once(tmp_path, monkeypatch):
+    db_path = tmp_path / "receipt_commit.db"
+    engine = create_engine(
+        f"sqlite:///{db_path}", connect_args={"check_same_thread": False}
+    )
+    TestingSession = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+
+    with TestingSession() as session:
+        session.add(
+            User(user_id=1, username="u", email="u@example.com", password_hash="x")
+        )
+        category = FoodCategory(category_name="果物")
+        session.add(category)
+        session.flush()
+        session.add_all(
+            [
+                Food(food_id=10, food_name="りんご", category_id=category.category_id),
+                Food(food_id=11, food_name="牛乳", category_id=category.category_id),
+            ]
+        )
+        session.add(
+            UserFood(
+                user_id=1,
+                food_id=10,
+                quantity_g=Decimal("50"),
+                status=IngredientStatus.USED,
+            )
+        )
+        session.commit()
+
+    receipt_id = 9001
+    items = [
+        {"item_id": 1, "raw_text": "りんご", "food_id": 10, "food_name": "りんご"},
+        {
+            "item_id": 2,
+            "raw_text": "牛乳 1L",
+            "food_id": 11,
+            "food_name": "牛乳",
+            "quantity": 1,
+            "unit": "L",
+        },
+        {"item_id": 3, "raw_text": "レジ袋", "food_id": None},
+        {"item_id": 4, "raw_text": "不明", "food_id": 999, "food_name": "不明"},
+    ]
+    monkeypatch.setitem(
+        receipts_module_typed.RECEIPTS,
+        receipt_id,
+        {"receipt_id": receipt_id, "status": "completed", "items": items},
+    )
+
+    def _override_get_db():
+        db = TestingSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = _build_test_app()
+    app.dependency_overrides[get_db] = _override_get_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(user_id=1)
+
+    try:
+        with TestClient(app) as client:
+            url = f"/api/v1/receipts/{receipt_id}/commit-to-inventory"
+            resp = client.post(url)
+            assert resp.status_code == 200, resp.text
+            body = resp.json()
+            committed = {row["food_id"]: row for row in body["committed"]}
+            assert committed[10]["quantity_g"] == 150.0
+            assert committed[11]["added_quantity_g"] == 1000.0
+            assert sorted(body["skipped_item_ids"]) == [3, 4]
+
+            again = client.post(url)
+            assert again.status_code == 409
+
+        with TestingSession() as session:
+            stocks = {row.food_id: row for row in session.query(UserFood).all()}
+            assert stocks[10].status == IngredientStatus.UNUSED
+            transactions = session.query(UserFoodTransaction).all()
+            assert len(transactions) == 2
+            assert {row.source_type for row in transactions} == {
+                InventoryChangeSource.OCR_IMPORT
+            }
+            assert {row.source_reference for row in transactions} == {
+                f"receipt:{receipt_id}:1",
+                f"receipt:{receipt_id}:2",
+            }
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
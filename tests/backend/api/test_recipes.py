@@ -4,9 +4,9 @@ from types import SimpleNamespace
 
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.backend.api.routers import (
     recipes as recipes_router_module,  # type: ignore[import]
@@ -15,13 +15,15 @@ from app.backend.api.routers.auth_routes import get_current_user
 from app.backend.api.routers.recipes import (
     router as recipes_router,  # type: ignore[import]
 )
-from app.backend.database import Base, get_db
+from app.backend.database import Base, async_sessionmaker_for, get_async_db, get_db
+from app.backend.services import recipe_loader
 from app.backend.models import (
     Food,
     FoodCategory,
     IngredientStatus,
     User,
     UserFood,
+    UserFoodTransaction,
 )
 from app.backend.models.recipe import (
     Recipe,
@@ -30,11 +32,11 @@ from app.backend.models.recipe import (
 )  # type: ignore[import]
 
 
-def _setup_database():
+def _setup_database(tmp_path):
+    # 非同期ルート (aiosqlite) と同じ DB を共有するためファイルを使う
     engine = create_engine(
-        "sqlite://",
+        f"sqlite:///{tmp_path / 'recipes.db'}",
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
     )
     Base.metadata.create_all(bind=engine)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -84,10 +86,11 @@ def _setup_database():
         session.add(stock)
         session.commit()
 
-    return engine, SessionLocal
+    AsyncSessionLocal = async_sessionmaker_for(engine, poolclass=NullPool)
+    return engine, SessionLocal, AsyncSessionLocal
 
 
-def _build_test_app(SessionLocal):
+def _build_test_app(SessionLocal, AsyncSessionLocal):
     app = FastAPI()
     app.include_router(recipes_router, prefix="/api/v1/recipes")
 
@@ -98,14 +101,19 @@ def _build_test_app(SessionLocal):
         finally:
             db.close()
 
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
 
     return app
 
 
-def test_recipe_detail_includes_stock_levels():
-    engine, SessionLocal = _setup_database()
-    app = _build_test_app(SessionLocal)
+def test_recipe_detail_includes_stock_levels(tmp_path):
+    engine, SessionLocal, AsyncSessionLocal = _setup_database(tmp_path)
+    app = _build_test_app(SessionLocal, AsyncSessionLocal)
 
     # inject optional current user for stock lookup
     app.dependency_overrides[recipes_router_module._optional_current_user] = (
@@ -132,9 +140,9 @@ def test_recipe_detail_includes_stock_levels():
         engine.dispose()
 
 
-def test_cook_recipe_consumes_inventory():
-    engine, SessionLocal = _setup_database()
-    app = _build_test_app(SessionLocal)
+def test_cook_recipe_consumes_inventory(tmp_path):
+    engine, SessionLocal, AsyncSessionLocal = _setup_database(tmp_path)
+    app = _build_test_app(SessionLocal, AsyncSessionLocal)
 
     app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(user_id=1)
 
@@ -165,6 +173,61 @@ def test_cook_recipe_consumes_inventory():
         engine.dispose()
 
 
+def test_cook_batch_aggregates_requirements_and_rolls_back_on_shortage(tmp_path):
+    engine, SessionLocal, AsyncSessionLocal = _setup_database(tmp_path)
+    app = _build_test_app(SessionLocal, AsyncSessionLocal)
+
+    with SessionLocal() as session:
+        session.add(Recipe(recipe_id=2, recipe_name="ポテトサラダ", calories=200))
+        session.flush()
+        session.add(RecipeFood(recipe_id=2, food_id=1, quantity_g=Decimal("50")))
+        session.commit()
+
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(user_id=1)
+
+    try:
+        with TestClient(app) as client:
+            short_resp = client.post(
+                "/api/v1/recipes/cook-batch",
+                json={"items": [{"recipe_id": 1}, {"recipe_id": 2, "servings": 2}]},
+            )
+            assert short_resp.status_code == 400
+            assert "じゃがいも" in short_resp.json()["detail"]
+
+            missing_resp = client.post(
+                "/api/v1/recipes/cook-batch",
+                json={"items": [{"recipe_id": 1}, {"recipe_id": 99}]},
+            )
+            assert missing_resp.status_code == 404
+
+            ok_resp = client.post(
+                "/api/v1/recipes/cook-batch",
+                json={"items": [{"recipe_id": 1}, {"recipe_id": 2, "servings": 1}]},
+            )
+            assert ok_resp.status_code == 200
+            body = ok_resp.json()
+            assert [r["recipe_id"] for r in body["recipes"]] == [1, 2]
+            assert len(body["consumed"]) == 1
+            assert body["consumed"][0]["consumed_quantity_g"] == 170.0
+            assert body["consumed"][0]["remaining_quantity_g"] == 30.0
+
+        with SessionLocal() as session:
+            history = session.query(UserRecipeHistory).order_by(
+                UserRecipeHistory.recipe_id
+            )
+            assert [(row.recipe_id, row.calories_total) for row in history] == [
+                (1, 450),
+                (2, 200),
+            ]
+            transactions = session.query(UserFoodTransaction).all()
+            assert len(transactions) == 1
+            assert float(transactions[0].delta_g) == -170.0
+            assert float(transactions[0].quantity_after_g) == 30.0
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
 def test_static_catalog_lists_available_recipe_files(tmp_path, monkeypatch):
     app = FastAPI()
     app.include_router(recipes_router, prefix="/api/v1/recipes")
@@ -208,3 +271,158 @@ def test_static_catalog_lists_available_recipe_files(tmp_path, monkeypatch):
         assert first["title"] == "テスト肉じゃが"
         assert first["detail_path"].endswith("0001.html")
         assert first["ingredients"] == ["じゃがいも", "にんじん"]
+
+
+def test_static_catalog_supports_etag_gzip_and_reload(tmp_path, monkeypatch):
+    app = FastAPI()
+    app.include_router(recipes_router, prefix="/api/v1/recipes")
+
+    html_dir = tmp_path / "recipe-list"
+    html_dir.mkdir()
+    for idx in range(1, 41):
+        (html_dir / f"{idx:04d}.html").write_text("<h1>dummy</h1>", encoding="utf-8")
+    recipes_json_path = tmp_path / "recipes.json"
+    entries = [
+        {"name": f"レシピ{idx}", "ingredients": [{"name": "じゃがいも"}]}
+        for idx in range(1, 41)
+    ]
+    recipes_json_path.write_text(json.dumps(entries), encoding="utf-8")
+
+    monkeypatch.setattr(recipes_router_module, "STATIC_RECIPE_HTML_DIR", html_dir)
+    monkeypatch.setattr(
+        recipes_router_module, "STATIC_RECIPE_JSON_PATH", recipes_json_path
+    )
+
+    with TestClient(app) as client:
+        first = client.get(
+            "/api/v1/recipes/static-catalog", headers={"Accept-Encoding": "gzip"}
+        )
+        assert first.status_code == 200
+        assert first.headers["content-encoding"] == "gzip"
+        assert len(first.json()) == 40
+        etag = first.headers["etag"]
+
+        cached = client.get(
+            "/api/v1/recipes/static-catalog", headers={"If-None-Match": etag}
+        )
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+
+        recipes_json_path.write_text(json.dumps(entries[:1]), encoding="utf-8")
+        updated = client.get(
+            "/api/v1/recipes/static-catalog", headers={"If-None-Match": etag}
+        )
+        assert updated.status_code == 200
+        assert updated.headers["etag"] != etag
+        assert [row["title"] for row in updated.json()] == ["レシピ1"]
+
+
+def test_search_recipes_filters_and_pages_with_cursor(tmp_path):
+    engine, SessionLocal, AsyncSessionLocal = _setup_database(tmp_path)
+    app = _build_test_app(SessionLocal, AsyncSessionLocal)
+
+    with SessionLocal() as session:
+        session.add_all(
+            [
+                Recipe(
+                    recipe_id=10 + idx,
+                    recipe_name=f"スープ{idx}",
+                    cooking_time=10 + idx,
+                    calories=100 * idx,
+                    is_soup=True,
+                    texture_fried=idx == 3,
+                )
+                for idx in range(1, 6)
+            ]
+        )
+        session.commit()
+
+    try:
+        with TestClient(app) as client:
+            params = {
+                "flags": "is_soup",
+                "exclude_flags": "texture_fried",
+                "max_calories": 450,
+                "sort": "cooking_time",
+                "limit": 2,
+            }
+            first = client.get("/api/v1/recipes/search", params=params)
+            assert first.status_code == 200
+            page = first.json()
+            assert [item["recipe_id"] for item in page["items"]] == [11, 12]
+            assert "is_soup" in page["items"][0]["flags"]
+            assert page["next_cursor"]
+
+            second = client.get(
+                "/api/v1/recipes/search",
+                params={**params, "cursor": page["next_cursor"]},
+            )
+            assert second.status_code == 200
+            page = second.json()
+            assert [item["recipe_id"] for item in page["items"]] == [14]
+            assert page["next_cursor"] is None
+
+            mismatched = client.get(
+                "/api/v1/recipes/search",
+                params={"cursor": first.json()["next_cursor"]},
+            )
+            assert mismatched.status_code == 400
+            unknown_flag = client.get(
+                "/api/v1/recipes/search", params={"flags": "is_spicy"}
+            )
+            assert unknown_flag.status_code == 400
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_recipe_detail_reuses_cached_recipe_and_inventory_snapshot(
+    tmp_path, monkeypatch
+):
+    engine, SessionLocal, AsyncSessionLocal = _setup_database(tmp_path)
+    app = _build_test_app(SessionLocal, AsyncSessionLocal)
+    app.dependency_overrides[recipes_router_module._optional_current_user] = (
+        lambda: SimpleNamespace(user_id=1)
+    )
+
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    event.listen(
+        AsyncSessionLocal.kw["bind"].sync_engine, "before_cursor_execute", _count
+    )
+
+    try:
+        with TestClient(app) as client:
+            assert client.get("/api/v1/recipes/1").status_code == 200
+            statements.clear()
+
+            resp = client.get("/api/v1/recipes/1")
+            assert resp.status_code == 200
+            assert resp.json()["ingredients"][0]["available_quantity_g"] == 200.0
+            assert statements == []
+
+            with SessionLocal() as session:
+                stock = session.get(UserFood, 1)
+                stock.quantity_g = Decimal("150")
+                session.commit()
+            resp = client.get("/api/v1/recipes/1")
+            assert resp.json()["ingredients"][0]["available_quantity_g"] == 150.0
+
+            with SessionLocal() as session:
+                recipe = session.get(Recipe, 1)
+                recipe.recipe_name = "更新後の肉じゃが"
+                session.commit()
+            monkeypatch.setattr(
+                recipe_loader,
+                "_CATALOG_VERSION",
+                recipe_loader.get_recipe_catalog_version() + 1,
+            )
+            resp = client.get("/api/v1/recipes/1")
+            assert resp.json()["recipe_name"] == "更新後の肉じゃが"
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
@@ -1,12 +1,14 @@
+from datetime import date, timedelta
 from types import SimpleNamespace
 
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.backend.api.routers import recommendation as recommendation_module
+from app.backend.api.routers.auth_routes import get_current_user
 from app.backend.api.routers.recommendation import router as recommendation_router
 from app.backend.database import Base, get_db
 from app.backend.models import (
@@ -17,6 +19,7 @@ from app.backend.models import (
     RecipeFood,
     User,
     UserFood,
+    UserRecipeHistory,
 )
 
 
@@ -197,3 +200,154 @@ def test_unauthenticated_request_requires_inventory():
     finally:
         Base.metadata.drop_all(bind=engine)
         engine.dispose()
+
+
+def test_repeated_proposal_is_served_from_cache_until_history_changes():
+    engine, SessionLocal = _setup_database()
+    app = _build_test_app()
+
+    app.dependency_overrides[get_db] = _override_db(SessionLocal)
+    app.dependency_overrides[recommendation_module._optional_current_user] = (
+        lambda: None
+    )
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    payload = {
+        "user_id": 2,
+        "max_time": 60,
+        "max_calories": 800,
+        "allergies": [],
+        "inventory": [{"name": "豚肉", "quantity": "200"}],
+    }
+
+    try:
+        with TestClient(app) as client:
+            first = client.post("/api/v1/recommendation/propose", json=payload)
+            assert first.status_code == 200
+
+            statements.clear()
+            second = client.post("/api/v1/recommendation/propose", json=payload)
+            assert second.json() == first.json()
+            assert statements == []
+
+            changed = client.post(
+                "/api/v1/recommendation/propose",
+                json={**payload, "inventory": [{"name": "豚肉", "quantity": "50"}]},
+            )
+            assert changed.status_code == 200
+            assert statements
+
+            with SessionLocal() as session:
+                session.execute(
+                    insert(UserRecipeHistory),
+                    [{"user_id": 2, "recipe_id": 202, "servings": 1}],
+                )
+                session.commit()
+
+            statements.clear()
+            third = client.post("/api/v1/recommendation/propose", json=payload)
+            assert third.status_code == 200
+            assert statements
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_use_it_up_orders_by_expiring_grams_covered():
+    engine, SessionLocal = _setup_database()
+    app = _build_test_app()
+
+    app.dependency_overrides[get_db] = _override_db(SessionLocal)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(user_id=1)
+
+    with SessionLocal() as session:
+        carrot = session.get(UserFood, 1)
+        carrot.expiration_date = date.today() + timedelta(days=1)
+        session.add(
+            UserFood(
+                user_id=1,
+                food_id=2,
+                quantity_g=50,
+                expiration_date=date.today() + timedelta(days=2),
+                status=IngredientStatus.UNUSED,
+            )
+        )
+        session.commit()
+
+    try:
+        with TestClient(app) as client:
+            resp = client.get("/api/v1/recommendation/use-it-up")
+            assert resp.status_code == 200
+            data = resp.json()
+            assert [item["recipe_id"] for item in data] == [101, 202]
+            assert [item["expiring_grams"] for item in data] == [100.0, 50.0]
+            assert data[1]["expiring_items"] == ["豚肉"]
+            assert all(item["is_boosted"] for item in data)
+
+            none_today = client.get(
+                "/api/v1/recommendation/use-it-up", params={"days": 0}
+            )
+            assert none_today.json() == []
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_v2_proposal_hoists_shared_fields_out_of_results():
+    engine, SessionLocal = _setup_database()
+    app = _build_test_app()
+
+    app.dependency_overrides[get_db] = _override_db(SessionLocal)
+    app.dependency_overrides[recommendation_module._optional_current_user] = (
+        lambda: None
+    )
+    payload = {
+        "user_id": 2,
+        "max_time": 60,
+        "max_calories": 800,
+        "allergies": [],
+        "inventory": [{"name": "豚肉", "quantity": "200"}],
+    }
+
+    try:
+        with TestClient(app) as client:
+            v1 = client.post("/api/v1/recommendation/propose", json=payload)
+            v2 = client.post("/api/v1/recommendation/v2/propose", json=payload)
+            assert v1.status_code == 200
+            assert v2.status_code == 200
+            legacy = v1.json()
+            data = v2.json()
+
+            assert data["user_preference"] == {
+                "vector": legacy[0]["user_preference_vector"],
+                "labels": legacy[0]["user_preference_labels"],
+            }
+            assert data["inventory"] == {
+                "source": "client",
+                "count": 1,
+                "label": "指定在庫 1件",
+            }
+            shared = {
+                "user_preference_vector",
+                "user_preference_labels",
+                "inventory_source",
+                "inventory_count",
+                "inventory_label",
+            }
+            assert data["results"] == [
+                {key: value for key, value in row.items() if key not in shared}
+                for row in legacy
+            ]
+
+            missing_inventory = client.post(
+                "/api/v1/recommendation/v2/propose",
+                json={k: v for k, v in payload.items() if k != "inventory"},
+            )
+            assert missing_inventory.status_code == 400
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
@@ -0,0 +1,65 @@
+import json
+from decimal import Decimal
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, TypeAdapter
+
+from app.backend.api.compression import CompressionMiddleware, accepts_encoding
+from app.backend.api.responses import FastJSONResponse, validated_response
+
+
+class Row(BaseModel):
+    name: str
+    vector: List[float]
+
+
+def test_fast_responses_and_compression_threshold():
+    rows = TypeAdapter(List[Row])
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=200)
+
+    @app.get("/raw")
+    def raw(n: int):
+        return FastJSONResponse(
+            {
+                "bbox": np.arange(4, dtype=np.int64).reshape(2, 2),
+                "confidence": np.float32(0.5),
+                "quantity": Decimal("1.50"),
+                "lines": [{"text": "トマト", "line_id": idx} for idx in range(n)],
+            }
+        )
+
+    @app.get("/rows", response_model=List[Row])
+    def list_rows():
+        return validated_response(
+            rows, rows.validate_python([{"name": "a", "vector": [1, 2]}])
+        )
+
+    with TestClient(app) as client:
+        big = client.get("/raw", params={"n": 50}, headers={"Accept-Encoding": "gzip"})
+        assert big.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in big.headers["vary"]
+        body = big.json()
+        assert body["bbox"] == [[0, 1], [2, 3]]
+        assert body["confidence"] == 0.5
+        assert body["quantity"] == 1.5
+        assert len(body["lines"]) == 50
+
+        raw = client.get(
+            "/raw", params={"n": 50}, headers={"Accept-Encoding": "identity"}
+        )
+        assert "content-encoding" not in raw.headers
+        assert int(raw.headers["content-length"]) > int(big.headers["content-length"])
+        assert json.loads(raw.content) == body
+
+        small = client.get("/raw", params={"n": 0}, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+
+        assert client.get("/rows").json() == [{"name": "a", "vector": [1.0, 2.0]}]
+
+    assert accepts_encoding("gzip, deflate, br;q=0.5", "br")
+    assert not accepts_encoding("gzip;q=0, br", "gzip")
+    assert not accepts_encoding("deflate", "gzip")
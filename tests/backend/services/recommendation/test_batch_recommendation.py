@@ -0,0 +1,187 @@
+import json
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from scipy import sparse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.backend.database import Base
+from app.backend.models import (
+    Food,
+    FoodCategory,
+    IngredientStatus,
+    Recipe,
+    RecipeFood,
+    User,
+    UserFood,
+    UserRecipeHistory,
+)
+from app.backend.services.recommendation.batch import (
+    _coverage_block_rows,
+    _covered_quantities,
+    run_batch_recommendations,
+)
+from app.backend.services.recommendation.data_models import UserParameters
+from app.backend.services.recommendation.data_source import (
+    InventoryManager,
+    RecipeDataSource,
+)
+from app.backend.services.recommendation.proposer_logic import RecipeProposer
+
+FOODS = ["にんじん", "豚肉", "キャベツ", "玉ねぎ", "塩"]
+RECIPES = {
+    101: ({"is_japanese": True}, {1: 100, 2: 150, 5: 3}),
+    102: ({"is_chinese": True}, {2: 200, 3: 100}),
+    103: ({"is_western": True, "is_soup": True}, {4: 120, 1: 50}),
+    104: ({"is_japanese": True, "is_soup": True}, {3: 80, 4: 40, 5: 2}),
+}
+STOCK = {
+    1: [(1, 100, 1), (2, 60, None), (4, 500, 10)],
+    2: [(2, 400, 2), (3, 30, None)],
+    3: [(3, 200, None), (4, 100, 1), (5, 10, None)],
+}
+
+
+def _setup_database():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    today = date.today()
+    with SessionLocal() as session:
+        session.add(FoodCategory(category_id=1, category_name="食材"))
+        for food_id, name in enumerate(FOODS, start=1):
+            session.add(Food(food_id=food_id, food_name=name, category_id=1))
+        for recipe_id, (flags, requirements) in RECIPES.items():
+            session.add(
+                Recipe(
+                    recipe_id=recipe_id,
+                    recipe_name=f"recipe-{recipe_id}",
+                    cooking_time=20,
+                    calories=300,
+                    **flags,
+                )
+            )
+            for food_id, quantity in requirements.items():
+                session.add(
+                    RecipeFood(
+                        recipe_id=recipe_id,
+                        food_id=food_id,
+                        quantity_g=Decimal(quantity),
+                    )
+                )
+        for user_id, rows in STOCK.items():
+            session.add(
+                User(
+                    user_id=user_id,
+                    username=f"user{user_id}",
+                    email=f"user{user_id}@example.com",
+                    password_hash="x",
+                )
+            )
+            for food_id, quantity, days in rows:
+                session.add(
+                    UserFood(
+                        user_id=user_id,
+                        food_id=food_id,
+                        quantity_g=Decimal(quantity),
+                        expiration_date=today + timedelta(days=days)
+                        if days is not None
+                        else None,
+                        status=IngredientStatus.UNUSED,
+                    )
+                )
+        session.add_all(
+            [
+                UserRecipeHistory(user_id=1, recipe_id=103, servings=Decimal("2")),
+                UserRecipeHistory(user_id=2, recipe_id=102, servings=Decimal("1")),
+            ]
+        )
+        session.commit()
+    return engine, SessionLocal
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_scores_match_single_user_proposer(tmp_path, workers):
+    engine, SessionLocal = _setup_database()
+    output = tmp_path / "recs.jsonl"
+    try:
+        summary = run_batch_recommendations(
+            output,
+            session_factory=SessionLocal,
+            top_k=3,
+            chunk_size=2,
+            workers=workers,
+            max_time=60,
+            max_calories=800,
+        )
+        assert summary.users == 3
+        lines = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [line["user_id"] for line in lines] == [1, 2, 3]
+
+        with SessionLocal() as session:
+            for line in lines:
+                source = RecipeDataSource(db_session=session)
+                recipes = source.load_and_vectorize_recipes()
+                proposer = RecipeProposer(
+                    recipes,
+                    InventoryManager(db_session=session).get_snapshot(line["user_id"]),
+                    source.create_user_profile_vector(line["user_id"]),
+                    food_names=source.food_names,
+                )
+                expected = proposer.propose(
+                    UserParameters(max_time=60, max_calories=800, allergies=set())
+                )[:3]
+                got = line["recommendations"]
+                assert [r["recipe_id"] for r in got] == [
+                    r["recipe_id"] for r in expected
+                ]
+                for batch_row, single_row in zip(got, expected):
+                    assert batch_row["final_score"] == pytest.approx(
+                        single_row["final_score"]
+                    )
+                    assert batch_row["is_boosted"] == single_row["is_boosted"]
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_coverage_work_array_stays_within_byte_budget():
+    rng = np.random.default_rng(0)
+    requirements = sparse.random(
+        2000, 400, density=0.02, format="csr", random_state=0, dtype=np.float64
+    )
+    requirements.data *= 200
+    # 材料のないレシピ
+    requirements.data[requirements.indptr[5] : requirements.indptr[6]] = 0
+    requirements.eliminate_zeros()
+    stock = rng.random((64, 400)) * 150 - 10
+    budget = 256 * 1024
+
+    assert _coverage_block_rows(requirements.nnz, budget) < stock.shape[0]
+    assert _coverage_block_rows(10**9, budget) == 1
+
+    tracemalloc.start()
+    try:
+        covered = _covered_quantities(requirements, stock, budget)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # 出力 (users x recipes) と添字のコピー以外は、作業配列とブロック分の
+    # 部分和（レシピ数 <= 非ゼロ数なので作業配列以下）に収まる
+    assert peak <= covered.nbytes + requirements.nnz * 8 + 3 * budget
+    # 一括で users x nnz を作る場合はこの数倍になる
+    assert stock.shape[0] * requirements.nnz * 8 > 10 * budget
+
+    dense = requirements.toarray()
+    expected = np.minimum(np.maximum(stock, 0.0)[:, None, :], dense[None]).sum(axis=2)
+    np.testing.assert_allclose(covered, expected, rtol=1e-12)
+    assert not covered[:, 5].any()
@@ -0,0 +1,114 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.backend.database import Base
+from app.backend.models import Food, FoodCategory, IngredientStatus, User, UserFood
+from app.backend.services.recommendation.inventory_snapshot import (
+    get_inventory_snapshot,
+)
+from app.backend.services.recommendation.proposer_logic import RecipeProposer
+
+
+def _setup_inmemory_db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as session:
+        session.add(
+            User(user_id=1, username="u", email="u@example.com", password_hash="x")
+        )
+        session.add(FoodCategory(category_id=1, category_name="野菜"))
+        session.add_all(
+            [
+                Food(food_id=3, food_name="玉ねぎ", category_id=1),
+                Food(food_id=7, food_name="にんじん", category_id=1),
+                Food(food_id=9, food_name="キャベツ", category_id=1),
+            ]
+        )
+        session.add_all(
+            [
+                UserFood(
+                    user_id=1,
+                    food_id=7,
+                    quantity_g=Decimal("100"),
+                    expiration_date=date(2030, 1, 10),
+                    status=IngredientStatus.UNUSED,
+                ),
+                UserFood(
+                    user_id=1,
+                    food_id=7,
+                    quantity_g=Decimal("50"),
+                    expiration_date=date(2030, 1, 5),
+                    status=IngredientStatus.UNUSED,
+                ),
+                UserFood(
+                    user_id=1,
+                    food_id=3,
+                    quantity_g=Decimal("80"),
+                    status=IngredientStatus.UNUSED,
+                ),
+                UserFood(
+                    user_id=1,
+                    food_id=9,
+                    quantity_g=Decimal("500"),
+                    status=IngredientStatus.DELETED,
+                ),
+            ]
+        )
+        session.commit()
+    return engine, SessionLocal
+
+
+def test_snapshot_merges_rows_and_refreshes_after_commit():
+    engine, SessionLocal = _setup_inmemory_db()
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    try:
+        with SessionLocal() as session:
+            snapshot = get_inventory_snapshot(session, 1)
+        assert snapshot.food_ids.tolist() == [3, 7]
+        assert snapshot.quantities.tolist() == [80.0, 150.0]
+        assert snapshot.expiry_of(1) == date(2030, 1, 5)
+        assert snapshot.quantities_for([7, 9]) == {7: 150.0}
+
+        statements.clear()
+        with SessionLocal() as session:
+            assert get_inventory_snapshot(session, 1) is snapshot
+        assert statements == []
+
+        proposer = RecipeProposer([], snapshot, snapshot.quantities)
+        assert proposer.inventory_dict[7] == (150.0, date(2030, 1, 5))
+
+        with SessionLocal() as session:
+            stock = session.query(UserFood).filter(UserFood.food_id == 3).one()
+            stock.quantity_g = Decimal("10")
+            session.flush()
+            uncommitted = get_inventory_snapshot(session, 1)
+            assert uncommitted.quantities_for([3]) == {3: 10.0}
+            session.rollback()
+
+        with SessionLocal() as session:
+            assert get_inventory_snapshot(session, 1).quantities_for([3]) == {3: 80.0}
+            stock = session.query(UserFood).filter(UserFood.food_id == 3).one()
+            stock.quantity_g = Decimal("30")
+            session.commit()
+
+        with SessionLocal() as session:
+            refreshed = get_inventory_snapshot(session, 1)
+        assert refreshed.quantities_for([3]) == {3: 30.0}
+        assert refreshed.version > snapshot.version
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
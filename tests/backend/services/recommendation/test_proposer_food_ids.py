@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.backend.services.recommendation.data_models import (
+    Ingredient,
+    Recipe,
+    UserParameters,
+)
+from app.backend.services.recommendation.data_source import FEATURE_DIMENSIONS
+from app.backend.services.recommendation.proposer_logic import RecipeProposer
+
+FOOD_NAMES = {1: "にんじん", 2: "豚肉", 3: "塩", 4: "えび"}
+
+
+def _recipe(recipe_id: int, req_qty):
+    vector = np.zeros(len(FEATURE_DIMENSIONS))
+    vector[0] = 1.0
+    return Recipe(
+        id=recipe_id,
+        name=f"recipe-{recipe_id}",
+        req_qty=req_qty,
+        prep_time=10,
+        calories=100,
+        feature_vector=vector,
+    )
+
+
+def test_proposer_scores_by_food_id_and_resolves_names_for_payload():
+    recipes = [
+        _recipe(1, {1: 100.0, 2: 100.0, 3: 5.0}),
+        _recipe(2, {4: 50.0, 1: 10.0}),
+    ]
+    inventory = [
+        # クライアント在庫は名前のみ、サーバー在庫は food_id 付き
+        Ingredient(name="にんじん", quantity=100.0),
+        Ingredient(
+            name="ignored",
+            quantity=40.0,
+            expiration_date=date.today() + timedelta(days=1),
+            food_id=2,
+        ),
+        Ingredient(name="未登録の食材", quantity=999.0),
+    ]
+    proposer = RecipeProposer(
+        recipes, inventory, np.ones(len(FEATURE_DIMENSIONS)), food_names=FOOD_NAMES
+    )
+    assert set(proposer.inventory_dict) == {1, 2}
+
+    params = UserParameters(max_time=30, max_calories=500, allergies={"えび"})
+    proposals = proposer.propose(params)
+
+    assert [p["recipe_id"] for p in proposals] == [1]
+    top = proposals[0]
+    assert top["coverage_score"] == 0.7
+    assert top["is_boosted"] is True
+    assert top["missing_items"] == ["豚肉 (60.0g不足)"]
+    assert top["required_qty"] == {"にんじん": 100.0, "豚肉": 100.0, "塩": 5.0}
+
+
+def test_use_it_up_window_does_not_change_boost_or_scores():
+    recipes = [_recipe(1, {1: 100.0}), _recipe(2, {2: 100.0})]
+    today = date.today()
+    inventory = [
+        Ingredient(name="", quantity=100.0, expiration_date=today, food_id=1),
+        # 使い切り対象 (days=10) だがブースト期間 (3 日) の外
+        Ingredient(
+            name="", quantity=100.0, expiration_date=today + timedelta(7), food_id=2
+        ),
+    ]
+    proposer = RecipeProposer(
+        recipes, inventory, np.ones(len(FEATURE_DIMENSIONS)), food_names=FOOD_NAMES
+    )
+    params = UserParameters(max_time=30, max_calories=500, allergies=set())
+
+    proposed = {p["recipe_id"]: p for p in proposer.propose(params, today=today)}
+    use_it_up = proposer.propose_use_it_up(params, days=10, today=today)
+
+    # 使い切れる量は同じなので、ブーストされた 1 が先
+    assert [r["recipe_id"] for r in use_it_up] == [1, 2]
+    for row in use_it_up:
+        expected = proposed[row["recipe_id"]]
+        assert row["is_boosted"] == expected["is_boosted"]
+        assert row["final_score"] == expected["final_score"]
+    assert {r["recipe_id"]: r["is_boosted"] for r in use_it_up} == {1: True, 2: False}
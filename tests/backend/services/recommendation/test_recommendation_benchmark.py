@@ -0,0 +1,33 @@
+import json
+from dataclasses import replace
+
+from app.scripts.benchmark_recommendation import (
+    STAGES,
+    SyntheticConfig,
+    find_regressions,
+    main,
+    run_benchmark,
+)
+
+
+def test_benchmark_reports_each_stage_and_flags_regressions(tmp_path):
+    config = SyntheticConfig(recipes=60, users=3, inventory_size=8, history_size=4)
+    results = run_benchmark(config, repeats=3)
+
+    assert [item.stage for item in results] == list(STAGES)
+    for item in results:
+        assert item.recipes == 60
+        assert item.runs == 3
+        assert 0 < item.p50_ms <= item.p99_ms
+        assert item.peak_mb > 0
+
+    assert find_regressions(results, results) == []
+    faster = [replace(item, p50_ms=item.p50_ms / 2) for item in results]
+    assert len(find_regressions(results, faster)) == len(STAGES)
+
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(
+        json.dumps([{**item.__dict__, "p50_ms": 1e-6} for item in results])
+    )
+    argv = ["--recipes", "60", "--users", "3", "--repeats", "2"]
+    assert main([*argv, "--baseline", str(baseline)]) == 1
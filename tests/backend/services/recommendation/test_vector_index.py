@@ -0,0 +1,51 @@
+import numpy as np
+
+from app.backend.services.recommendation.data_models import (
+    Ingredient,
+    Recipe,
+    UserParameters,
+)
+from app.backend.services.recommendation.proposer_logic import RecipeProposer
+from app.backend.services.recommendation.vector_index import ExactIndex, HNSWIndex
+
+
+def test_hnsw_recall_against_exact_index():
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(400, 32))
+    queries = rng.normal(size=(30, 32))
+    exact = ExactIndex(vectors)
+    hnsw = HNSWIndex(vectors, m=8, ef_construction=64, ef_search=64)
+
+    hits = 0
+    for query in queries:
+        expected, sims = exact.search(query, 10)
+        assert np.all(np.diff(sims) <= 0)
+        found, _ = hnsw.search(query, 10)
+        hits += len(set(expected.tolist()) & set(found.tolist()))
+    assert hits / (10 * len(queries)) >= 0.9
+
+
+def test_candidate_limit_scores_only_nearest_recipes():
+    vectors = np.eye(4)
+    recipes = [
+        Recipe(
+            id=recipe_id,
+            name=f"recipe-{recipe_id}",
+            req_qty={1: 100.0},
+            prep_time=10,
+            calories=100,
+            feature_vector=vectors[recipe_id - 1],
+        )
+        for recipe_id in range(1, 5)
+    ]
+    inventory = [Ingredient(name="にんじん", quantity=100.0, food_id=1)]
+    profile = np.array([0.1, 0.9, 0.5, 0.0])
+    params = UserParameters(max_time=30, max_calories=500, allergies=set())
+
+    full = RecipeProposer(recipes, inventory, profile).propose(params)
+    limited = RecipeProposer(recipes, inventory, profile, candidate_limit=2).propose(
+        params
+    )
+
+    assert [p["recipe_id"] for p in full] == [2, 3, 1, 4]
+    assert limited == full[:2]
@@ -0,0 +1,51 @@
+from app.backend.services.food_search import FoodEntry, FoodSearchIndex, to_romaji
+
+
+def test_index_folds_kana_and_romaji_and_ranks_prefix_first():
+    names = [
+        "トマト",
+        "ミニトマト",
+        "ブロッコリー",
+        "キャベツ",
+        "チーズ",
+        "牛乳",
+        "シュークリーム",
+        "チューハイ",
+        "シャケ",
+        "きゅうり",
+        "ぎゅうにゅう",
+        "しょうゆ",
+    ]
+    index = FoodSearchIndex([FoodEntry(idx, name) for idx, name in enumerate(names)])
+
+    assert to_romaji("ぶろっこりー") == "burokkori"
+    assert to_romaji("きゃべつ") == "kyabetsu"
+
+    def search(query):
+        return [entry.food_name for entry in index.search(query)]
+
+    assert search("トマト") == ["トマト", "ミニトマト"]
+    assert search("とま") == ["トマト", "ミニトマト"]
+    assert search("TOMATO") == ["トマト", "ミニトマト"]
+    assert search("kyabetu") == ["キャベツ"]  # 訓令式の綴りも受け付ける
+    assert search("chi-zu") == ["チーズ"]
+    # ヘボン式の shu / chu / sha はそのまま、訓令式は寄せて引ける
+    assert search("shu-kuri-mu") == ["シュークリーム"]
+    assert search("syukuri") == ["シュークリーム"]
+    assert search("chu-hai") == ["チューハイ"]
+    assert search("tyuhai") == ["チューハイ"]
+    assert search("cyuhai") == ["チューハイ"]
+    assert search("shake") == ["シャケ"]
+    assert search("syake") == ["シャケ"]
+    # 長音は伸ばしても伸ばさなくても引ける
+    assert search("kyuri") == ["きゅうり"]
+    assert search("kyuuri") == ["きゅうり"]
+    assert search("gyunyu") == ["ぎゅうにゅう"]
+    assert search("gyuunyuu") == ["ぎゅうにゅう"]
+    assert search("shoyu") == ["しょうゆ"]
+    assert search("shouyu") == ["しょうゆ"]
+    assert search("乳") == ["牛乳"]
+    assert search("ｒｏｋｋｏ") == ["ブロッコリー"]
+    assert search("xyz") == []
+    assert search("  ") == []
+    assert index.search("と", limit=1)[0].food_name == "トマト"
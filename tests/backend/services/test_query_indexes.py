@@ -0,0 +1,88 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.schema import CreateIndex
+
+from app.backend.api.routers.ingredients import _ingredient_list_query
+from app.backend.database import Base
+from app.backend.models import Food, IngredientStatus, UserFood, UserRecipeHistory
+from app.backend.services.food_search import food_name_matches
+
+# 指定すると MySQL 上でも EXPLAIN を確認する（テーブルを作成・削除するので専用 DB を使う）
+MYSQL_TEST_URL = os.getenv("MYSQL_TEST_URL")
+
+
+def _hot_queries(dialect_name):
+    return {
+        "idx_user_foods_user_status": _ingredient_list_query(1, None),
+        "idx_user_foods_user_food_status": select(UserFood).where(
+            UserFood.user_id == 1,
+            UserFood.food_id == 2,
+            UserFood.status != IngredientStatus.DELETED,
+        ),
+        "idx_user_recipe_history_user": select(UserRecipeHistory)
+        .where(UserRecipeHistory.user_id == 1)
+        .order_by(UserRecipeHistory.cooked_at.desc())
+        .limit(200),
+        "ft_foods_food_name": select(Food).where(
+            food_name_matches("トマト", dialect_name)
+        ),
+    }
+
+
+def _explain(conn, prefix, stmt):
+    compiled = stmt.compile(conn.engine, compile_kwargs={"literal_binds": True})
+    return conn.exec_driver_sql(f"{prefix} {compiled}").mappings().all()
+
+
+def test_hot_queries_use_composite_indexes_on_sqlite():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    try:
+        with engine.connect() as conn:
+            for index_name, stmt in _hot_queries("sqlite").items():
+                details = " ".join(
+                    row["detail"] for row in _explain(conn, "EXPLAIN QUERY PLAN", stmt)
+                )
+                if index_name.startswith("ft_"):
+                    # SQLite には FULLTEXT がないので LIKE にフォールバックする
+                    assert "SCAN foods" in details
+                else:
+                    assert f"USING INDEX {index_name}" in details, details
+    finally:
+        engine.dispose()
+
+
+def test_food_name_search_uses_ngram_fulltext_on_mysql():
+    dialect = mysql.dialect()
+    index = next(i for i in Food.__table__.indexes if i.name == "ft_foods_food_name")
+    ddl = str(CreateIndex(index).compile(dialect=dialect))
+    assert ddl.startswith("CREATE FULLTEXT INDEX ft_foods_food_name")
+    assert "WITH PARSER ngram" in ddl
+
+    clause = food_name_matches(' "トマト" +缶', "mysql")
+    sql = str(clause.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    assert sql == "MATCH (foods.food_name) AGAINST ('\"トマト 缶\"' IN BOOLEAN MODE)"
+    # ngram より短い語は索引で引けないので LIKE のまま
+    assert "LIKE" in str(food_name_matches("卵", "mysql").compile(dialect=dialect))
+
+
+@pytest.mark.skipif(not MYSQL_TEST_URL, reason="MYSQL_TEST_URL が未設定")
+def test_hot_queries_use_indexes_on_mysql():
+    engine = create_engine(MYSQL_TEST_URL)
+    Base.metadata.create_all(bind=engine)
+    try:
+        with engine.connect() as conn:
+            for index_name, stmt in _hot_queries("mysql").items():
+                rows = _explain(conn, "EXPLAIN", stmt)
+                candidates = {
+                    key
+                    for row in rows
+                    for key in (row["possible_keys"] or "").split(",")
+                }
+                assert index_name in candidates, rows
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
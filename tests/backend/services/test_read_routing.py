@@ -0,0 +1,151 @@
+import asyncio
+from collections import OrderedDict
+
+from sqlalchemy import create_engine, delete, func, select, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.backend import database
+from app.backend.database import Base, route_reads
+from app.backend.models import (
+    Food,
+    FoodCategory,
+    IngredientAbstraction,
+    RefreshToken,
+    UserFood,
+)
+
+
+def _make_db(path, food_names):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add(FoodCategory(category_id=1, category_name="野菜"))
+        session.add_all(
+            Food(food_id=idx, food_name=name, category_id=1)
+            for idx, name in enumerate(food_names, start=1)
+        )
+        session.commit()
+    return engine
+
+
+def _food_count(session):
+    return session.scalar(select(func.count()).select_from(Food))
+
+
+def test_reads_use_replica_until_the_same_user_or_catalog_was_written(
+    tmp_path, monkeypatch
+):
+    primary = _make_db(tmp_path / "primary.db", ["Tomato", "Onion"])
+    # レプリカは遅延していて 1 件しか持っていない
+    replica = _make_db(tmp_path / "replica.db", ["Tomato"])
+    monkeypatch.setattr(database, "_STICKY_UNTIL", OrderedDict())
+    SessionLocal = database.routing_sessionmaker(primary, [replica])
+    try:
+        with SessionLocal() as session:
+            assert _food_count(session) == 2  # route_reads するまではプライマリ
+            route_reads(session, 1)
+            assert _food_count(session) == 1
+            session.add(UserFood(user_id=1, food_id=1, quantity_g=100))
+            session.commit()
+            # 書き込んだセッションはプライマリに固定される
+            assert _food_count(session) == 2
+
+        with SessionLocal() as session:
+            route_reads(session, 1)
+            assert _food_count(session) == 2
+            route_reads(session, 2)
+            assert _food_count(session) == 1
+            session.execute(select(Food).with_for_update()).all()
+            assert _food_count(session) == 2
+
+        with SessionLocal() as session:
+            # user_id で絞った一括削除は該当ユーザーだけを固定する
+            session.execute(delete(RefreshToken).where(RefreshToken.user_id == 2))
+            session.commit()
+            assert database.is_sticky(2)
+            assert not database.is_sticky(3)
+
+            # マスタの更新は全ユーザーの読み取りをプライマリへ送る
+            session.execute(update(Food).values(is_trackable=True))
+            session.rollback()
+            assert not database.is_sticky(3)
+            session.execute(update(Food).values(is_trackable=True))
+            session.commit()
+            assert database.is_sticky(3)
+
+        monkeypatch.setattr(database, "_STICKY_UNTIL", OrderedDict())
+        assert database.canonical_bind(replica) is primary
+    finally:
+        primary.dispose()
+        replica.dispose()
+
+
+def test_async_sessions_route_reads_to_async_replicas(tmp_path, monkeypatch):
+    primary = _make_db(tmp_path / "primary.db", ["Tomato", "Onion"])
+    replica = _make_db(tmp_path / "replica.db", ["Tomato"])
+    monkeypatch.setattr(database, "_STICKY_UNTIL", OrderedDict())
+    async_replica = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=NullPool
+    )
+    AsyncSessionLocal = database.async_sessionmaker_for(
+        primary, replicas=[async_replica], poolclass=NullPool
+    )
+
+    async def counts():
+        async with AsyncSessionLocal() as db:
+            before = await db.run_sync(_food_count)
+            route_reads(db, 1)
+            return before, await db.run_sync(_food_count)
+
+    try:
+        assert asyncio.run(counts()) == (2, 1)
+        database.mark_sticky([1])
+        assert asyncio.run(counts()) == (2, 2)
+    finally:
+        asyncio.run(async_replica.dispose())
+        asyncio.run(AsyncSessionLocal.kw["bind"].dispose())
+        primary.dispose()
+        replica.dispose()
+
+
+def test_mark_sticky_drops_expired_entries(monkeypatch):
+    monkeypatch.setattr(database, "_STICKY_UNTIL", OrderedDict())
+    monkeypatch.setattr(database, "DB_REPLICA_STICKY_SECONDS", 0.0)
+    database.mark_sticky([1, None])
+    database.mark_sticky([2])
+    assert list(database._STICKY_UNTIL) == [2]
+
+    monkeypatch.setattr(database, "DB_REPLICA_STICKY_SECONDS", 60.0)
+    database.mark_sticky([3])
+    database.mark_sticky([4, 3])
+    assert list(database._STICKY_UNTIL) == [4, 3]
+    assert database.is_sticky(3)
+    assert not database.is_sticky(1)
+
+
+def test_abstraction_cache_writes_do_not_pin_other_users(tmp_path, monkeypatch):
+    primary = _make_db(tmp_path / "primary.db", ["Tomato"])
+    monkeypatch.setattr(database, "_STICKY_UNTIL", OrderedDict())
+    SessionLocal = database.routing_sessionmaker(primary, [])
+    try:
+        with SessionLocal() as session:
+            # OCR のたびに書かれる抽象化キャッシュは全体の固定対象外
+            session.add(
+                IngredientAbstraction(
+                    normalized_text="とまと", resolved_food_name="Tomato", food_id=1
+                )
+            )
+            session.commit()
+            session.execute(
+                update(IngredientAbstraction).values(source="manual_override")
+            )
+            session.commit()
+            assert not database.is_sticky(3)
+
+            session.add(FoodCategory(category_id=2, category_name="果物"))
+            session.commit()
+            assert database.is_sticky(3)
+    finally:
+        primary.dispose()
@@ -0,0 +1,93 @@
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.backend.database import Base
+from app.backend.models import Recipe
+from app.backend.services.recipe_flags import (
+    RECIPE_FLAG_FIELDS,
+    flag_names,
+    mask_for,
+    pack_flags,
+    unpack_vectors,
+)
+
+
+def _sqlite_session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def test_packed_flags_round_trip_and_filter_in_sql():
+    rng = np.random.default_rng(3)
+    flags = rng.random((200, len(RECIPE_FLAG_FIELDS))) < 0.3
+    masks = np.array(
+        [pack_flags(dict(zip(RECIPE_FLAG_FIELDS, row))) for row in flags],
+        dtype=np.uint32,
+    )
+    assert np.array_equal(unpack_vectors(masks), flags.astype(np.float64))
+
+    engine, SessionLocal = _sqlite_session_factory()
+    try:
+        with SessionLocal() as session:
+            for recipe_id, row in enumerate(flags, start=1):
+                session.add(
+                    Recipe(
+                        recipe_id=recipe_id,
+                        recipe_name=f"recipe-{recipe_id}",
+                        **{
+                            name: bool(value)
+                            for name, value in zip(RECIPE_FLAG_FIELDS, row)
+                        },
+                    )
+                )
+            session.commit()
+
+            required = mask_for(["is_soup"])
+            excluded = mask_for(["texture_fried"])
+            # /recipes/search と同じ 1 回の AND と比較
+            matched = {
+                recipe_id
+                for (recipe_id,) in session.query(Recipe.recipe_id).filter(
+                    Recipe.feature_mask.op("&")(required | excluded) == required
+                )
+            }
+        soup = RECIPE_FLAG_FIELDS.index("is_soup")
+        fried = RECIPE_FLAG_FIELDS.index("texture_fried")
+        expected = flags[:, soup] & ~flags[:, fried]
+        assert matched == {int(idx) + 1 for idx in np.flatnonzero(expected)}
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_feature_mask_follows_flag_columns_on_insert_and_update():
+    engine, SessionLocal = _sqlite_session_factory()
+    try:
+        with SessionLocal() as session:
+            session.add(
+                Recipe(
+                    recipe_id=1, recipe_name="味噌汁", is_japanese=True, is_soup=True
+                )
+            )
+            session.commit()
+
+        with SessionLocal() as session:
+            recipe = session.get(Recipe, 1)
+            assert flag_names(recipe.feature_mask) == ["is_japanese", "is_soup"]
+            recipe.is_soup = False
+            recipe.flavor_salty = True
+            session.commit()
+
+        with SessionLocal() as session:
+            mask = session.query(Recipe.feature_mask).scalar()
+            assert flag_names(mask) == ["is_japanese", "flavor_salty"]
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
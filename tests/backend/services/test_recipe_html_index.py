@@ -0,0 +1,60 @@
+import json
+
+from app.backend.services import recipe_loader
+
+
+def _write_page(path, title, ingredients, steps):
+    path.write_text(
+        "<html><body>"
+        f"<h1>{title}</h1>"
+        f'<div class="ingredients"><ul><li>{ingredients}</li></ul></div>'
+        f'<div class="steps"><ol><li>{steps}</li></ol></div>'
+        "</body></html>",
+        encoding="utf-8",
+    )
+
+
+def _reset_cache(monkeypatch, html_dir, index_path):
+    monkeypatch.setattr(recipe_loader, "_HTML_DETAIL_CACHE", None)
+    monkeypatch.setattr(recipe_loader, "_resolve_recipe_html_dir", lambda: html_dir)
+    monkeypatch.setenv("RECIPE_HTML_INDEX_PATH", str(index_path))
+
+
+def test_html_detail_index_is_persisted_and_reused(tmp_path, monkeypatch):
+    html_dir = tmp_path / "recipe-list"
+    html_dir.mkdir()
+    index_path = tmp_path / "index.json"
+    _write_page(html_dir / "0001.html", "肉じゃが", "じゃがいも 300g", "煮る")
+    _write_page(html_dir / "0002.html", "味噌汁", "豆腐 100g", "溶く")
+
+    _reset_cache(monkeypatch, html_dir, index_path)
+    lookup = recipe_loader._load_html_detail_lookup()
+    assert lookup["肉じゃが"]["instructions"] == "煮る"
+    assert lookup["味噌汁"]["file_name"] == "0002.html"
+
+    index = json.loads(index_path.read_text(encoding="utf-8"))
+    assert set(index["files"]) == {"0001.html", "0002.html"}
+    assert index["files"]["0001.html"]["size"] > 0
+
+    parsed = []
+    original = recipe_loader._extract_html_detail
+
+    def _tracking_extract(path):
+        parsed.append(path.name)
+        return original(path)
+
+    monkeypatch.setattr(recipe_loader, "_extract_html_detail", _tracking_extract)
+
+    _reset_cache(monkeypatch, html_dir, index_path)
+    assert recipe_loader._load_html_detail_lookup() == lookup
+    assert parsed == []
+
+    _write_page(html_dir / "0002.html", "豚汁", "豚肉 80g", "煮込む")
+    (html_dir / "0001.html").unlink()
+
+    _reset_cache(monkeypatch, html_dir, index_path)
+    refreshed = recipe_loader._load_html_detail_lookup()
+    assert parsed == ["0002.html"]
+    assert set(refreshed) == {"豚汁"}
+    index = json.loads(index_path.read_text(encoding="utf-8"))
+    assert set(index["files"]) == {"0002.html"}
@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.backend.database import Base
+from app.backend.models import RefreshToken, User
+from app.backend.services import token_store
+
+
+def _setup_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as session:
+        session.add(
+            User(user_id=1, username="u", email="u@example.com", password_hash="x")
+        )
+        session.commit()
+    return engine, SessionLocal
+
+
+def test_tokens_are_hashed_capped_per_user_and_swept_in_batches():
+    engine, SessionLocal = _setup_session()
+    future = datetime.utcnow() + timedelta(days=7)
+    try:
+        with SessionLocal() as session:
+            for idx in range(5):
+                token_store.store_token(session, f"token-{idx}", 1, future, limit=3)
+
+            stored = session.query(RefreshToken.token_hash).all()
+            assert len(stored) == 3
+            assert all(len(row.token_hash) == 64 for row in stored)
+            assert token_store.find_token(session, "token-1") is None
+            assert token_store.find_token(session, "token-4") is not None
+
+            assert token_store.revoke_token(session, "token-4")
+            assert token_store.find_token(session, "token-4") is None
+
+            past = datetime.utcnow() - timedelta(days=1)
+            for idx in range(7):
+                token_store.store_token(session, f"old-{idx}", 1, past, limit=0)
+            assert token_store.purge_expired(session, batch_size=3) == 7
+            assert session.query(RefreshToken).count() == 2
+
+            token_store.store_token(session, "stale", 1, past, limit=0)
+
+        async def sweep_once():
+            task = asyncio.ensure_future(
+                token_store.run_sweeper(SessionLocal, interval_seconds=60)
+            )
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                with SessionLocal() as session:
+                    if session.query(RefreshToken).count() == 2:
+                        break
+            task.cancel()
+
+        asyncio.run(sweep_once())
+        with SessionLocal() as session:
+            assert token_store.find_token(session, "stale") is None
+            assert session.query(RefreshToken).count() == 2
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()